@@ -11,33 +11,66 @@ This service:
 
 import os
 import json
-import tempfile
-import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable, Union
 from datetime import datetime
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from pydantic import BaseModel
 
-from verity_check.ingest import ingest_documents
-from verity_check.perception import extract_data
+from verity_check.ingest import DocumentBuffer, ingest_source_async, image_profile
+from verity_check.worker_pool import get_pool, shutdown_pool, pool_stats
+from verity_check.perception_cache import cache_stats
+from verity_check.dedup import DuplicateIndex, perceive_once, unique_pages, dedup_stats
+from verity_check.jobs import Job, JobManager, JobQueueFull
+from verity_check.pipeline import Stage, run_stages, DOWNLOAD_CONCURRENCY, RASTERIZE_CONCURRENCY, PERCEPTION_CONCURRENCY
+from verity_check.perception import extract_data, aclose_client as aclose_vlm_client, category_for_doc_type, perception_stats
+from verity_check.api_client import get_client, aclose_client, client_stats
 from verity_check.knowledge_graph import build_graph
-from verity_check.consistency_check import run_checks
+from verity_check.schemas import normalize_record
+from verity_check.consistency_check import run_checks, check_stats
 
 
 # Configuration
 API_INTERNAL = "https://hackatum-api-254788991896.europe-west3.run.app/api/internal/"
+# Broker endpoint receiving reports of async jobs submitted with callback=true
+VALIDATION_CALLBACK_URL = os.getenv(
+    "VALIDATION_CALLBACK_URL",
+    "http://localhost:8080/api/v1/internal/applications/{application_id}/validation-result"
+)
+
+jobs = JobManager()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the shared ingest worker pool, HTTP client and job workers on startup and drains them on shutdown."""
+    pool = get_pool()
+    print(f"🧵 Ingest pool ready ({pool.max_workers} workers, queue size {pool.queue_size})")
+    get_client()
+    jobs.start()
+    yield
+    print("🛑 Shutting down job workers, ingest pool and HTTP clients...")
+    await jobs.stop()
+    shutdown_pool(wait=True)
+    await aclose_client()
+    await aclose_vlm_client()
+
+
 app = FastAPI(
     title="VerityCheck API",
     description="API for running verification checks on immigration applications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 
 class CheckRequest(BaseModel):
     """Request model for triggering verification checks"""
     applicationId: str
+    asyncMode: bool = False  # Return a job ID immediately instead of waiting for the report
+    callback: bool = False  # Async mode only: push the final report to VALIDATION_CALLBACK_URL
 
 
 class CheckResult(BaseModel):
@@ -58,6 +91,27 @@ class CheckResponse(BaseModel):
     checks: list[CheckResult]
 
 
+class JobResponse(BaseModel):
+    """Status of an asynchronous verification job"""
+    jobId: str
+    applicationId: str
+    status: str  # "QUEUED", "RUNNING", "DONE", "FAILED"
+    processedDocuments: list[Dict[str, Any]] = []  # Partial results per document
+    result: Optional[CheckResponse] = None
+    error: Optional[str] = None
+
+
+def job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        jobId=job.id,
+        applicationId=job.application_id,
+        status=job.status,
+        processedDocuments=job.partial_results,
+        result=job.result,
+        error=job.error
+    )
+
+
 @app.get("/")
 async def root():
     """Health check endpoint - also checks VLM service status"""
@@ -66,12 +120,11 @@ async def root():
     base_url = vlm_url.replace("/v1/chat/completions", "/v1/models")
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(base_url, timeout=2.0)
-            if response.status_code == 200:
-                vlm_status = "ready"
-            else:
-                vlm_status = f"error_{response.status_code}"
+        response = await get_client().get(base_url, timeout=2.0)
+        if response.status_code == 200:
+            vlm_status = "ready"
+        else:
+            vlm_status = f"error_{response.status_code}"
     except Exception as e:
         vlm_status = "unreachable"
         
@@ -82,8 +135,22 @@ async def root():
     }
 
 
-@app.post("/check", response_model=CheckResponse)
-async def run_verification_check(request: CheckRequest):
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics of the shared worker pools and caches"""
+    return {
+        "ingest_pool": pool_stats(),
+        "api_client": client_stats(),
+        "perception": perception_stats(),
+        "perception_cache": cache_stats(),
+        "dedup": dedup_stats(),
+        "consistency_checks": check_stats(),
+        "check_jobs": jobs.stats()
+    }
+
+
+@app.post("/check", response_model=Union[CheckResponse, JobResponse])
+async def run_verification_check(request: CheckRequest, response: Response):
     """
     Trigger verification check for an application.
     
@@ -92,225 +159,313 @@ async def run_verification_check(request: CheckRequest):
     2. Downloads all associated documents
     3. Runs the VerityGraph verification pipeline
     4. Returns verification results
-    """
-    application_id = request.applicationId
     
+    With asyncMode, the check runs on the job queue instead: the response is a job
+    (202) to poll via GET /check/{job_id}, or 429 if the queue is full.
+    """
+    if not request.asyncMode:
+        return await verify_application(request.applicationId)
+
+    async def run(job: Job) -> CheckResponse:
+        def on_document(doc_results: list):
+            job.partial_results.extend(
+                {"filename": r["metadata"]["filename"], "category": r["metadata"]["category"],
+                 "documentType": r["metadata"].get("document_type"), "data": r["data"]}
+                for r in doc_results
+            )
+
+        report = await verify_application(job.application_id, on_document)
+        if request.callback:
+            await push_validation_result(report)
+        return report
+
+    try:
+        job = jobs.submit(request.applicationId, run)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    print(f"📨 Queued verification job {job.id} for application {request.applicationId}")
+    response.status_code = 202
+    return job_response(job)
+
+
+@app.get("/check/{job_id}", response_model=JobResponse)
+async def get_verification_job(job_id: str):
+    """Status and (partial) results of an asynchronous verification job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job_response(job)
+
+
+async def push_validation_result(report: CheckResponse):
+    """Pushes a finished report to the broker's validation-result callback."""
+    url = VALIDATION_CALLBACK_URL.format(application_id=report.applicationId)
+    try:
+        callback_response = await get_client().post(url, json=report.model_dump())
+        callback_response.raise_for_status()
+        print(f"📤 Pushed validation result for {report.applicationId} to {url}")
+    except httpx.HTTPError as e:
+        print(f"❌ Failed to push validation result for {report.applicationId}: {e}")
+
+
+async def verify_application(application_id: str, on_document: Optional[Callable[[list], None]] = None) -> CheckResponse:
+    """
+    Runs the whole verification pipeline for one application and returns its report.
+    on_document is called with the results of each document as soon as it is processed.
+    Raises HTTPException on errors.
+    """
     print(f"🚀 Starting verification for application {application_id}")
     
-    # Create temporary directory for documents
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Step 1: Fetch application data
-            if application_id == "dummy-123":
-                print("🧪 Running in SIMULATION MODE")
-                app_data = {
-                    "firstName": "Max",
-                    "lastName": "Mustermann",
-                    "submittedDocuments": [
-                        {
-                            "type": "passport",
-                            "filename": "passport.jpg",
-                            "local_source": "/home/holmov/BecomingMuenchner/verity_check/tests/dummy_doc.jpg"
-                        }
-                    ]
-                }
-                print(f"✅ Loaded dummy application: {app_data.get('firstName')} {app_data.get('lastName')}")
-            else:
-                print(f"📡 Fetching application data for ID {application_id}...")
-                async with httpx.AsyncClient() as client:
-                    app_response = await client.get(
-                        f"{API_INTERNAL}applications/{application_id}/data"
-                    )
-                    
-                    if app_response.status_code == 404:
-                        raise HTTPException(status_code=404, detail=f"Application {application_id} not found")
-                    
-                    app_response.raise_for_status()
-                    app_data = app_response.json()
-                    
-                    print(f"✅ Found application: {app_data.get('firstName')} {app_data.get('lastName')}")
-                
-            # Step 2 & 3: Download, ingest, and process documents asynchronously
-            print(f"📥 Processing documents asynchronously...")
-            documents_data = app_data.get('submittedDocuments', [])
-
-            if not documents_data:
-                raise HTTPException(
-                    status_code=400, 
-                    detail="No documents found for this application"
-                )
-            
-            # Process all documents concurrently
-            tasks = [process_single_document(doc, application_id, temp_dir) for doc in documents_data]
-            
-            # Wait for all documents to be processed
-            results = await asyncio.gather(*tasks)
-            
-            # Flatten results and filter out None values
-            extracted_data = []
-            for result in results:
-                if result:
-                    if isinstance(result, list):
-                        extracted_data.extend(result)
-                    else:
-                        extracted_data.append(result)
+    try:
+        # Step 1: Fetch application data
+        if application_id == "dummy-123":
+            print("🧪 Running in SIMULATION MODE")
+            app_data = {
+                "firstName": "Max",
+                "lastName": "Mustermann",
+                "submittedDocuments": [
+                    {
+                        "type": "passport",
+                        "filename": "passport.jpg",
+                        "local_source": "/home/holmov/BecomingMuenchner/verity_check/tests/dummy_doc.jpg"
+                    }
+                ]
+            }
+            print(f"✅ Loaded dummy application: {app_data.get('firstName')} {app_data.get('lastName')}")
+        else:
+            print(f"📡 Fetching application data for ID {application_id}...")
+            app_response = await get_client().get(
+                f"{API_INTERNAL}applications/{application_id}/data"
+            )
             
-            if not extracted_data:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Failed to process any documents"
-                )
+            if app_response.status_code == 404:
+                raise HTTPException(status_code=404, detail=f"Application {application_id} not found")
             
-            print(f"✅ Processed {len(extracted_data)} document pages total")
+            app_response.raise_for_status()
+            app_data = app_response.json()
             
-            # Build knowledge graph
-            print("🕸️  Building Knowledge Graph...")
-            G = build_graph(extracted_data)
-            print(f"    Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+            print(f"✅ Found application: {app_data.get('firstName')} {app_data.get('lastName')}")
             
-            # Run consistency checks
-            print("⚖️  Running Consistency Checks...")
-            alerts = run_checks(G)
+        # Step 2 & 3: Download, ingest, and process documents asynchronously
+        print(f"📥 Processing documents asynchronously...")
+        documents_data = app_data.get('submittedDocuments', [])
+
+        if not documents_data:
+            raise HTTPException(
+                status_code=400, 
+                detail="No documents found for this application"
+            )
+        
+        # Process all documents through the staged pipeline
+        results = await process_documents(documents_data, application_id, on_document)
+        
+        # Flatten results and filter out None values
+        extracted_data = []
+        for result in results:
+            if result:
+                if isinstance(result, list):
+                    extracted_data.extend(result)
+                else:
+                    extracted_data.append(result)
+        
+        if not extracted_data:
+            raise HTTPException(
+                status_code=400,
+                detail="Failed to process any documents"
+            )
+        
+        print(f"✅ Processed {len(extracted_data)} document pages total")
+        
+        # Build knowledge graph
+        print("🕸️  Building Knowledge Graph...")
+        G = build_graph(extracted_data)
+        print(f"    Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+        
+        # Run consistency checks
+        print("⚖️  Running Consistency Checks...")
+        alerts = run_checks(G)
+        
+        # Transform alerts into CheckResult format
+        checks = []
+        for alert in alerts:
+            # Extract document title from filenames
+            filenames = alert.get('filenames', [])
+            doc_title = filenames[0] if filenames else "Unknown Document"
             
-            # Transform alerts into CheckResult format
-            checks = []
-            for alert in alerts:
-                # Extract document title from filenames
-                filenames = alert.get('filenames', [])
-                doc_title = filenames[0] if filenames else "Unknown Document"
-                
-                # Map check name to display title
-                check_display_title = alert.get('check', 'Unknown Check')
-                
-                # Determine document type from extracted_data
-                doc_type = "unknown"
-                for data_item in extracted_data:
-                    if data_item.get('metadata', {}).get('filename') in filenames:
-                        doc_type = data_item.get('metadata', {}).get('document_type', 'unknown')
-                        break
-                
-                checks.append(CheckResult(
-                    documentTitle=doc_title,
-                    type=doc_type,
-                    checkDisplayTitle=check_display_title,
-                    status="FAIL",
-                    message=alert.get('message', '')
-                ))
+            # Map check name to display title
+            check_display_title = alert.get('check', 'Unknown Check')
             
-            # Determine overall result
-            if not alerts:
-                overall_result = "SUCCESS"
-            else:
-                # Check severity levels
-                high_severity_count = sum(1 for a in alerts if a.get('severity') == 'HIGH')
-                if high_severity_count > 0:
-                    overall_result = "CRITICAL_ERROR"
-                else:
-                    overall_result = "WARNING"
+            # Determine document type from extracted_data
+            doc_type = "unknown"
+            for data_item in extracted_data:
+                if data_item.get('metadata', {}).get('filename') in filenames:
+                    doc_type = data_item.get('metadata', {}).get('document_type', 'unknown')
+                    break
             
-            # Log results
-            if alerts:
-                print(f"⚠️  Found {len(alerts)} issues!")
-                for alert in alerts:
-                    print(f"    - [{alert['severity']}] {alert['check']}: {alert['message']}")
+            checks.append(CheckResult(
+                documentTitle=doc_title,
+                type=doc_type,
+                checkDisplayTitle=check_display_title,
+                status="FAIL",
+                message=alert.get('message', '')
+            ))
+        
+        # Determine overall result
+        if not alerts:
+            overall_result = "SUCCESS"
+        else:
+            # Check severity levels
+            high_severity_count = sum(1 for a in alerts if a.get('severity') == 'HIGH')
+            if high_severity_count > 0:
+                overall_result = "CRITICAL_ERROR"
             else:
-                print("✅ Verification Passed!")
-            
-            # Get current timestamp in ISO 8601 format
-            checked_at = datetime.utcnow().isoformat() + "Z"
+                overall_result = "WARNING"
+        
+        # Log results
+        if alerts:
+            print(f"⚠️  Found {len(alerts)} issues!")
+            for alert in alerts:
+                print(f"    - [{alert['severity']}] {alert['check']}: {alert['message']}")
+        else:
+            print("✅ Verification Passed!")
+        
+        # Get current timestamp in ISO 8601 format
+        checked_at = datetime.utcnow().isoformat() + "Z"
+        
+        # Return results
+        return CheckResponse(
+            applicationId=str(application_id),
+            isComplete=True,
+            overallResult=overall_result,
+            checkedAt=checked_at,
+            checks=checks
+        )
             
-            # Return results
-            return CheckResponse(
-                applicationId=str(application_id),
-                isComplete=True,
-                overallResult=overall_result,
-                checkedAt=checked_at,
-                checks=checks
-            )
-                
-        except httpx.HTTPError as e:
-            print(f"❌ HTTP error: {e}")
-            raise HTTPException(status_code=500, detail=f"Error communicating with database API: {str(e)}")
-        except Exception as e:
-            print(f"❌ Error during verification: {e}")
-            raise HTTPException(status_code=500, detail=f"Error during verification: {str(e)}")
-
-async def process_single_document(doc_info: dict, application_id: str, temp_dir: str) -> dict:
+    except HTTPException:
+        raise
+    except httpx.HTTPError as e:
+        print(f"❌ HTTP error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error communicating with database API: {str(e)}")
+    except Exception as e:
+        print(f"❌ Error during verification: {e}")
+        raise HTTPException(status_code=500, detail=f"Error during verification: {str(e)}")
+
+async def process_documents(documents_data: list, application_id: str, on_document: Optional[Callable[[list], None]] = None) -> list:
+    """
+    Download, ingest, and run perception on all documents of an application.
+    Documents flow through bounded download -> rasterize -> perception stages, so the
+    stages of different documents overlap. Returns one result list (or None) per document.
+    Duplicate scans within the application are only sent to the VLM once.
+    """
+    duplicates = DuplicateIndex()
+
+    async def download(doc_info: dict) -> dict:
+        return await download_document(doc_info, application_id)
+
+    async def perceive(doc: dict) -> list:
+        return await perceive_document(doc, duplicates)
+
+    return await run_stages(documents_data, [
+        Stage("download", download, DOWNLOAD_CONCURRENCY),
+        Stage("rasterize", rasterize_document, RASTERIZE_CONCURRENCY),
+        Stage("perception", perceive, PERCEPTION_CONCURRENCY),
+    ], on_result=(lambda index, doc_results: on_document(doc_results)) if on_document else None)
+
+async def download_document(doc_info: dict, application_id: str) -> dict:
     """
-    Download, ingest, and run perception on a single document.
-    Returns extracted data or None if processing fails.
+    Download stage: streams a document into memory (spilling to a temp file only above
+    INGEST_SPOOL_THRESHOLD), or references its local source without copying it.
     """
     doc_type = doc_info.get('type')
     filename = doc_info.get('filename', f"{doc_type}.pdf")
     
     print(f"  📄 Processing {doc_type} ({filename})")
     
+    if doc_info.get('local_source'):
+        print(f"    📂 Using local source: {doc_info['local_source']}")
+        return {"application_id": application_id, "doc_type": doc_type, "filename": filename, "source": Path(doc_info['local_source'])}
+
+    # Download document using the internal API endpoint
+    doc_url = f"{API_INTERNAL}documents/{application_id}/{doc_type}"
+    buffer = DocumentBuffer(filename)
     try:
-        # Download document using the internal API endpoint or use local source
-        filepath = Path(temp_dir) / filename
-        
-        if doc_info.get('local_source'):
-            print(f"    📂 Using local source: {doc_info['local_source']}")
-            import shutil
-            shutil.copy(doc_info['local_source'], filepath)
-            print(f"    ✅ Copied {filename}")
-        else:
-            doc_url = f"{API_INTERNAL}documents/{application_id}/{doc_type}"
-            
-            async with httpx.AsyncClient() as doc_client:
-                doc_response = await doc_client.get(doc_url, timeout=30.0)
-                doc_response.raise_for_status()
-                
-                with open(filepath, 'wb') as f:
-                    f.write(doc_response.content)
-                
-                print(f"    ✅ Downloaded {filename}")
-        
-        # Ingest document (convert to images)
-        # Run in thread pool since ingest_documents uses ProcessPoolExecutor
-        loop = asyncio.get_event_loop()
-        processed_images = await loop.run_in_executor(
-            None, 
-            ingest_documents, 
-            [str(filepath)]
-        )
-        
-        if not processed_images:
-            print(f"    ⚠️  No images extracted from {filename}")
-            return None
-        
-        print(f"    🖼️  Ingested {len(processed_images)} image(s) from {filename}")
-        
-        # Extract data using VLM (run in thread pool since it's blocking)
-        results = []
-        for img_data in processed_images:
-            print(f"    👁️  Analyzing {img_data['filename']}...")
-            result = await loop.run_in_executor(
-                None,
-                extract_data,
-                img_data["image_base64"],
-                img_data["filename"]
+        async with get_client().stream("GET", doc_url) as doc_response:
+            doc_response.raise_for_status()
+            async for chunk in doc_response.aiter_bytes():
+                buffer.write(chunk)
+    except Exception:
+        buffer.close()
+        raise
+
+    print(f"    ✅ Downloaded {filename} ({buffer.size} bytes{', spooled to disk' if buffer.spilled else ''})")
+    return {"application_id": application_id, "doc_type": doc_type, "filename": filename, "source": buffer.source(), "buffer": buffer}
+
+async def rasterize_document(doc: dict) -> dict:
+    """
+    Rasterize stage: converts the document to page images on the shared worker pool,
+    using the image profile (resolution, JPEG quality) of its document type.
+    """
+    profile = image_profile(doc["doc_type"], category_for_doc_type(doc["doc_type"]))
+    try:
+        processed_images = await ingest_source_async(doc["source"], doc["filename"], profile)
+    finally:
+        if doc.get("buffer"):
+            doc["buffer"].close()
+    
+    if not processed_images:
+        print(f"    ⚠️  No images extracted from {doc['filename']}")
+        return None
+    
+    print(f"    🖼️  Ingested {len(processed_images)} image(s) from {doc['filename']}")
+    return {
+        "application_id": doc["application_id"],
+        "doc_type": doc["doc_type"],
+        "filename": doc["filename"],
+        "processed_images": processed_images
+    }
+
+async def perceive_document(doc: dict, duplicates: Optional[DuplicateIndex] = None) -> list:
+    """
+    Perception stage: extracts data from the page images using the VLM. Small documents
+    of the same application and category may share one VLM request, and documents that
+    duplicate one already in duplicates reuse its result.
+    """
+    doc_type = doc["doc_type"]
+    results = []
+    for img_data in doc["processed_images"]:
+        print(f"    👁️  Analyzing {img_data['filename']}...")
+        images, fingerprints = img_data["images"], img_data.get("page_fingerprints")
+        if fingerprints:
+            images, fingerprints = unique_pages(images, fingerprints)
+        result, duplicate_of = await perceive_once(
+            duplicates, fingerprints, img_data["filename"],
+            lambda: extract_data(
+                images,
+                img_data["filename"],
+                doc_category=category_for_doc_type(doc_type),
+                batch_key=doc["application_id"]
             )
-            
-            category = result["category"]
-            data = result["data"]
-            print(f"      → Categorized as {category}")
-            
-            results.append({
-                "data": data,
-                "metadata": {
-                    "filename": img_data["filename"],
-                    "page": img_data["page_number"],
-                    "category": category,
-                    "document_type": doc_type
-                }
-            })
+        )
         
-        return results
+        category = result["category"]
+        data = result["data"]
+        print(f"      → Categorized as {category}")
         
-    except Exception as e:
-        print(f"    ❌ Failed to process {doc_type}: {e}")
-        return None
+        results.append({
+            "data": data,
+            "record": normalize_record(category, data),
+            "metadata": {
+                "filename": img_data["filename"],
+                "page": img_data["page_number"],
+                "pages_skipped": img_data.get("pages_skipped", 0),
+                "category": category,
+                "document_type": doc_type,
+                "duplicate_of": duplicate_of
+            }
+        })
+    
+    return results
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,97 @@
+"""
+Shared HTTP client for calls to the database API and the broker.
+
+One keep-alive client is created in the API lifespan and reused by the health check,
+application/document fetches and validation callbacks, so consecutive requests to
+API_INTERNAL reuse an open (TLS) connection instead of paying a new handshake each.
+Requests and newly opened connections are counted via the httpcore "trace" extension
+and exposed on /metrics.
+"""
+
+import os
+import asyncio
+import importlib.util
+from typing import Any, Dict, Optional
+import httpx
+
+# Client configuration - can be overridden by env vars
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+API_MAX_KEEPALIVE = int(os.getenv("API_MAX_KEEPALIVE", "10"))
+API_KEEPALIVE_EXPIRY = float(os.getenv("API_KEEPALIVE_EXPIRY", "60"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "30"))
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "10"))
+# HTTP/2 is only used if the optional h2 package is installed (pip install httpx[http2])
+API_HTTP2 = os.getenv("API_HTTP2", "1") == "1" and importlib.util.find_spec("h2") is not None
+
+_stats = {"requests": 0, "connections_opened": 0}
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport and counts requests and new TCP connections."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        _stats["requests"] += 1
+        request.extensions = {**request.extensions, "trace": _trace}
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+async def _trace(event: str, info: Dict[str, Any]):
+    if event == "connection.connect_tcp.complete":
+        _stats["connections_opened"] += 1
+
+
+def _create_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    """Creates the pooled keep-alive client for database/broker calls."""
+    limits = httpx.Limits(
+        max_connections=API_MAX_CONNECTIONS,
+        max_keepalive_connections=API_MAX_KEEPALIVE,
+        keepalive_expiry=API_KEEPALIVE_EXPIRY
+    )
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(limits=limits, http2=API_HTTP2)
+    return httpx.AsyncClient(
+        transport=_CountingTransport(transport),
+        timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT)
+    )
+
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared client of the running event loop, creating it on first use.
+    The API creates it in its lifespan; callers outside the API (tests, scripts) get
+    one lazily.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _create_client()
+        _client_loop = loop
+    return _client
+
+
+async def aclose_client():
+    """Closes the shared client (a later get_client() creates a new one)."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+def client_stats() -> Dict[str, Any]:
+    """Returns request and connection counters; reused = requests that needed no new connection."""
+    return {
+        "http2": API_HTTP2,
+        "requests": _stats["requests"],
+        "connections_opened": _stats["connections_opened"],
+        "connections_reused": max(0, _stats["requests"] - _stats["connections_opened"])
+    }
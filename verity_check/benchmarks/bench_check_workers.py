@@ -0,0 +1,70 @@
+"""
+Benchmark: serial vs. threaded check evaluation (CHECK_WORKERS).
+
+Times evaluate_checks() on synthetic applications with workers=1 (the default, checks
+run one after another) and with --workers threads. The built-in checks are pure Python
+and hold the GIL, so threads only add overhead for them. With --blocking-checks, that
+many extra checks are registered which each wait --blocking-ms (like a lookup in an
+external register); they release the GIL while waiting, which is the case threads help.
+No VLM is needed.
+
+Usage:
+    python benchmarks/bench_check_workers.py [--documents 10,100] [--workers 4]
+                                             [--blocking-checks 4] [--blocking-ms 20] [--repeat 50]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize, synthetic_application
+
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import CHECKS, Check, evaluate_checks
+
+
+def blocking_checks(count: int, seconds: float) -> list:
+    def lookup(G, identity_docs):
+        time.sleep(seconds)
+        return []
+    return [Check(f"external_lookup_{i}", lookup, ("graph", "identity")) for i in range(count)]
+
+
+def timed(G, checks: list, workers: int, repeat: int) -> list:
+    """Milliseconds per evaluate_checks() call, one value per run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        evaluate_checks(G, checks, workers=workers)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(args):
+    scenarios = [("built-in checks", CHECKS)]
+    if args.blocking_checks:
+        extra = blocking_checks(args.blocking_checks, args.blocking_ms / 1000)
+        scenarios.append((f"+ {args.blocking_checks} x {args.blocking_ms:g} ms I/O", CHECKS + extra))
+
+    columns = ["workers=1 [ms]", f"workers={args.workers} [ms]"]
+    print(f"{'documents':<10} {'checks':<24} " + " ".join(f"{c:<38}" for c in columns))
+    for documents in (int(n) for n in args.documents.split(",")):
+        G = build_graph(synthetic_application(documents))
+        for label, checks in scenarios:
+            # Warm up the shared thread pool before measuring
+            evaluate_checks(G, checks, workers=args.workers)
+            repeat = args.repeat if checks is CHECKS else max(1, args.repeat // 10)
+            results = [timed(G, checks, 1, repeat), timed(G, checks, args.workers, repeat)]
+            print(f"{documents:<10} {label:<24} " + " ".join(f"{summarize(r):<38}" for r in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", default="10,100", help="Comma-separated documents per application")
+    parser.add_argument("--workers", type=int, default=4, help="Threads of the threaded run")
+    parser.add_argument("--blocking-checks", type=int, default=4, help="Extra checks that wait on I/O (0 = none)")
+    parser.add_argument("--blocking-ms", type=float, default=20, help="Wait of each extra check")
+    parser.add_argument("--repeat", type=int, default=50, help="Measured runs per scenario")
+    main(parser.parse_args())
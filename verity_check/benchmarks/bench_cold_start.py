@@ -0,0 +1,81 @@
+"""
+Benchmark: cold start of the API service.
+
+Starts `uvicorn verity_check.api:app` in a fresh process, like a Cloud Run scale-up,
+and measures the time until /metrics answers (the VLM is not needed). Also reports
+`import verity_check.api` under python -X importtime with the heaviest top-level
+packages, to see where the remaining startup time goes.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--repeat 5] [--port 8765] [--top 8]
+"""
+
+import sys
+import time
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize
+
+TIMEOUT_SECONDS = 60
+
+
+def cold_start_seconds(port: int) -> float:
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "verity_check.api:app", "--port", str(port), "--log-level", "warning"]
+    )
+    try:
+        while time.perf_counter() - start < TIMEOUT_SECONDS:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=1):
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"API did not answer within {TIMEOUT_SECONDS}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_breakdown(top: int) -> list:
+    """(package, cumulative ms) of the top-level packages imported by verity_check.api."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import verity_check.api"],
+        capture_output=True, text=True, check=True
+    )
+    packages = {}
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            # Children are listed before their parent: stop at verity_check.api, skip e.g. site
+            if name == "verity_check.api":
+                break
+            packages = {}
+        elif depth == 1:
+            package = name if name.startswith("verity_check") else name.split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1000
+    return sorted(packages.items(), key=lambda item: -item[1])[:top]
+
+
+def main(args):
+    seconds = [cold_start_seconds(args.port) for _ in range(args.repeat)]
+    print(f"🥶 uvicorn verity_check.api:app until /metrics answers [s]: {summarize(seconds)}")
+    print("\nimport verity_check.api, heaviest imports [ms]:")
+    for package, ms in import_breakdown(args.top):
+        print(f"    {package:<34} {ms:8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts measured")
+    parser.add_argument("--port", type=int, default=8765, help="Port the API is started on")
+    parser.add_argument("--top", type=int, default=8, help="Imports listed in the breakdown")
+    main(parser.parse_args())
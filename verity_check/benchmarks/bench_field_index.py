@@ -0,0 +1,85 @@
+"""
+Benchmark: field lookups through the FieldIndex vs. scanning document neighbors.
+
+For synthetic applications with many documents, every field the checks read is looked
+up for every document twice: once by scanning G.neighbors(doc) and comparing the
+node's field (how the checks used to query the graph), once through the index
+build_graph maintains. build_graph and run_checks are timed as well. No VLM is needed.
+
+Usage:
+    python benchmarks/bench_field_index.py [--documents 10,100,500] [--repeat 3]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize, synthetic_application
+
+from verity_check.knowledge_graph import build_graph, field_index
+from verity_check.consistency_check import run_checks
+
+# Fields read by the consistency checks
+CHECKED_FIELDS = [
+    "surname", "given_names", "examinee_name", "applicant_name", "date_of_birth", "document_type",
+    "valid_until", "valid_from", "paragraph_remarks", "nationality", "benefit_type", "monthly_amount",
+    "net_income", "total_warm_rent", "certificate_type", "institute_name", "achieved_level",
+    "language", "result_status"
+]
+
+
+def scan_lookups(G, documents: list) -> int:
+    found = 0
+    for doc in documents:
+        for field in CHECKED_FIELDS:
+            for neighbor in G.neighbors(doc):
+                if G.nodes[neighbor].get("field") == field:
+                    found += 1
+    return found
+
+
+def index_lookups(G, documents: list) -> int:
+    index = field_index(G)
+    found = 0
+    for doc in documents:
+        fields = index.fields(doc)
+        for field in CHECKED_FIELDS:
+            if field in fields:
+                found += 1
+    return found
+
+
+def timed(fn, repeat: int) -> list:
+    """Milliseconds per call, one value per run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(args):
+    columns = ["lookup by scan [ms]", "lookup by index [ms]", "build_graph [ms]", "run_checks [ms]"]
+    print("documents  " + " ".join(f"{c:<38}" for c in columns))
+    for documents in (int(n) for n in args.documents.split(",")):
+        application = synthetic_application(documents)
+        G = build_graph(application)
+        docs = field_index(G).documents()
+        assert scan_lookups(G, docs) >= index_lookups(G, docs)
+        results = [
+            timed(lambda: scan_lookups(G, docs), args.repeat),
+            timed(lambda: index_lookups(G, docs), args.repeat),
+            timed(lambda: build_graph(application), args.repeat),
+            timed(lambda: run_checks(G), args.repeat)
+        ]
+        print(f"{documents:<10} " + " ".join(f"{summarize(r):<38}" for r in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", default="10,100,500", help="Comma-separated documents per application")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per size")
+    main(parser.parse_args())
@@ -0,0 +1,69 @@
+"""
+Benchmark: networkx vs. compact graph backend.
+
+Builds the graphs of many synthetic applications (see common.synthetic_application)
+with each backend, keeps them all alive like a batch job would, and reports the
+traced memory per application, build time and run_checks throughput. No VLM is needed.
+
+Usage:
+    python benchmarks/bench_graph_backends.py [--applications 2000] [--documents 10] [--repeat 3]
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize, synthetic_application
+
+from verity_check.schemas import normalize_record
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import run_checks
+
+
+def measure(backend: str, applications: list) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    graphs = [build_graph(application, backend=backend) for application in applications]
+    build_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for G in graphs:
+        run_checks(G)
+    check_seconds = time.perf_counter() - start
+    return {
+        "kb_per_application": memory / 1024 / len(applications),
+        "build_ms_per_application": build_seconds * 1000 / len(applications),
+        "checks_per_second": len(applications) / check_seconds
+    }
+
+
+def main(args):
+    applications = [
+        [
+            {**item, "record": normalize_record(item["metadata"]["category"], item["data"])}
+            for item in synthetic_application(args.documents, seed)
+        ]
+        for seed in range(args.applications)
+    ]
+    print(f"📄 {args.applications} applications x {args.documents} documents")
+    print("\nbackend    memory [KB/application]                 build [ms/application]                  run_checks [applications/s]")
+    for backend in ("networkx", "compact"):
+        runs = [measure(backend, applications) for _ in range(args.repeat)]
+        print(
+            f"{backend:<10} {summarize([r['kb_per_application'] for r in runs]):<39} "
+            f"{summarize([r['build_ms_per_application'] for r in runs]):<39} "
+            f"{summarize([r['checks_per_second'] for r in runs])}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--applications", type=int, default=2000, help="Synthetic applications held in memory")
+    parser.add_argument("--documents", type=int, default=10, help="Documents per application")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per backend")
+    main(parser.parse_args())
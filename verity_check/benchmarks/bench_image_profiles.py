@@ -0,0 +1,120 @@
+"""
+Benchmark: extraction accuracy vs. image tokens per image profile.
+
+Ingests every fixture with each candidate profile (longest side x JPEG quality), runs
+perception against the live VLM (VLLM_API_URL) and reports image tokens, payload size
+and accuracy per category. For every category the cheapest profile whose accuracy is
+within --tolerance of the best one is recommended, in the INGEST_IMAGE_PROFILES format.
+Without an expected results file, agreement with the largest profile is used instead
+of accuracy. With --dry-run, only the estimated token cost is printed (no VLM calls).
+
+Usage:
+    python benchmarks/bench_image_profiles.py [--fixtures DIR] [--expected FILE]
+        [--sizes 896,1344,2048] [--qualities 60,75,90] [--tolerance 0.0] [--dry-run]
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import FIXTURES_DIR, disable_perception_cache, find_fixtures, load_expected, score, agreement
+
+disable_perception_cache()
+
+from verity_check import perception
+from verity_check.ingest import ImageProfile, process_file
+from verity_check.packing import estimate_document_tokens, estimate_page_tokens
+
+
+def candidate_profiles(sizes: str, qualities: str) -> list:
+    return [
+        ImageProfile(max_size=int(size), quality=int(quality))
+        for size in sizes.split(",") for quality in qualities.split(",")
+    ]
+
+
+def dry_run(paths: list, profiles: list):
+    print("\nprofile (px/q)   " + "  ".join(f"{Path(p).name[:18]:>18}" for p in paths) + "       total")
+    for profile in profiles:
+        tokens = [estimate_document_tokens(Path(path), Path(path).name, profile)["image_tokens"] for path in paths]
+        row = "  ".join(f"{t:>18}" for t in tokens)
+        print(f"{profile.max_size:>5} / {profile.quality:<8} {row}  {sum(tokens):>10}")
+
+
+async def run_profile(profile: ImageProfile, paths: list, expected: dict) -> dict:
+    """Ingests and perceives all fixtures with one profile; returns tokens, bytes and results per file."""
+    runs = {}
+    for path in paths:
+        for doc in process_file(path, profile):
+            name = doc["filename"]
+            category = expected.get(name, {}).get("category")
+            result = await perception.extract_data(doc["images"], name, doc_category=category)
+            runs[name] = {
+                "tokens": sum(estimate_page_tokens(doc["images"])),
+                "bytes": sum(len(jpeg) for jpeg in doc["images"]),
+                "result": result
+            }
+    return runs
+
+
+async def main(args):
+    expected = load_expected(args.expected)
+    paths = find_fixtures(args.fixtures)
+    profiles = sorted(candidate_profiles(args.sizes, args.qualities), key=lambda p: (p.max_size, p.quality))
+    print(f"📂 {len(paths)} fixture documents, {len(profiles)} profiles")
+
+    if args.dry_run:
+        dry_run(paths, profiles)
+        return
+
+    runs = {}
+    try:
+        for profile in profiles:
+            print(f"\n🖼️  Profile {profile.max_size}px / quality {profile.quality}")
+            runs[profile] = await run_profile(profile, paths, expected)
+    finally:
+        await perception.aclose_client()
+
+    reference = runs[profiles[-1]]
+    # category -> profile -> [tokens, bytes, accuracies]
+    table = defaultdict(lambda: defaultdict(lambda: [0, 0, []]))
+    for profile, run in runs.items():
+        for name, entry in run.items():
+            category = expected.get(name, {}).get("category") or reference[name]["result"]["category"]
+            accuracy = score(entry["result"], expected.get(name))
+            if accuracy is None:
+                accuracy = agreement(entry["result"], reference[name]["result"])
+            cell = table[category][profile]
+            cell[0] += entry["tokens"]
+            cell[1] += entry["bytes"]
+            cell[2].append(accuracy)
+
+    metric = "accuracy" if expected else "agreement"
+    recommended = {}
+    for category, cells in sorted(table.items()):
+        print(f"\n{category}\nprofile (px/q)   image tokens      JPEG [KB]   {metric}")
+        rows = []
+        for profile, (tokens, size, accuracies) in cells.items():
+            accuracy = sum(accuracies) / len(accuracies)
+            rows.append((profile, tokens, accuracy))
+            print(f"{profile.max_size:>5} / {profile.quality:<8} {tokens:>12}   {size / 1024:>12.0f}   {accuracy:.0%}")
+        best = max(accuracy for _, _, accuracy in rows)
+        cheapest = min((row for row in rows if row[2] >= best - args.tolerance), key=lambda row: row[1])[0]
+        recommended[category] = {"max_size": cheapest.max_size, "quality": cheapest.quality}
+
+    print(f"\nRecommended INGEST_IMAGE_PROFILES='{json.dumps(recommended)}'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR), help="Directory with fixture documents")
+    parser.add_argument("--expected", help="JSON file with expected results per filename")
+    parser.add_argument("--sizes", default="896,1120,1344,1568,2048", help="Comma-separated longest sides")
+    parser.add_argument("--qualities", default="60,75,90", help="Comma-separated JPEG qualities")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Accuracy loss accepted for a cheaper profile")
+    parser.add_argument("--dry-run", action="store_true", help="Only estimate image tokens, no VLM calls")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,78 @@
+"""
+Benchmark: name consistency scoring, pairwise SequenceMatcher vs. name_matching.
+
+For synthetic name sets (see common.synthetic_names) compares the old approach, one
+difflib.SequenceMatcher per pair of raw names, with name_matching: normalize once,
+score each pair of distinct normalized names in one similarity_matrix() pass (rapidfuzz
+cdist when installed, else the bit-parallel kernel, vectorized with numpy if available). Above --baseline-max names the
+SequenceMatcher time is extrapolated from a random sample of pairs. No VLM is needed.
+
+Usage:
+    python benchmarks/bench_name_matching.py [--sizes 10,100,1000,10000] [--baseline-max 1000] [--repeat 3]
+"""
+
+import sys
+import time
+import random
+import argparse
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize, synthetic_names
+
+from verity_check import name_matching
+from verity_check.name_matching import normalize_name, similarity_matrix
+
+SAMPLED_PAIRS = 200_000
+
+
+def sequence_matcher_seconds(names: list, baseline_max: int) -> float:
+    """Seconds to score all pairs the old way (extrapolated from a sample above baseline_max)."""
+    total = len(names) * (len(names) - 1) // 2
+    if len(names) <= baseline_max:
+        pairs = ((a, b) for i, a in enumerate(names) for b in names[i + 1:])
+        measured = total
+    else:
+        rng = random.Random(0)
+        measured = min(total, SAMPLED_PAIRS)
+        pairs = (tuple(rng.sample(names, 2)) for _ in range(measured))
+    start = time.perf_counter()
+    for a, b in pairs:
+        SequenceMatcher(None, a.lower(), b.lower()).ratio()
+    return (time.perf_counter() - start) * total / max(measured, 1)
+
+
+def name_matching_seconds(names: list) -> float:
+    normalize_name.cache_clear()
+    start = time.perf_counter()
+    similarity_matrix(list(dict.fromkeys(normalize_name(name) for name in names)))
+    return time.perf_counter() - start
+
+
+def main(args):
+    if name_matching._process is not None:
+        backend = "rapidfuzz cdist"
+    elif name_matching.np is not None:
+        backend = "bit-parallel kernel (numpy)"
+    else:
+        backend = "bit-parallel kernel (pure Python)"
+    print(f"🔤 name_matching backend: {backend}")
+    print("\nnames   distinct  SequenceMatcher [s]                       name_matching [s]                         speedup")
+    for size in (int(s) for s in args.sizes.split(",")):
+        names = synthetic_names(size, seed=size)
+        distinct = len({normalize_name(name) for name in names})
+        baseline = [sequence_matcher_seconds(names, args.baseline_max) for _ in range(args.repeat)]
+        batched = [name_matching_seconds(names) for _ in range(args.repeat)]
+        marker = "*" if size > args.baseline_max else " "
+        speedup = min(baseline) / max(min(batched), 1e-9)
+        print(f"{size:<7} {distinct:<9} {summarize(baseline) + marker:<41} {summarize(batched):<41} {speedup:.0f}x")
+    print(f"\n* extrapolated from {SAMPLED_PAIRS} sampled pairs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Comma-separated name set sizes")
+    parser.add_argument("--baseline-max", type=int, default=1000, help="Largest set scored exhaustively with SequenceMatcher")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per size")
+    main(parser.parse_args())
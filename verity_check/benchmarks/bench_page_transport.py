@@ -0,0 +1,106 @@
+"""
+Benchmark: memory and time spent moving page images from ingest to the VLM requests.
+
+Compares the previous transport (pages as base64 strings, pickled across the worker
+pool boundary, embedded as data URLs and json.dumps'ed for every request) with the
+current one (raw JPEG bytes, base64-encoded once per page into a reused content block,
+request body assembled from bytes). Each document is sent twice, like categorization
+plus extraction. No VLM is needed; the pages are synthetic A4 scans at full resolution.
+
+Usage:
+    python benchmarks/bench_page_transport.py [--pages 5] [--documents 4] [--repeat 3]
+"""
+
+import sys
+import json
+import time
+import base64
+import pickle
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize
+
+from PIL import Image
+from verity_check.ingest import encode_image_to_jpeg
+from verity_check.perception import PageImage, _chat_payload, MODEL_NAME
+from verity_check.prompt import CATEGORIZATION_PROMPT, PROMPTS
+
+REQUESTS = [(CATEGORIZATION_PROMPT, 256), (PROMPTS["Livelihood"], 1024)]
+
+
+def synthetic_page(seed: int) -> bytes:
+    """A noisy A4 page at 1446x2048 so the JPEG has a realistic size."""
+    rng = random.Random(seed)
+    image = Image.effect_noise((1446, 2048), 40).convert("RGB")
+    for _ in range(200):
+        x, y = rng.randrange(1300), rng.randrange(2000)
+        image.paste((0, 0, 0), (x, y, x + rng.randrange(20, 140), y + 12))
+    return encode_image_to_jpeg(image)
+
+
+def base64_transport(documents: list) -> int:
+    """Previous path: base64 strings, pickled to the parent, dict payload json.dumps'ed per request."""
+    sent = 0
+    for pages in documents:
+        pages_b64 = pickle.loads(pickle.dumps([base64.b64encode(jpeg).decode("utf-8") for jpeg in pages]))
+        blocks = [
+            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}}
+            for img_b64 in pages_b64
+        ]
+        for prompt, max_tokens in REQUESTS:
+            payload = {
+                "model": MODEL_NAME,
+                "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}, *blocks]}],
+                "max_tokens": max_tokens,
+                "temperature": 0.1
+            }
+            sent += len(json.dumps(payload).encode("utf-8"))
+    return sent
+
+
+def bytes_transport(documents: list) -> int:
+    """Current path: JPEG bytes pickled to the parent, blocks encoded once and joined per request."""
+    sent = 0
+    for pages in documents:
+        page_images = [PageImage(jpeg) for jpeg in pickle.loads(pickle.dumps(pages))]
+        for prompt, max_tokens in REQUESTS:
+            sent += len(_chat_payload(prompt, page_images, max_tokens))
+    return sent
+
+
+def measure(transport, documents: list, repeat: int) -> dict:
+    peaks, times = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        transport(documents)
+        times.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.stop()
+    return {"peak_mb": peaks, "seconds": times}
+
+
+def main(args):
+    documents = [[synthetic_page(d * 100 + p) for p in range(args.pages)] for d in range(args.documents)]
+    jpeg_mb = sum(len(jpeg) for pages in documents for jpeg in pages) / 1024 / 1024
+    pickled_b64 = sum(len(pickle.dumps([base64.b64encode(j).decode() for j in pages])) for pages in documents)
+    pickled_raw = sum(len(pickle.dumps(pages)) for pages in documents)
+    print(f"📄 {args.documents} documents x {args.pages} pages, {jpeg_mb:.1f} MB of JPEG, {len(REQUESTS)} requests each")
+    print(f"   pickled across the pool: base64 {pickled_b64 / 1024 / 1024:.1f} MB, bytes {pickled_raw / 1024 / 1024:.1f} MB")
+
+    print("\ntransport   peak traced memory [MB]                        time [s]")
+    for name, transport in (("base64", base64_transport), ("bytes", bytes_transport)):
+        result = measure(transport, documents, args.repeat)
+        print(f"{name:<11} {summarize(result['peak_mb']):<46} {summarize(result['seconds'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=5, help="Pages per document")
+    parser.add_argument("--documents", type=int, default=4, help="Documents per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per transport")
+    main(parser.parse_args())
@@ -0,0 +1,103 @@
+"""
+Benchmark: date and amount parsing throughput.
+
+Parses a stream of mixed strings (ISO, German, MRZ and textual dates, EU/US amounts,
+free text) drawn from a pool of --distinct values, like the fields of a batch of
+applications repeat the same values. Compares the former strptime/try-except parsers
+with normalization.parse_date / parse_amount, uncached and memoized. No VLM is needed.
+
+Usage:
+    python benchmarks/bench_parsing.py [--strings 1000000] [--distinct 20000] [--repeat 3]
+"""
+
+import sys
+import time
+import random
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import summarize
+
+from verity_check.normalization import parse_amount, parse_date
+
+_MONTHS = ["Januar", "März", "MAR", "Mai", "Oktober", "December", "Sept."]
+_TEXT = ["siehe Anlage", "unbefristet", "K8X4R2T7", "n/a", "Goethe-Institut"]
+
+
+def old_parse_date(date_str):
+    """The previous consistency_check.parse_date."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(str(date_str), "%Y-%m-%d")
+    except:
+        try:
+            return datetime.strptime(str(date_str), "%d.%m.%Y")
+        except:
+            return None
+
+
+def old_parse_amount(amount_str):
+    """The previous knowledge_graph.parse_amount."""
+    clean_str = amount_str.replace("€", "").replace("EUR", "").strip()
+    clean_str = clean_str.replace(".", "").replace(",", ".")
+    try:
+        return float(clean_str)
+    except ValueError:
+        return 0.0
+
+
+def mixed_strings(count: int, distinct: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    day, month, year = lambda: rng.randint(1, 28), lambda: rng.randint(1, 12), lambda: rng.randint(1950, 2035)
+    makers = [
+        lambda: f"{year()}-{month():02d}-{day():02d}",
+        lambda: f"{day():02d}.{month():02d}.{year()}",
+        lambda: f"{year() % 100:02d}{month():02d}{day():02d}",
+        lambda: f"{day()}. {rng.choice(_MONTHS)} {year()}",
+        lambda: f"{rng.uniform(100, 9000):,.2f} €".replace(",", "X").replace(".", ",").replace("X", "."),
+        lambda: f"EUR {rng.uniform(100, 9000):.2f}",
+        lambda: rng.choice(_TEXT)
+    ]
+    pool = [rng.choice(makers)() for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def throughput(parse_date_fn, parse_amount_fn, strings: list) -> float:
+    """Strings per second through both parsers (like a field of unknown kind)."""
+    start = time.perf_counter()
+    for text in strings:
+        parse_date_fn(text)
+        parse_amount_fn(text)
+    return len(strings) / (time.perf_counter() - start)
+
+
+def memoized(strings: list) -> float:
+    parse_date.cache_clear()
+    parse_amount.cache_clear()
+    return throughput(parse_date, parse_amount, strings)
+
+
+def main(args):
+    strings = mixed_strings(args.strings, args.distinct)
+    print(f"🔢 {args.strings} strings, {args.distinct} distinct")
+    runs = {
+        "strptime (old)": lambda: throughput(old_parse_date, old_parse_amount, strings),
+        "regex dispatch": lambda: throughput(parse_date.__wrapped__, parse_amount.__wrapped__, strings),
+        "regex + lru_cache": lambda: memoized(strings)
+    }
+    print("\nparser              throughput [strings/s]")
+    for name, run in runs.items():
+        print(f"{name:<19} {summarize([run() for _ in range(args.repeat)])}")
+    info = parse_date.cache_info()
+    print(f"\nparse_date cache: {info.hits} hits / {info.misses} misses")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--strings", type=int, default=1_000_000, help="Strings parsed per run")
+    parser.add_argument("--distinct", type=int, default=20000, help="Distinct values the strings are drawn from")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per parser")
+    main(parser.parse_args())
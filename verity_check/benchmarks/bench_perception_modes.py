@@ -0,0 +1,89 @@
+"""
+Benchmark: two-step vs. combined perception mode.
+
+Runs every fixture through both perception modes against the live VLM (VLLM_API_URL)
+and reports end-to-end latency, VLM round trips and accuracy. Without an expected
+results file, the agreement between both modes is reported instead of accuracy.
+
+Usage:
+    python benchmarks/bench_perception_modes.py [--fixtures DIR] [--expected FILE] [--repeat N]
+"""
+
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import FIXTURES_DIR, disable_perception_cache, find_fixtures, load_expected, score, agreement, summarize
+
+disable_perception_cache()
+
+from verity_check import perception
+from verity_check.ingest import process_file
+
+MODES = ["two_step", "combined"]
+
+
+async def run_mode(mode: str, documents: list, repeat: int) -> dict:
+    """Runs all documents through one mode and returns latencies, round trips and results."""
+    round_trips = 0
+    post_chat = perception._post_chat
+
+    async def counting_post_chat(payload):
+        nonlocal round_trips
+        round_trips += 1
+        return await post_chat(payload)
+
+    perception._post_chat = counting_post_chat
+    latencies, results = [], {}
+    try:
+        for _ in range(repeat):
+            for doc in documents:
+                start = time.perf_counter()
+                results[doc["filename"]] = await perception.extract_data(doc["images"], doc["filename"], mode=mode)
+                latencies.append(time.perf_counter() - start)
+    finally:
+        perception._post_chat = post_chat
+
+    return {"latencies": latencies, "round_trips": round_trips / repeat, "results": results}
+
+
+async def main(args):
+    expected = load_expected(args.expected)
+    documents = []
+    for path in find_fixtures(args.fixtures):
+        documents.extend(process_file(path))
+    print(f"📂 {len(documents)} fixture documents, {args.repeat} run(s) per mode, VLM at {perception.VLLM_API_URL}")
+
+    runs = {}
+    try:
+        for mode in MODES:
+            runs[mode] = await run_mode(mode, documents, args.repeat)
+    finally:
+        await perception.aclose_client()
+
+    print("\nmode        latency per document [s]                  round trips   accuracy")
+    for mode, run in runs.items():
+        accuracies = [
+            s for s in (score(r, expected.get(name)) for name, r in run["results"].items()) if s is not None
+        ]
+        accuracy = f"{sum(accuracies) / len(accuracies):.0%}" if accuracies else "n/a"
+        print(f"{mode:<11} {summarize(run['latencies']):<42} {run['round_trips']:<13.0f} {accuracy}")
+
+    if not expected:
+        agreements = [
+            agreement(runs["two_step"]["results"][name], runs["combined"]["results"][name])
+            for name in runs["two_step"]["results"]
+        ]
+        if agreements:
+            print(f"\nField agreement between modes: {sum(agreements) / len(agreements):.0%} (pass --expected for accuracy)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=str(FIXTURES_DIR), help="Directory with fixture documents")
+    parser.add_argument("--expected", help="JSON file with expected results per filename")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per mode")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,161 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Fixtures are the documents in tests/ (or any directory passed with --fixtures).
+Expected results are an optional JSON file mapping filename to
+{"category": ..., "data": {field: value}} used for accuracy scoring.
+"""
+
+import os
+import json
+import random
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests"
+FIXTURE_SUFFIXES = {".pdf", ".jpg", ".jpeg", ".png"}
+
+
+def disable_perception_cache():
+    """Benchmarks must hit the VLM, so the perception cache is switched off before import."""
+    os.environ["PERCEPTION_CACHE_PATH"] = ""
+
+
+def find_fixtures(fixtures_dir: str) -> List[str]:
+    """Returns all supported documents in fixtures_dir."""
+    return sorted(
+        str(p) for p in Path(fixtures_dir).glob("*")
+        if p.is_file() and p.suffix.lower() in FIXTURE_SUFFIXES
+    )
+
+
+def load_expected(expected_file: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if not expected_file:
+        return {}
+    with open(expected_file, "r") as f:
+        return json.load(f)
+
+
+def _normalize(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+def score(result: Dict[str, Any], expected: Optional[Dict[str, Any]]) -> Optional[float]:
+    """
+    Accuracy of one perception result against its expected result: the category counts
+    as one field, plus every expected data field (exact match after normalization).
+    """
+    if not expected:
+        return None
+    data = result.get("data", {})
+    expected_data = expected.get("data", {})
+    correct = int(result.get("category") == expected.get("category"))
+    correct += sum(1 for k, v in expected_data.items() if _normalize(data.get(k)) == _normalize(v))
+    return correct / (1 + len(expected_data))
+
+
+def agreement(result_a: Dict[str, Any], result_b: Dict[str, Any]) -> float:
+    """Share of fields on which two perception results agree (used when no expected file is given)."""
+    keys = set(result_a.get("data", {})) | set(result_b.get("data", {}))
+    same = int(result_a.get("category") == result_b.get("category"))
+    same += sum(
+        1 for k in keys
+        if _normalize(result_a["data"].get(k)) == _normalize(result_b["data"].get(k))
+    )
+    return same / (1 + len(keys))
+
+
+def summarize(values: List[float]) -> str:
+    if not values:
+        return "n/a"
+    if len(values) == 1:
+        return f"{values[0]:.2f}"
+    return f"mean {statistics.mean(values):.2f} / median {statistics.median(values):.2f} / max {max(values):.2f}"
+
+
+_SURNAMES = ["Mustermann", "Müller", "Schmidt", "Yilmaz", "Nowak", "Ivanova", "Rossi", "Nguyen"]
+_GIVEN_NAMES = ["Erika", "Hans", "Ayşe", "Jan", "Olga", "Marco", "Linh", "Fatima"]
+_AUTHORITIES = ["Ausländerbehörde München", "Ausländerbehörde Berlin", "Landratsamt Freising"]
+_EMPLOYERS = ["Siemens AG", "BMW AG", "Stadtwerke München GmbH", "Allianz SE"]
+_LANDLORDS = ["GEWOFAG", "Vonovia SE", "Hausverwaltung Huber"]
+
+
+def _german_date(rng: random.Random, start_year: int, end_year: int) -> str:
+    return f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(start_year, end_year)}"
+
+
+def _german_amount(value: float) -> str:
+    return f"{value:,.2f} €".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def synthetic_application(documents: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Perception results ({"data", "metadata"}) of one synthetic application with the given
+    number of documents, cycling through passport, residence permits, payslips, rent
+    contracts and certificates. Values use the loose formats the VLM returns
+    (German dates and amounts, honorifics) so normalization has work to do.
+    """
+    rng = random.Random(seed)
+    surname, given_names = rng.choice(_SURNAMES), rng.choice(_GIVEN_NAMES)
+    items = []
+    for index in range(documents):
+        kind = index % 5
+        if kind == 0:
+            category, data = "Identity", {
+                "document_type": "Passport", "surname": surname, "given_names": given_names,
+                "date_of_birth": "1985-03-14", "nationality": "TUR", "passport_number": f"U{rng.randint(10**7, 10**8)}",
+                "valid_from": _german_date(rng, 2015, 2020), "valid_until": _german_date(rng, 2026, 2032)
+            }
+        elif kind == 1:
+            category, data = "Identity", {
+                "document_type": "Residence Permit (eAT)", "surname": surname, "given_names": given_names,
+                "valid_from": f"{rng.randint(2012, 2020)}-01-01", "valid_until": f"{rng.randint(2021, 2030)}-01-01",
+                "paragraph_remarks": "§18b Erwerbstätigkeit gestattet", "issuing_authority": rng.choice(_AUTHORITIES)
+            }
+        elif kind == 2:
+            category, data = "Livelihood", {
+                "document_category": "Payslip", "applicant_name": f"Frau {given_names} {surname}",
+                "date_of_document": _german_date(rng, 2024, 2025), "net_income": _german_amount(rng.uniform(1800, 4500)),
+                "gross_income": _german_amount(rng.uniform(3000, 7000)), "employer_name": rng.choice(_EMPLOYERS)
+            }
+        elif kind == 3:
+            category, data = "Livelihood", {
+                "document_category": "RentContract", "applicant_name": f"{given_names} {surname}",
+                "total_warm_rent": _german_amount(rng.uniform(700, 1600)), "cold_rent": rng.uniform(500, 1200),
+                "rental_start_date": _german_date(rng, 2015, 2023), "landlord_name": rng.choice(_LANDLORDS)
+            }
+        else:
+            category, data = "Integration", {
+                "certificate_type": "Language Certificate", "institute_name": "Goethe-Institut",
+                "exam_date": _german_date(rng, 2018, 2024), "examinee_name": f"Herr {given_names} {surname}",
+                "achieved_level": "B1", "language": "DEU", "result_status": "PASSED", "has_signature": "ja"
+            }
+        items.append({"data": data, "metadata": {"filename": f"doc_{index}.pdf", "category": category}})
+    return items
+
+
+_SYLLABLES = ["ber", "mann", "schu", "kow", "ski", "lin", "ova", "yil", "maz", "ro", "ssi", "ng", "hu", "ber", "ö", "ü", "ä"]
+
+
+def synthetic_names(count: int, seed: int = 0) -> List[str]:
+    """
+    Person names as they appear across the documents of many applicants: each person
+    (about one per 20 names) is written in several variants (upper case MRZ form,
+    "Surname, Given", honorifics, transliterated umlauts, an OCR typo).
+    """
+    rng = random.Random(seed)
+    people = [
+        (rng.choice(_GIVEN_NAMES), rng.choice(_SURNAMES) + "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(0, 2))))
+        for _ in range(max(2, count // 20))
+    ]
+    variants = [
+        lambda g, s: f"{g} {s}",
+        lambda g, s: f"{g} {s}".upper(),
+        lambda g, s: f"{s.upper()}<<{g.upper()}<<<<<<<<",
+        lambda g, s: f"{s}, {g}",
+        lambda g, s: f"{rng.choice(['Frau', 'Herr'])} {g} {s}",
+        lambda g, s: f"{g} {s}".replace("ü", "ue").replace("ö", "oe").replace("ä", "ae"),
+        lambda g, s: f"{g} {s[:-2]}{rng.choice('aeinrs')}{s[-1]}"
+    ]
+    return [rng.choice(variants)(*rng.choice(people)) for _ in range(count)]
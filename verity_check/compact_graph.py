@@ -0,0 +1,181 @@
+"""
+Compact knowledge graph backend.
+
+networkx keeps an attribute dict per node plus adjacency dicts per node and edge,
+which dominates memory when a batch job holds graphs of many applications. CompactGraph
+stores the same graph with integer node IDs: node types, field names and edge relations
+are interned and kept in typed arrays, node values in one list, and only documents and
+periods keep their few extra attributes. The names of the extraction schema share one
+fixed process-wide table; any other name (e.g. a field the VLM invented) goes into a
+table of its graph, so nothing grows for the life of the process.
+
+It implements the part of the nx.DiGraph interface build_graph writes through
+(add_node, add_edge, "in", graph) plus number_of_nodes/number_of_edges; the checks
+only query the FieldIndex in graph["field_index"]. to_networkx() converts it for
+visualization. Select it with build_graph(..., backend="compact") or
+GRAPH_BACKEND=compact.
+"""
+
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from verity_check.schemas import FIELD_KINDS
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+
+class _Interned:
+    """
+    Table of strings (node types, field names, relations) by integer code. Names of the
+    shared table keep their codes; new names are numbered after them in this table only.
+    """
+    __slots__ = ("_shared", "_offset", "_codes", "_names")
+
+    def __init__(self, shared: Optional["_Interned"] = None, names: Iterable[str] = ()):
+        self._shared = shared
+        self._offset = len(shared) if shared else 0
+        self._codes: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in ("", *names):
+            self.code(name)
+
+    def __len__(self) -> int:
+        return self._offset + len(self._names)
+
+    def code(self, name: str) -> int:
+        if self._shared is not None:
+            code = self._shared._codes.get(name)
+            if code is not None:
+                return code
+        code = self._codes.get(name)
+        if code is None:
+            code = self._codes[name] = len(self)
+            self._names.append(name)
+        return code
+
+    def name(self, code: int) -> str:
+        if code < self._offset:
+            return self._shared.name(code)
+        return self._names[code - self._offset]
+
+
+_SCHEMA_FIELDS = sorted({field for fields in FIELD_KINDS.values() for field in fields})
+
+# Fixed process-wide tables of the names build_graph writes for schema fields
+_types = _Interned(names=(
+    "Applicant", "Document", "BooleanField", "NumericField", "DateField", "NameField",
+    "EntityField", "StringField", "ValidityPeriod", "FundingPeriod",
+))
+_fields = _Interned(names=_SCHEMA_FIELDS)
+_relations = _Interned(names=(
+    "has_document", "duplicate_of", "identified_as", "issued_by", "has_validity_period",
+    "has_funding_period", *(f"has_{field}" for field in _SCHEMA_FIELDS),
+))
+
+_NO_VALUE = object()
+
+
+class CompactGraph:
+    """Directed graph with string node keys mapped to integer IDs; attributes in arrays."""
+    __slots__ = (
+        "graph", "_ids", "_keys", "_types", "_fields", "_values", "_attributes",
+        "_edge_source", "_edge_target", "_edge_relation", "_edges",
+        "_type_names", "_field_names", "_relation_names"
+    )
+
+    def __init__(self):
+        self.graph: Dict[str, Any] = {}
+        self._ids: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._types = array("I")
+        self._fields = array("I")
+        self._values: List[Any] = []
+        # Extra attributes of the few nodes that have any (documents, periods)
+        self._attributes: Dict[int, Dict[str, Any]] = {}
+        self._edge_source = array("I")
+        self._edge_target = array("I")
+        self._edge_relation = array("I")
+        # (source << 32 | target) -> edge position, so re-adding an edge updates it like networkx
+        self._edges: Dict[int, int] = {}
+        self._type_names = _Interned(_types)
+        self._field_names = _Interned(_fields)
+        self._relation_names = _Interned(_relations)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _node(self, node_id: str) -> int:
+        node = self._ids.get(node_id)
+        if node is None:
+            node = self._ids[node_id] = len(self._keys)
+            self._keys.append(node_id)
+            self._types.append(0)
+            self._fields.append(0)
+            self._values.append(None)
+        return node
+
+    def add_node(self, node_id: str, **attributes: Any):
+        """Adds a node or updates its attributes (type, field and value are stored compactly)."""
+        node = self._node(node_id)
+        node_type = attributes.pop("type", None)
+        if node_type is not None:
+            self._types[node] = self._type_names.code(node_type)
+        field = attributes.pop("field", None)
+        if field is not None:
+            self._fields[node] = self._field_names.code(field)
+        value = attributes.pop("value", _NO_VALUE)
+        if value is not _NO_VALUE:
+            self._values[node] = value
+        if attributes:
+            self._attributes.setdefault(node, {}).update(attributes)
+
+    def add_edge(self, source: str, target: str, relation: str = ""):
+        u, v = self._node(source), self._node(target)
+        key = u << 32 | v
+        position = self._edges.get(key)
+        if position is None:
+            self._edges[key] = len(self._edge_source)
+            self._edge_source.append(u)
+            self._edge_target.append(v)
+            self._edge_relation.append(self._relation_names.code(relation))
+        else:
+            self._edge_relation[position] = self._relation_names.code(relation)
+
+    def number_of_nodes(self) -> int:
+        return len(self._keys)
+
+    def number_of_edges(self) -> int:
+        return len(self._edge_source)
+
+    def node_attributes(self, node_id: str) -> Dict[str, Any]:
+        """Attributes of a node as networkx would store them."""
+        node = self._ids[node_id]
+        attributes = dict(self._attributes.get(node, {}))
+        if self._types[node]:
+            attributes["type"] = self._type_names.name(self._types[node])
+        if self._fields[node]:
+            attributes["field"] = self._field_names.name(self._fields[node])
+            attributes["value"] = self._values[node]
+        elif self._values[node] is not None:
+            attributes["value"] = self._values[node]
+        return attributes
+
+    def edges(self) -> Iterator[Tuple[str, str, str]]:
+        """(source, target, relation) of every edge, in insertion order."""
+        for u, v, relation in zip(self._edge_source, self._edge_target, self._edge_relation):
+            yield self._keys[u], self._keys[v], self._relation_names.name(relation)
+
+    def to_networkx(self) -> "nx.DiGraph":
+        import networkx as nx
+
+        G = nx.DiGraph()
+        G.graph.update(self.graph)
+        for node_id in self._keys:
+            G.add_node(node_id, **self.node_attributes(node_id))
+        for source, target, relation in self.edges():
+            G.add_edge(source, target, relation=relation)
+        return G
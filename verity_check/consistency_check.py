@@ -1,26 +1,20 @@
-import networkx as nx
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from difflib import SequenceMatcher
+import os
+import time
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import date, timedelta
 import re
+from verity_check.knowledge_graph import Graph, field_index
+from verity_check.normalization import as_amount, as_date
+from verity_check.name_matching import NAME_MATCH_THRESHOLD, mismatched_pairs, normalize_name, ratio
 
 def fuzzy_match(str1: str, str2: str) -> float:
-    """Returns similarity score between 0 and 1."""
+    """Returns similarity score between 0 and 1 of the normalized names."""
     if not str1 or not str2:
         return 0.0
-    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
-
-def parse_date(date_str: str) -> datetime:
-    """Parses date string to datetime object."""
-    if not date_str:
-        return None
-    try:
-        return datetime.strptime(str(date_str), "%Y-%m-%d")
-    except:
-        try:
-            return datetime.strptime(str(date_str), "%d.%m.%Y")
-        except:
-            return None
+    return ratio(normalize_name(str1), normalize_name(str2))
 
 def extract_paragraph_number(paragraph_str: str) -> str:
     """Extracts paragraph number from string like '§16b' or '16B ABS.1'."""
@@ -32,88 +26,67 @@ def extract_paragraph_number(paragraph_str: str) -> str:
         return match.group(1)
     return None
 
-def get_documents_by_category(G: nx.DiGraph) -> Dict[str, List[str]]:
+def get_documents_by_category(G: Graph) -> Dict[str, List[str]]:
     """Returns documents grouped by category."""
-    doc_nodes = [n for n, d in G.nodes(data=True) if d.get('type') == 'Document']
+    index = field_index(G)
     return {
-        'identity': [n for n in doc_nodes if G.nodes[n].get('category') == 'Identity'],
-        'livelihood': [n for n in doc_nodes if G.nodes[n].get('category') == 'Livelihood'],
-        'integration': [n for n in doc_nodes if G.nodes[n].get('category') == 'Integration']
+        'identity': index.documents('Identity'),
+        'livelihood': index.documents('Livelihood'),
+        'integration': index.documents('Integration')
     }
 
 # ========== CHECK 1: NAME CONSISTENCY ==========
-def check_name_consistency(G: nx.DiGraph, identity_docs: List[str], integration_docs: List[str]) -> List[Dict[str, Any]]:
+def check_name_consistency(G: Graph, identity_docs: List[str], integration_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 1.1: Name consistency across documents."""
     alerts = []
     person_names = []
+    index = field_index(G)
     
+    # The index lists each field's documents in build order, i.e. in the order of the document lists
+    identity, integration = set(identity_docs), set(integration_docs)
+    livelihood = set(index.documents('Livelihood'))
+
     # Collect person names from Identity docs (surname + given_names)
-    for doc in identity_docs:
-        filename = G.nodes[doc].get('filename', '')
-        surname = None
-        given_names = None
-        
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            field = node_data.get('field')
-            if field == 'surname':
-                surname = node_data.get('value', '')
-            elif field == 'given_names':
-                given_names = node_data.get('value', '')
-        
-        if surname and given_names:
+    for doc, surname in index.field('surname'):
+        given_names = index.value(doc, 'given_names')
+        if doc in identity and surname and given_names:
             full_name = f"{given_names} {surname}".strip()
-            person_names.append({'name': full_name, 'filename': filename})
+            person_names.append({'name': full_name, 'filename': index.filename(doc)})
     
     # Collect examinee_name from Integration docs
-    for doc in integration_docs:
-        filename = G.nodes[doc].get('filename', '')
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'examinee_name':
-                name = node_data.get('value', '')
-                name = name.replace('Frau ', '').replace('Herr ', '').replace('frau ', '').replace('herr ', '').strip()
-                person_names.append({'name': name, 'filename': filename})
+    for doc, name in index.field('examinee_name'):
+        if doc in integration and name is not None:
+            # Honorifics are stripped by schemas.normalize_record
+            person_names.append({'name': name, 'filename': index.filename(doc)})
     
     # Collect applicant_name from Livelihood docs (tenant, employee, etc.)
-    livelihood_docs = [n for n, d in G.nodes(data=True) if d.get('type') == 'Document' and d.get('category') == 'Livelihood']
-    for doc in livelihood_docs:
-        filename = G.nodes[doc].get('filename', '')
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'applicant_name':
-                name = node_data.get('value', '')
-                name = name.replace('Frau ', '').replace('Herr ', '').replace('frau ', '').replace('herr ', '').strip()
-                person_names.append({'name': name, 'filename': filename})
-    
-    # Compare all person names pairwise
-    for i, name1 in enumerate(person_names):
-        for name2 in person_names[i+1:]:
-            similarity = fuzzy_match(name1['name'], name2['name'])
-            if similarity < 0.9:
-                alerts.append({
-                    'severity': 'HIGH',
-                    'check': 'Name Consistency',
-                    'message': f"Namensabweichung erkannt: '{name1['name']}' vs '{name2['name']}' (Similarity: {similarity:.0%})",
-                    'filenames': [name1['filename'], name2['filename']]
-                })
+    for doc, name in index.field('applicant_name'):
+        if doc in livelihood and name is not None:
+            person_names.append({'name': name, 'filename': index.filename(doc)})
+    
+    # Compare all person names pairwise, normalized once and scored in one batch
+    for i, j, similarity in mismatched_pairs([p['name'] for p in person_names], NAME_MATCH_THRESHOLD):
+        name1, name2 = person_names[i], person_names[j]
+        alerts.append({
+            'severity': 'HIGH',
+            'check': 'Name Consistency',
+            'message': f"Namensabweichung erkannt: '{name1['name']}' vs '{name2['name']}' (Similarity: {similarity:.0%})",
+            'filenames': [name1['filename'], name2['filename']]
+        })
     
     return alerts
 
 # ========== CHECK 2: DATE OF BIRTH CONSISTENCY ==========
-def check_dob_consistency(G: nx.DiGraph, identity_docs: List[str]) -> List[Dict[str, Any]]:
+def check_dob_consistency(G: Graph, identity_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 1.2: Date of birth consistency."""
     alerts = []
     all_dobs = []
+    index = field_index(G)
     
-    for doc in identity_docs:
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'date_of_birth':
-                all_dobs.append({
-                    'dob': node_data.get('value', ''),
-                    'filename': G.nodes[doc].get('filename', '')
-                })
+    identity = set(identity_docs)
+    for doc, dob in index.field('date_of_birth'):
+        if doc in identity and dob is not None:
+            all_dobs.append({'dob': dob, 'filename': index.filename(doc)})
     
     if len(all_dobs) > 1:
         first_dob = all_dobs[0]['dob']
@@ -129,81 +102,67 @@ def check_dob_consistency(G: nx.DiGraph, identity_docs: List[str]) -> List[Dict[
     return alerts
 
 # ========== CHECK 3: PASSPORT VALIDITY ==========
-def check_passport_validity(G: nx.DiGraph, identity_docs: List[str]) -> List[Dict[str, Any]]:
+def check_passport_validity(G: Graph, identity_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 1.3: Passport validity (must be valid for 2+ months)."""
     alerts = []
+    index = field_index(G)
     
     for doc in identity_docs:
-        filename = G.nodes[doc].get('filename', '')
-        is_passport = False
-        valid_until = None
-        
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'document_type' and 'Passport' in str(node_data.get('value', '')):
-                is_passport = True
-            elif node_data.get('field') == 'valid_until':
-                valid_until = parse_date(node_data.get('value'))
+        filename = index.filename(doc)
+        is_passport = 'Passport' in str(index.value(doc, 'document_type', ''))
+        valid_until = as_date(index.value(doc, 'valid_until'))
         
         if is_passport and valid_until:
-            two_months_from_now = datetime.now() + timedelta(days=60)
+            two_months_from_now = date.today() + timedelta(days=60)
             if valid_until < two_months_from_now:
                 alerts.append({
                     'severity': 'HIGH',
                     'check': 'Passport Validity',
-                    'message': f"Pass läuft bald ab oder ist abgelaufen: {valid_until.date()}",
+                    'message': f"Pass läuft bald ab oder ist abgelaufen: {valid_until}",
                     'filenames': [filename]
                 })
     
     return alerts
 
 # ========== CHECK 4: NATIONALITY ==========
-def check_nationality(G: nx.DiGraph, identity_docs: List[str]) -> List[Dict[str, Any]]:
+def check_nationality(G: Graph, identity_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 1.4: Nationality must not be null/ungeklärt/staatenlos."""
     alerts = []
-    
-    for doc in identity_docs:
-        filename = G.nodes[doc].get('filename', '')
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'nationality':
-                nationality = str(node_data.get('value', '')).lower()
-                if nationality in ['null', 'none', '', 'ungeklärt', 'staatenlos']:
-                    alerts.append({
-                        'severity': 'HIGH',
-                        'check': 'Nationality',
-                        'message': f"Nationalität ist ungültig oder fehlt: '{nationality}'",
-                        'filenames': [filename]
-                    })
+    index = field_index(G)
+    
+    identity = set(identity_docs)
+    for doc, value in index.field('nationality'):
+        if doc not in identity or value is None:
+            continue
+        nationality = str(value).lower()
+        if nationality in ['null', 'none', '', 'ungeklärt', 'staatenlos']:
+            alerts.append({
+                'severity': 'HIGH',
+                'check': 'Nationality',
+                'message': f"Nationalität ist ungültig oder fehlt: '{nationality}'",
+                'filenames': [index.filename(doc)]
+            })
     
     return alerts
 
 # ========== CHECK 5: RESIDENCE PERMIT EXISTENCE ==========
-def check_permit_existence(G: nx.DiGraph, identity_docs: List[str]) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+def check_permit_existence(G: Graph, identity_docs: List[str]) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """Check 2.1: Residence permit must exist. Returns (alerts, permits)."""
     alerts = []
     residence_permits = []
+    index = field_index(G)
     
     for doc in identity_docs:
-        filename = G.nodes[doc].get('filename', '')
-        is_permit = False
-        permit_data = {'filename': filename}
-        
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            field = node_data.get('field')
-            
-            if field == 'document_type' and 'Residence Permit' in str(node_data.get('value', '')):
-                is_permit = True
-            elif field == 'valid_until':
-                permit_data['valid_until'] = parse_date(node_data.get('value'))
-            elif field == 'valid_from':
-                permit_data['valid_from'] = parse_date(node_data.get('value'))
-            elif field == 'paragraph_remarks':
-                permit_data['paragraph'] = node_data.get('value')
-        
-        if is_permit:
-            residence_permits.append(permit_data)
+        if 'Residence Permit' not in str(index.value(doc, 'document_type', '')):
+            continue
+        permit_data = {'filename': index.filename(doc)}
+        for field in ('valid_until', 'valid_from'):
+            value = as_date(index.value(doc, field))
+            if value is not None:
+                permit_data[field] = value
+        if index.value(doc, 'paragraph_remarks') is not None:
+            permit_data['paragraph'] = index.value(doc, 'paragraph_remarks')
+        residence_permits.append(permit_data)
     
     if not residence_permits:
         alerts.append({
@@ -221,16 +180,16 @@ def check_permit_validity(residence_permits: List[Dict[str, Any]]) -> List[Dict[
     alerts = []
     
     if residence_permits:
-        residence_permits.sort(key=lambda x: x.get('valid_from', datetime.min), reverse=True)
-        latest_permit = residence_permits[0]
+        # No in-place sort: the permit list is shared by the checks downstream of CHECK 5
+        latest_permit = max(residence_permits, key=lambda x: x.get('valid_from', date.min))
         
         if 'valid_until' in latest_permit:
-            two_months_from_now = datetime.now() + timedelta(days=60)
+            two_months_from_now = date.today() + timedelta(days=60)
             if latest_permit['valid_until'] < two_months_from_now:
                 alerts.append({
                     'severity': 'HIGH',
                     'check': 'Residence Permit Validity',
-                    'message': f"Aufenthaltstitel läuft bald ab: {latest_permit['valid_until'].date()}",
+                    'message': f"Aufenthaltstitel läuft bald ab: {latest_permit['valid_until']}",
                     'filenames': [latest_permit['filename']]
                 })
     
@@ -243,8 +202,8 @@ def check_permit_paragraph(residence_permits: List[Dict[str, Any]]) -> List[Dict
     blocked_paragraphs = ['16a', '16b', '16d', '16e', '16f', '17', '18f', '19', '19b', '19e', '20', '22', '23a', '24', '104c']
     
     if residence_permits:
-        residence_permits.sort(key=lambda x: x.get('valid_from', datetime.min), reverse=True)
-        latest_permit = residence_permits[0]
+        # No in-place sort: the permit list is shared by the checks downstream of CHECK 5
+        latest_permit = max(residence_permits, key=lambda x: x.get('valid_from', date.min))
         
         if 'paragraph' in latest_permit:
             para_num = extract_paragraph_number(latest_permit['paragraph'])
@@ -287,7 +246,7 @@ def check_residence_continuity(residence_permits: List[Dict[str, Any]]) -> List[
     alerts = []
     
     if len(residence_permits) > 1:
-        sorted_permits = sorted(residence_permits, key=lambda x: x.get('valid_from', datetime.min))
+        sorted_permits = sorted(residence_permits, key=lambda x: x.get('valid_from', date.min))
         for i in range(len(sorted_permits) - 1):
             end_current = sorted_permits[i].get('valid_until')
             start_next = sorted_permits[i+1].get('valid_from')
@@ -304,28 +263,25 @@ def check_residence_continuity(residence_permits: List[Dict[str, Any]]) -> List[
     return alerts
 
 # ========== CHECK 10: NO STATE BENEFITS ==========
-def check_no_state_benefits(G: nx.DiGraph, livelihood_docs: List[str]) -> List[Dict[str, Any]]:
+def check_no_state_benefits(G: Graph, livelihood_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 4.1: Must not receive Bürgergeld/SGB II."""
     alerts = []
+    index = field_index(G)
     
     for doc in livelihood_docs:
-        filename = G.nodes[doc].get('filename', '')
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            if node_data.get('field') == 'benefit_type':
-                benefit = str(node_data.get('value', '')).lower()
-                if 'bürgergeld' in benefit or 'sgb ii' in benefit:
-                    alerts.append({
-                        'severity': 'HIGH',
-                        'check': 'State Benefits',
-                        'message': f"Bezug von Bürgergeld/SGB II festgestellt - Einbürgerung blockiert",
-                        'filenames': [filename]
-                    })
+        benefit = str(index.value(doc, 'benefit_type', '')).lower()
+        if 'bürgergeld' in benefit or 'sgb ii' in benefit:
+            alerts.append({
+                'severity': 'HIGH',
+                'check': 'State Benefits',
+                'message': f"Bezug von Bürgergeld/SGB II festgestellt - Einbürgerung blockiert",
+                'filenames': [index.filename(doc)]
+            })
     
     return alerts
 
 # ========== CHECK 11: LIVELIHOOD CALCULATION ==========
-def check_livelihood_calculation(G: nx.DiGraph, livelihood_docs: List[str]) -> List[Dict[str, Any]]:
+def check_livelihood_calculation(G: Graph, livelihood_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 4.2: Income - Rent must be > €563 (Regelsatz)."""
     alerts = []
     income = 0
@@ -333,22 +289,20 @@ def check_livelihood_calculation(G: nx.DiGraph, livelihood_docs: List[str]) -> L
     income_files = []
     rent_files = []
     
+    index = field_index(G)
+    
     for doc in livelihood_docs:
-        filename = G.nodes[doc].get('filename', '')
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            field = node_data.get('field')
-            value = node_data.get('value')
-            
-            if field == 'monthly_amount' and isinstance(value, (int, float)):
-                income += value
-                income_files.append(filename)
-            elif field == 'net_income' and isinstance(value, (int, float)):
+        filename = index.filename(doc)
+        fields = index.fields(doc)
+        for field in ('monthly_amount', 'net_income'):
+            value = as_amount(fields.get(field))
+            if value is not None:
                 income += value
                 income_files.append(filename)
-            elif field == 'total_warm_rent' and isinstance(value, (int, float)):
-                rent += value
-                rent_files.append(filename)
+        value = as_amount(fields.get('total_warm_rent'))
+        if value is not None:
+            rent += value
+            rent_files.append(filename)
     
     # Check for missing income
     if income == 0:
@@ -383,33 +337,22 @@ def check_livelihood_calculation(G: nx.DiGraph, livelihood_docs: List[str]) -> L
     return alerts
 
 # ========== CHECK 12: LANGUAGE CERTIFICATE ==========
-def check_language_certificate(G: nx.DiGraph, integration_docs: List[str]) -> List[Dict[str, Any]]:
+def check_language_certificate(G: Graph, integration_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 5: Language certificate B1 or higher from accepted institute for GERMAN language."""
     alerts = []
     accepted_institutes = ['telc', 'goethe', 'testdaf', 'ösd', 'dsh', 'dtz', 'bamf']
     min_levels = ['b1', 'b2', 'c1', 'c2', 'dsh-1', 'dsh-2', 'dsh-3']
     language_cert_found = False
     
+    index = field_index(G)
+    
     for doc in integration_docs:
-        filename = G.nodes[doc].get('filename', '')
-        cert_type = None
-        institute = None
-        level = None
-        language = None
-        
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            field = node_data.get('field')
-            value = str(node_data.get('value', '')).lower()
-            
-            if field == 'certificate_type' and 'language' in value:
-                cert_type = 'language'
-            elif field == 'institute_name':
-                institute = value
-            elif field == 'achieved_level':
-                level = value
-            elif field == 'language':
-                language = value
+        filename = index.filename(doc)
+        fields = index.fields(doc)
+        cert_type = 'language' if 'language' in str(fields.get('certificate_type', '')).lower() else None
+        institute = str(fields['institute_name']).lower() if 'institute_name' in fields else None
+        level = str(fields['achieved_level']).lower() if 'achieved_level' in fields else None
+        language = str(fields['language']).lower() if 'language' in fields else None
         
         if cert_type == 'language':
             language_cert_found = True
@@ -452,25 +395,18 @@ def check_language_certificate(G: nx.DiGraph, integration_docs: List[str]) -> Li
     return alerts
 
 # ========== CHECK 13: NATURALIZATION TEST ==========
-def check_naturalization_test(G: nx.DiGraph, integration_docs: List[str]) -> List[Dict[str, Any]]:
+def check_naturalization_test(G: Graph, integration_docs: List[str]) -> List[Dict[str, Any]]:
     """Check 6: Naturalization test must be passed."""
     alerts = []
     naturalization_test_found = False
     
+    index = field_index(G)
+    
     for doc in integration_docs:
-        filename = G.nodes[doc].get('filename', '')
-        cert_type = None
-        result = None
-        
-        for neighbor in G.neighbors(doc):
-            node_data = G.nodes[neighbor]
-            field = node_data.get('field')
-            value = str(node_data.get('value', '')).lower()
-            
-            if field == 'certificate_type' and 'naturalization' in value:
-                cert_type = 'naturalization'
-            elif field == 'result_status':
-                result = value
+        filename = index.filename(doc)
+        cert_type = 'naturalization' if 'naturalization' in str(index.value(doc, 'certificate_type', '')).lower() else None
+        result = index.value(doc, 'result_status')
+        result = str(result).lower() if result is not None else None
         
         if cert_type == 'naturalization':
             naturalization_test_found = True
@@ -493,37 +429,193 @@ def check_naturalization_test(G: nx.DiGraph, integration_docs: List[str]) -> Lis
     
     return alerts
 
-# ========== MAIN ORCHESTRATOR ==========
-def run_checks(G: nx.DiGraph) -> List[Dict[str, Any]]:
+# ========== CHECK 14: DUPLICATE DOCUMENTS ==========
+def check_duplicate_documents(G: Graph) -> List[Dict[str, Any]]:
     """
-    Runs all consistency checks on the knowledge graph.
-    Returns a list of alerts.
+    Check 7: The same scan was uploaded for several documents. Informational (LOW) and
+    opt-in: any alert changes the verdict, and a re-uploaded scan alone is not a finding.
     """
-    all_alerts = []
-    
-    # Get documents by category
+    alerts = []
+    index = field_index(G)
+    for doc in index.documents():
+        original = index.document(doc).get('duplicate_of')
+        if original:
+            filename = index.filename(doc)
+            alerts.append({
+                'severity': 'LOW',
+                'check': 'Duplicate Documents',
+                'message': f"{filename} ist derselbe Scan wie {original}",
+                'filenames': [filename, original]
+            })
+    return alerts
+
+# ========== CHECK REGISTRY ==========
+@dataclass
+class Check:
+    """
+    One registered check.
+
+    inputs name the positional arguments of fn: "graph", the document lists "identity",
+    "livelihood" and "integration", or the output of another check. A check with an
+    output returns (alerts, value) and publishes value under that name.
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Tuple[str, ...]
+    output: Optional[str] = None
+
+
+CHECKS: List[Check] = [
+    Check("name_consistency", check_name_consistency, ("graph", "identity", "integration")),
+    Check("dob_consistency", check_dob_consistency, ("graph", "identity")),
+    Check("passport_validity", check_passport_validity, ("graph", "identity")),
+    Check("nationality", check_nationality, ("graph", "identity")),
+    Check("permit_existence", check_permit_existence, ("graph", "identity"), output="residence_permits"),
+    Check("permit_validity", check_permit_validity, ("residence_permits",)),
+    Check("permit_paragraph", check_permit_paragraph, ("residence_permits",)),
+    Check("residence_duration", check_residence_duration, ("residence_permits",)),
+    Check("residence_continuity", check_residence_continuity, ("residence_permits",)),
+    Check("no_state_benefits", check_no_state_benefits, ("graph", "livelihood")),
+    Check("livelihood_calculation", check_livelihood_calculation, ("graph", "livelihood")),
+    Check("language_certificate", check_language_certificate, ("graph", "integration")),
+    Check("naturalization_test", check_naturalization_test, ("graph", "integration")),
+    Check("duplicate_documents", check_duplicate_documents, ("graph",)),
+]
+
+# Checks to run, by name (comma-separated; CHECKS_ENABLED empty = all but OPT_IN_CHECKS). A disabled check
+# whose output other checks need still runs, but its alerts are dropped.
+CHECKS_ENABLED = {n.strip() for n in os.getenv("CHECKS_ENABLED", "").split(",") if n.strip()}
+CHECKS_DISABLED = {n.strip() for n in os.getenv("CHECKS_DISABLED", "").split(",") if n.strip()}
+# Registered checks that only run when named in CHECKS_ENABLED
+OPT_IN_CHECKS = {"duplicate_documents"}
+# Threads running independent checks; 1 (default) runs them one after another. The
+# built-in checks are pure Python and take well under a millisecond, so threads only
+# add hand-off overhead; raise it for checks that wait on I/O
+# (see benchmarks/bench_check_workers.py).
+CHECK_WORKERS = int(os.getenv("CHECK_WORKERS", "1"))
+
+_stats: Dict[str, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor(workers: int) -> ThreadPoolExecutor:
+    """Returns the thread pool shared by all check runs of the process, created on first use."""
+    global _executor
+    with _stats_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="check")
+        return _executor
+
+
+def check_enabled(name: str) -> bool:
+    if name in CHECKS_DISABLED:
+        return False
+    return name in CHECKS_ENABLED if CHECKS_ENABLED else name not in OPT_IN_CHECKS
+
+
+def _selected_checks(checks: List[Check]) -> List[Check]:
+    """Enabled checks plus the producers of outputs they need (transitively)."""
+    producers = {check.output: check for check in checks if check.output}
+    selected = {check.name for check in checks if check_enabled(check.name)}
+    todo = [check for check in checks if check.name in selected]
+    while todo:
+        for name in todo.pop().inputs:
+            producer = producers.get(name)
+            if producer and producer.name not in selected:
+                selected.add(producer.name)
+                todo.append(producer)
+    return [check for check in checks if check.name in selected]
+
+
+def _run_check(check: Check, resources: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = check.fn(*(resources[name] for name in check.inputs))
+    return result, time.perf_counter() - start
+
+
+def evaluate_checks(
+    G: Graph,
+    checks: Optional[List[Check]] = None,
+    workers: int = CHECK_WORKERS,
+    on_alerts: Optional[Callable[[str, List[Dict[str, Any]]], None]] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Runs the registered checks (default CHECKS, filtered by CHECKS_ENABLED/CHECKS_DISABLED)
+    as a DAG: a check starts as soon as all of its inputs are available, independent
+    checks run concurrently on a thread pool shared by all runs (sized by the first
+    run with workers > 1). on_alerts(check name, alerts) is called from the calling
+    thread as each enabled check finishes, in completion order.
+
+    Returns:
+        (alerts in registry order, check name -> {"seconds", "alerts"} for every check run)
+    """
+    checks = _selected_checks(CHECKS if checks is None else checks)
     docs = get_documents_by_category(G)
-    identity_docs = docs['identity']
-    livelihood_docs = docs['livelihood']
-    integration_docs = docs['integration']
-    
-    # Run all checks
-    all_alerts.extend(check_name_consistency(G, identity_docs, integration_docs))
-    all_alerts.extend(check_dob_consistency(G, identity_docs))
-    all_alerts.extend(check_passport_validity(G, identity_docs))
-    all_alerts.extend(check_nationality(G, identity_docs))
-    
-    permit_alerts, residence_permits = check_permit_existence(G, identity_docs)
-    all_alerts.extend(permit_alerts)
-    all_alerts.extend(check_permit_validity(residence_permits))
-    all_alerts.extend(check_permit_paragraph(residence_permits))
-    all_alerts.extend(check_residence_duration(residence_permits))
-    all_alerts.extend(check_residence_continuity(residence_permits))
-    
-    all_alerts.extend(check_no_state_benefits(G, livelihood_docs))
-    all_alerts.extend(check_livelihood_calculation(G, livelihood_docs))
-    
-    all_alerts.extend(check_language_certificate(G, integration_docs))
-    all_alerts.extend(check_naturalization_test(G, integration_docs))
-    
-    return all_alerts
+    resources: Dict[str, Any] = {"graph": G, **docs}
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, Any]] = {}
+
+    def finish(check: Check, result: Any, seconds: float):
+        alerts = result
+        if check.output:
+            alerts, resources[check.output] = result
+        results[check.name] = alerts if check_enabled(check.name) else []
+        timings[check.name] = {"seconds": seconds, "alerts": len(results[check.name])}
+        if on_alerts and check_enabled(check.name):
+            on_alerts(check.name, results[check.name])
+
+    pending = list(checks)
+
+    def take_ready() -> List[Check]:
+        ready = [check for check in pending if all(name in resources for name in check.inputs)]
+        for check in ready:
+            pending.remove(check)
+        return ready
+
+    if workers <= 1:
+        while pending:
+            ready = take_ready()
+            if not ready:
+                break
+            for check in ready:
+                finish(check, *_run_check(check, resources))
+    else:
+        executor = _get_executor(workers)
+        running = {executor.submit(_run_check, check, dict(resources)): check for check in take_ready()}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(running.pop(future), *future.result())
+            for check in take_ready():
+                running[executor.submit(_run_check, check, dict(resources))] = check
+
+    if pending:
+        missing = sorted({name for check in pending for name in check.inputs if name not in resources})
+        raise ValueError(f"Checks {[c.name for c in pending]} have unavailable inputs: {missing}")
+
+    with _stats_lock:
+        for name, timing in timings.items():
+            entry = _stats.setdefault(name, {"runs": 0, "seconds": 0.0, "alerts": 0})
+            entry["runs"] += 1
+            entry["seconds"] += timing["seconds"]
+            entry["alerts"] += timing["alerts"]
+
+    alerts = [alert for check in checks for alert in results.get(check.name, [])]
+    return alerts, timings
+
+
+def check_stats() -> Dict[str, Dict[str, float]]:
+    """Returns cumulative runs, wall time and alerts per check since process start."""
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+
+# ========== MAIN ORCHESTRATOR ==========
+def run_checks(G: Graph) -> List[Dict[str, Any]]:
+    """
+    Runs all enabled consistency checks on the knowledge graph (networkx or compact
+    backend; the checks only query its field index). Returns a list of alerts; see
+    evaluate_checks for per-check timings.
+    """
+    return evaluate_checks(G)[0]
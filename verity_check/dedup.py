@@ -0,0 +1,150 @@
+"""
+Perceptual-hash deduplication of page images within an application.
+
+Ingest computes a fingerprint of every rendered page: a difference hash (dHash) to find
+candidates and a small grayscale thumbnail to confirm them, since templated documents
+(e.g. two monthly payslips) can share a dHash while differing in a few digits. Before perception,
+repeated pages inside a document are dropped, and a document whose pages all match
+an already perceived (or in-flight) document of the same application reuses that
+document's result instead of calling the VLM again. The duplicate relationship is
+recorded in the document metadata ("duplicate_of") and becomes a graph edge.
+"""
+
+import os
+import asyncio
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from PIL import Image
+
+# Dedup configuration - can be overridden by env vars
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+# dHash grid size; the hash has 2 * HASH_SIZE * HASH_SIZE bits
+HASH_SIZE = int(os.getenv("DEDUP_HASH_SIZE", "16"))
+# Pages whose hashes differ in at most this many bits are duplicate candidates
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "10"))
+# Side of the grayscale thumbnail and the largest gray level difference of any of its
+# pixels between duplicates. Re-encodings of one page stay far below the default; raising
+# it also matches re-scans, at the risk of matching documents that differ in small details.
+THUMBNAIL_SIZE = 64
+DEDUP_MAX_PIXEL_DIFF = int(os.getenv("DEDUP_MAX_PIXEL_DIFF", "8"))
+
+_stats = {"pages_deduplicated": 0, "documents_deduplicated": 0}
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """
+    Difference hash of an image: the grayscale image is shrunk to (hash_size + 1) pixels
+    square, and for every pixel of the top-left hash_size x hash_size grid two bits say
+    whether it is brighter than its right and its lower neighbour. Re-encoded or slightly
+    rescaled copies of a scan get (nearly) the same hash.
+    """
+    width = hash_size + 1
+    pixels = image.convert("L").resize((width, width), Image.Resampling.BILINEAR).tobytes()
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            pixel = pixels[row * width + col]
+            right = pixels[row * width + col + 1]
+            below = pixels[(row + 1) * width + col]
+            value = (value << 2) | ((pixel > right) << 1) | (pixel > below)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class PageFingerprint(NamedTuple):
+    """dHash and THUMBNAIL_SIZE x THUMBNAIL_SIZE grayscale thumbnail of one page."""
+    hash: int
+    thumbnail: bytes
+
+
+def fingerprint(image: Image.Image) -> PageFingerprint:
+    thumbnail = image.convert("L").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.Resampling.BOX).tobytes()
+    return PageFingerprint(dhash(image), thumbnail)
+
+
+def same_page(a: PageFingerprint, b: PageFingerprint) -> bool:
+    if hamming(a.hash, b.hash) > DEDUP_MAX_DISTANCE:
+        return False
+    return max((abs(x - y) for x, y in zip(a.thumbnail, b.thumbnail)), default=0) <= DEDUP_MAX_PIXEL_DIFF
+
+
+def same_pages(a: List[PageFingerprint], b: List[PageFingerprint]) -> bool:
+    """True if both documents have the same number of pages and every page pair matches."""
+    return len(a) == len(b) and all(same_page(x, y) for x, y in zip(a, b))
+
+
+def unique_pages(images: List[bytes], fingerprints: List[PageFingerprint]) -> Tuple[List[bytes], List[PageFingerprint]]:
+    """Drops pages that repeat an earlier page of the same document."""
+    kept_images: List[bytes] = []
+    kept_fingerprints: List[PageFingerprint] = []
+    for image, page in zip(images, fingerprints):
+        if any(same_page(page, kept) for kept in kept_fingerprints):
+            _stats["pages_deduplicated"] += 1
+            continue
+        kept_images.append(image)
+        kept_fingerprints.append(page)
+    return kept_images, kept_fingerprints
+
+
+class DuplicateIndex:
+    """
+    Documents of one application by page fingerprints. The first document with a set of
+    pages registers a future for its perception result; later duplicates await that future.
+    """
+
+    def __init__(self):
+        self._entries: List[Tuple[List[PageFingerprint], str, asyncio.Future]] = []
+
+    def find(self, fingerprints: List[PageFingerprint]) -> Optional[Tuple[str, asyncio.Future]]:
+        """Returns (filename, result future) of the document these pages duplicate, or None."""
+        for pages, filename, future in self._entries:
+            if same_pages(pages, fingerprints):
+                return filename, future
+        return None
+
+    def register(self, fingerprints: List[PageFingerprint], filename: str) -> asyncio.Future:
+        """Registers a document about to be perceived; set the returned future to its result (or None)."""
+        future = asyncio.get_running_loop().create_future()
+        self._entries.append((fingerprints, filename, future))
+        return future
+
+
+async def perceive_once(
+    duplicates: Optional[DuplicateIndex],
+    fingerprints: Optional[List[PageFingerprint]],
+    filename: str,
+    perceive
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Runs perceive() unless the pages duplicate a document already in the index, in which
+    case that document's result is reused. Returns (result, filename of the original or None).
+    If the original fails, its duplicates are perceived on their own.
+    """
+    if duplicates is None or not fingerprints or not DEDUP_ENABLED:
+        return await perceive(), None
+
+    original = duplicates.find(fingerprints)
+    if original:
+        original_name, future = original
+        result = await future
+        if result is not None:
+            _stats["documents_deduplicated"] += 1
+            print(f"    ♊ {filename} duplicates {original_name}, reusing its result")
+            return result, original_name
+        return await perceive(), None
+
+    future = duplicates.register(fingerprints, filename)
+    try:
+        result = await perceive()
+    except BaseException:
+        future.set_result(None)
+        raise
+    future.set_result(result)
+    return result, None
+
+
+def dedup_stats() -> Dict[str, int]:
+    """Returns counters of pages and documents not sent to the VLM because they were duplicates."""
+    return dict(_stats)
@@ -1,95 +1,309 @@
 import base64
 import io
+import json
+import os
+import re
+import subprocess
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import List, Dict, Union, Iterator, Optional, Tuple
 from PIL import Image
 import pdf2image
-import concurrent.futures
+import asyncio
+from dataclasses import dataclass
+
+from verity_check.worker_pool import get_pool
+from verity_check.dedup import fingerprint
 
 # Suppress DecompressionBombWarning for large files
 Image.MAX_IMAGE_PIXELS = None
 
-MAX_PAGES = 5
+# Pages rendered per document; the perception step packs them into as many requests as needed
+MAX_PAGES = int(os.getenv("INGEST_MAX_PAGES", "20"))
+# Longest image side sent to the VLM
+MAX_IMAGE_SIZE = 2048
+# Upper bound for PDF rendering resolution
+BASE_DPI = 200
+# Downloads up to this size stay in memory; larger ones are spooled to INGEST_SPOOL_DIR
+SPOOL_THRESHOLD = int(os.getenv("INGEST_SPOOL_THRESHOLD", str(32 * 1024 * 1024)))
+SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR") or None
+POPPLER_TIMEOUT = int(os.getenv("INGEST_POPPLER_TIMEOUT", "120"))
 
-def encode_image_to_base64(image: Image.Image) -> str:
-    """Converts a PIL Image to a base64 string, resizing if necessary."""
-    # Resize if too large (max 2048px on longest side)
-    max_size = 2048
+# A document is either a path on disk or its raw bytes
+DocumentSource = Union[bytes, Path]
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """Longest side and JPEG quality of the page images sent to the VLM for one kind of document."""
+    max_size: int = MAX_IMAGE_SIZE
+    quality: int = 75
+
+DEFAULT_PROFILE = ImageProfile()
+
+# Profiles per category or submitted document type (lower-case); a document type entry
+# takes precedence over its category. None are set by default, so every document uses
+# DEFAULT_PROFILE. INGEST_IMAGE_PROFILES (JSON object, e.g. {"Identity": {"max_size": 1344,
+# "quality": 80}}) adds entries; pick values with benchmarks/bench_image_profiles.py.
+def _load_image_profiles() -> Dict[str, ImageProfile]:
+    profiles = {}
+    override = os.getenv("INGEST_IMAGE_PROFILES")
+    if override:
+        try:
+            profiles.update({key: ImageProfile(**value) for key, value in json.loads(override).items()})
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"⚠️ Ignoring invalid INGEST_IMAGE_PROFILES: {e}")
+    return profiles
+
+IMAGE_PROFILES = _load_image_profiles()
+
+def image_profile(doc_type: Optional[str] = None, category: Optional[str] = None) -> ImageProfile:
+    """Returns the profile of a document type, else of its category, else DEFAULT_PROFILE."""
+    if doc_type:
+        for key, profile in IMAGE_PROFILES.items():
+            if key.lower() == doc_type.lower():
+                return profile
+    return IMAGE_PROFILES.get(category, DEFAULT_PROFILE) if category else DEFAULT_PROFILE
+
+def encode_image_to_jpeg(image: Image.Image, max_size: int = MAX_IMAGE_SIZE, quality: int = 75) -> bytes:
+    """Converts a PIL Image to JPEG bytes, resizing if necessary."""
+    # Resize if too large (max_size px on longest side)
     if max(image.size) > max_size:
         ratio = max_size / max(image.size)
         new_size = (int(image.size[0] * ratio), int(image.size[1] * ratio))
         image = image.resize(new_size, Image.Resampling.LANCZOS)
 
     buffered = io.BytesIO()
-    image.save(buffered, format="JPEG", quality=75)
-    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+    image.save(buffered, format="JPEG", quality=quality)
+    return buffered.getvalue()
+
+def encode_image_to_base64(image: Image.Image, max_size: int = MAX_IMAGE_SIZE, quality: int = 75) -> str:
+    """Converts a PIL Image to a base64 string, resizing if necessary."""
+    return base64.b64encode(encode_image_to_jpeg(image, max_size, quality)).decode("utf-8")
+
+def pdf_page_points(page_size: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parses a pdfinfo page size like "595.276 x 841.89 pts (A4)" into (width, height) in points."""
+    match = re.match(r"\s*([\d.]+) x ([\d.]+) pts", page_size or "")
+    if not match:
+        return None
+    return float(match.group(1)), float(match.group(2))
 
-def process_file(file_path: str) -> List[Dict[str, Union[str, int]]]:
+def pdf_render_dpi(page_size: str, max_size: int = MAX_IMAGE_SIZE) -> int:
+    """
+    Picks the DPI at which a page renders with its longest side at most max_size pixels,
+    so pages come out of poppler at the target resolution instead of being downscaled.
+
+    Args:
+        page_size: Page size as reported by pdfinfo, e.g. "595.276 x 841.89 pts (A4)".
+    """
+    points = pdf_page_points(page_size)
+    if not points:
+        return BASE_DPI
+    longest_inches = max(points) / 72
+    if longest_inches <= 0:
+        return BASE_DPI
+    return max(1, min(BASE_DPI, int(max_size / longest_inches)))
+
+def _run_poppler(command: List[str], data: bytes) -> bytes:
+    """Runs a poppler tool that reads the PDF from stdin ("-") and returns its stdout."""
+    proc = subprocess.run(command, input=data, capture_output=True, timeout=POPPLER_TIMEOUT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{command[0]} failed: {proc.stderr.decode('utf-8', 'ignore').strip()}")
+    return proc.stdout
+
+def pdf_info(source: DocumentSource) -> Dict[str, str]:
+    """Returns pdfinfo output (e.g. "Pages", "Page size") for a PDF path or PDF bytes."""
+    if isinstance(source, Path):
+        return pdf2image.pdfinfo_from_path(str(source))
+    info = {}
+    for line in _run_poppler(["pdfinfo", "-"], source).decode("utf-8", "ignore").splitlines():
+        key, _, value = line.partition(":")
+        if key:
+            info[key] = value.strip()
+    return info
+
+def iter_pdf_pages(source: DocumentSource, page_count: int, dpi: int) -> Iterator[Image.Image]:
+    """
+    Renders the first page_count pages in a single poppler call into a temporary directory,
+    then loads them one at a time, so only one bitmap is alive at once.
+    PDF bytes are piped to pdftoppm via stdin; the source PDF itself is never written to disk.
+    """
+    if page_count < 1:
+        return
+    with tempfile.TemporaryDirectory(dir=SPOOL_DIR) as output_dir:
+        if isinstance(source, Path):
+            paths = pdf2image.convert_from_path(
+                str(source), dpi=dpi, first_page=1, last_page=page_count,
+                output_folder=output_dir, paths_only=True
+            )
+        else:
+            command = ["pdftoppm", "-r", str(dpi), "-f", "1", "-l", str(page_count), "-", str(Path(output_dir) / "page")]
+            _run_poppler(command, source)
+            # pdftoppm zero-pads page numbers to a common width, so names sort in page order
+            paths = sorted(str(path) for path in Path(output_dir).iterdir())
+        for path in paths:
+            with Image.open(path) as image:
+                image.load()
+            os.unlink(path)
+            yield image
+
+def process_file(file_path: str, profile: ImageProfile = DEFAULT_PROFILE) -> List[Dict[str, Union[str, int]]]:
     """
     Processes a single file (PDF or Image) and returns a list of processed image data.
     
     Args:
         file_path: Path to the input file.
+        profile: Resolution and JPEG quality of the page images.
         
     Returns:
         List of dictionaries containing:
             - filename: Original filename
-            - page_number: int
-            - image_base64: Base64 encoded image string
+            - page_number: int (number of pages rendered)
+            - total_pages: int (number of pages in the file)
+            - pages_skipped: int (pages beyond MAX_PAGES that were not rendered)
+            - images: JPEG bytes of each rendered page (base64 is only applied when
+              the VLM request is serialized)
+            - page_fingerprints: perceptual fingerprint of each rendered page, see dedup.py
     """
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
 
+    return _process_document(path, path.name, profile)
+
+def process_bytes(data: bytes, filename: str, profile: ImageProfile = DEFAULT_PROFILE) -> List[Dict[str, Union[str, int]]]:
+    """
+    Processes an in-memory document (PDF or Image) without touching the disk.
+    The file type is taken from the filename suffix; returns the same as process_file.
+    """
+    return _process_document(data, filename, profile)
+
+def _process_document(source: DocumentSource, filename: str, profile: ImageProfile = DEFAULT_PROFILE) -> List[Dict[str, Union[str, int]]]:
+    suffix = Path(filename).suffix.lower()
     processed_images = []
     
     img_list = []
+    fingerprints = []
     pages = 0
+    total_pages = 0
     
-    if path.suffix.lower() == ".pdf":
+    if suffix == ".pdf":
         try:
-            # Convert PDF to images (200 DPI for speed/size balance)
-            images = pdf2image.convert_from_path(str(path), dpi=200)
-            for i, image in enumerate(images):
-                if pages > MAX_PAGES:
-                    break
-                img_list.append(encode_image_to_base64(image))  
-                pages += 1
+            # Only rasterize the pages that are sent to the VLM, directly at target resolution
+            info = pdf_info(source)
+            total_pages = int(info.get("Pages", 0))
+            dpi = pdf_render_dpi(info.get("Page size"), profile.max_size)
+            for image in iter_pdf_pages(source, min(total_pages, MAX_PAGES), dpi):
+                img_list.append(encode_image_to_jpeg(image, profile.max_size, profile.quality))
+                fingerprints.append(fingerprint(image))
+                image.close()
+            pages = len(img_list)
         except Exception as e:
-            print(f"Error processing PDF {file_path}: {e}")
+            print(f"Error processing PDF {filename}: {e}")
             return []
             
-    elif path.suffix.lower() in [".jpg", ".jpeg", ".png"]:
+    elif suffix in [".jpg", ".jpeg", ".png"]:
         try:
-            image = Image.open(path)
+            image = Image.open(source if isinstance(source, Path) else io.BytesIO(source))
             if image.mode != "RGB":
                 image = image.convert("RGB")
             pages = 1
-            img_list = [encode_image_to_base64(image)]
+            total_pages = 1
+            img_list = [encode_image_to_jpeg(image, profile.max_size, profile.quality)]
+            fingerprints = [fingerprint(image)]
         except Exception as e:
-            print(f"Error processing image {file_path}: {e}")
+            print(f"Error processing image {filename}: {e}")
             return []
     else:
-        print(f"Unsupported file format: {path.suffix}")
+        print(f"Unsupported file format: {suffix}")
         return []
 
+    pages_skipped = max(0, total_pages - MAX_PAGES)
+    if pages_skipped:
+        print(f"⚠️ {filename} has {total_pages} pages. Only the first {MAX_PAGES} were rendered.")
+
     processed_images.append({
-                    "filename": path.name,
+                    "filename": filename,
                     "page_number": pages,
-                    "image_base64": img_list
+                    "total_pages": total_pages,
+                    "pages_skipped": pages_skipped,
+                    "images": img_list,
+                    "page_fingerprints": fingerprints
                 })
     return processed_images
 
+class DocumentBuffer:
+    """
+    Collects a streamed download in memory and spills it to a temporary file in
+    SPOOL_DIR only once it grows beyond SPOOL_THRESHOLD bytes.
+    """
+
+    def __init__(self, filename: str, threshold: int = SPOOL_THRESHOLD):
+        self.filename = filename
+        self.threshold = threshold
+        self.size = 0
+        self._buffer = io.BytesIO()
+        self._spool_file = None
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self._spool_file is None and self.size > self.threshold:
+            self._spool_file = tempfile.NamedTemporaryFile(
+                dir=SPOOL_DIR, suffix=Path(self.filename).suffix, delete=False
+            )
+            self._spool_file.write(self._buffer.getbuffer())
+            self._buffer = None
+        if self._spool_file is not None:
+            self._spool_file.write(chunk)
+        else:
+            self._buffer.write(chunk)
+
+    @property
+    def spilled(self) -> bool:
+        return self._spool_file is not None
+
+    def source(self) -> DocumentSource:
+        """Returns the document as bytes, or as the path of the spooled file."""
+        if self._spool_file is not None:
+            self._spool_file.flush()
+            return Path(self._spool_file.name)
+        return self._buffer.getvalue()
+
+    def close(self):
+        """Releases the buffer and deletes the spooled file, if any."""
+        if self._spool_file is not None:
+            self._spool_file.close()
+            Path(self._spool_file.name).unlink(missing_ok=True)
+            self._spool_file = None
+        self._buffer = None
+
 def ingest_documents(file_paths: List[str]) -> List[Dict[str, Union[str, int]]]:
     """
     Ingests a list of document paths and returns processed image data.
-    Uses parallel processing for speed.
+    Files are rasterized in parallel on the shared worker pool.
     """
+    pool = get_pool()
+    futures = [pool.submit(process_file, file_path) for file_path in file_paths]
+
     all_processed_data = []
-    with concurrent.futures.ProcessPoolExecutor() as executor:
-        results = executor.map(process_file, file_paths)
-        
-        for result in results:
-            all_processed_data.extend(result)
-            
+    for future in futures:
+        all_processed_data.extend(future.result())
+
+    return all_processed_data
+
+async def ingest_source_async(source: DocumentSource, filename: str, profile: ImageProfile = DEFAULT_PROFILE) -> List[Dict[str, Union[str, int]]]:
+    """Ingests a document given as bytes or path on the shared worker pool."""
+    pool = get_pool()
+    if isinstance(source, Path):
+        return await pool.run(_process_document, source, filename, profile)
+    return await pool.run(process_bytes, source, filename, profile)
+
+async def ingest_documents_async(file_paths: List[str]) -> List[Dict[str, Union[str, int]]]:
+    """Async variant of ingest_documents for use from the event loop."""
+    pool = get_pool()
+    results = await asyncio.gather(*(pool.run(process_file, file_path) for file_path in file_paths))
+
+    all_processed_data = []
+    for result in results:
+        all_processed_data.extend(result)
+
     return all_processed_data
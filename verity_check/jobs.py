@@ -0,0 +1,114 @@
+"""
+In-process job queue for asynchronous verification checks.
+
+POST /check with asyncMode enqueues a job and returns its ID immediately; a fixed
+number of worker tasks (started in the API lifespan) run the jobs, and
+GET /check/{job_id} reports status and partial results. When the queue is full,
+submit() raises JobQueueFull so the API can answer 429 instead of piling up work.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Job configuration - can be overridden by env vars
+JOB_WORKERS = int(os.getenv("CHECK_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("CHECK_JOB_QUEUE_SIZE", "20"))
+# Finished jobs are kept this long for polling
+JOB_TTL_SECONDS = float(os.getenv("CHECK_JOB_TTL_SECONDS", "3600"))
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the job queue has no free slot."""
+
+
+@dataclass
+class Job:
+    """State of one verification job."""
+    application_id: str
+    run: Callable[["Job"], Awaitable[Any]]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "QUEUED"  # "QUEUED", "RUNNING", "DONE", "FAILED"
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    partial_results: List[Dict[str, Any]] = field(default_factory=list)
+    result: Any = None
+    error: Optional[str] = None
+
+
+class JobManager:
+    """Bounded queue of jobs processed by a fixed number of asyncio worker tasks."""
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE, ttl_seconds: float = JOB_TTL_SECONDS):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.ttl_seconds = ttl_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+
+    def start(self):
+        """Starts the worker tasks on the running event loop."""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancels the workers; running jobs are marked as failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, application_id: str, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Enqueues run(job) and returns the job, or raises JobQueueFull."""
+        if self._queue is None:
+            raise RuntimeError("JobManager is not started")
+        self._prune()
+        job = Job(application_id=application_id, run=run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self.queue_size} waiting jobs)")
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses
+        }
+
+    def _prune(self):
+        """Forgets finished jobs older than ttl_seconds."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "RUNNING"
+            try:
+                job.result = await job.run(job)
+                job.status = "DONE"
+            except asyncio.CancelledError:
+                job.status = "FAILED"
+                job.error = "Cancelled during shutdown"
+                job.finished_at = time.time()
+                raise
+            except Exception as e:
+                job.status = "FAILED"
+                job.error = getattr(e, "detail", None) or str(e)
+            job.finished_at = time.time()
@@ -1,92 +1,266 @@
-import networkx as nx
-from typing import List, Dict, Any
-from datetime import datetime
+import os
+from typing import TYPE_CHECKING, List, Dict, Any, NamedTuple, Optional, Set, Tuple, Union
+from datetime import date
 import uuid
+from verity_check.schemas import ENTITY, NAME, field_kind, record_of
+from verity_check.compact_graph import CompactGraph
 
-def parse_date(date_str: str) -> datetime:
-    """Parses date string YYYY-MM-DD to datetime object."""
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except (ValueError, TypeError):
-        return None
-
-def parse_amount(amount_str: Any) -> float:
-    """Parses currency string to float."""
-    if isinstance(amount_str, (int, float)):
-        return float(amount_str)
-    if isinstance(amount_str, str):
-        # Remove currency symbols and convert comma to dot if needed
-        clean_str = amount_str.replace("€", "").replace("EUR", "").strip()
-        clean_str = clean_str.replace(".", "").replace(",", ".") # German format 1.000,00 -> 1000.00
-        try:
-            return float(clean_str)
-        except ValueError:
-            return 0.0
-    return 0.0
-
-def build_graph(extracted_data_list: List[Dict[str, Any]]) -> nx.DiGraph:
+if TYPE_CHECKING:
+    import networkx as nx
+
+# "networkx" (default) or "compact" (see compact_graph.py)
+GRAPH_BACKEND = os.getenv("GRAPH_BACKEND", "networkx")
+
+# networkx is imported on first graph build, not at startup (see tests/test_import_time.py)
+Graph = Union["nx.DiGraph", CompactGraph]
+
+class FieldIndex:
+    """
+    Secondary index of a knowledge graph, maintained by build_graph next to the nodes:
+    document -> field -> value and field -> [(document, value)], plus the documents'
+    attributes and documents per category. Checks query it instead of scanning the
+    neighbors of every document; every lookup is a dict access.
+    """
+
+    def __init__(self):
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._by_document: Dict[str, Dict[str, Any]] = {}
+        self._by_field: Dict[str, List[Tuple[str, Any]]] = {}
+        self._by_category: Dict[Optional[str], List[str]] = {}
+
+    def add_document(self, doc_id: str, **attributes: Any):
+        if doc_id not in self._documents:
+            self._documents[doc_id] = {}
+            self._by_document[doc_id] = {}
+            self._by_category.setdefault(attributes.get("category"), []).append(doc_id)
+        self._documents[doc_id].update(attributes)
+
+    def add(self, doc_id: str, field: str, value: Any):
+        self._by_document[doc_id][field] = value
+        self._by_field.setdefault(field, []).append((doc_id, value))
+
+    def documents(self, category: Optional[str] = None) -> List[str]:
+        """Document IDs of a category, or of all categories."""
+        if category is None:
+            return list(self._documents)
+        return self._by_category.get(category, [])
+
+    def document(self, doc_id: str) -> Dict[str, Any]:
+        """Attributes of a document (category, filename, duplicate_of)."""
+        return self._documents.get(doc_id, {})
+
+    def filename(self, doc_id: str) -> str:
+        return self._documents.get(doc_id, {}).get("filename", "")
+
+    def value(self, doc_id: str, field: str, default: Any = None) -> Any:
+        """The (typed) value of a field of a document, or default."""
+        return self._by_document.get(doc_id, {}).get(field, default)
+
+    def fields(self, doc_id: str) -> Dict[str, Any]:
+        """All non-null fields of a document."""
+        return self._by_document.get(doc_id, {})
+
+    def field(self, field: str) -> List[Tuple[str, Any]]:
+        """(document, value) of every document that has the field, in build order."""
+        return self._by_field.get(field, [])
+
+
+def field_index(G: Graph, application_id: Optional[str] = None) -> FieldIndex:
+    """
+    Returns the field index of a graph, or of one application of a corpus graph (see
+    build_corpus_graph). Graphs not made by build_graph get one built from their
+    document nodes and field neighbors on first use.
+    """
+    if application_id is not None:
+        return G.graph["field_indexes"][application_id]
+    index = G.graph.get("field_index")
+    if index is None:
+        index = FieldIndex()
+        source = G.to_networkx() if isinstance(G, CompactGraph) else G
+        for doc_id, attributes in source.nodes(data=True):
+            if attributes.get("type") != "Document":
+                continue
+            index.add_document(doc_id, **{k: v for k, v in attributes.items() if k != "type"})
+            for neighbor in source.neighbors(doc_id):
+                node_data = source.nodes[neighbor]
+                if node_data.get("field") is not None:
+                    index.add(doc_id, node_data["field"], node_data.get("value"))
+        G.graph["field_index"] = index
+    return index
+
+class EntityMention(NamedTuple):
+    application_id: Optional[str]
+    document: str
+    field: str
+
+
+class EntityIndex:
+    """
+    Mentions of entities (authorities, institutes, providers, employers, landlords)
+    across the applications of a corpus graph. Entities are keyed case- and
+    whitespace-insensitively, so "Vonovia SE" and "VONOVIA  SE" are one entity.
+    """
+
+    def __init__(self):
+        self._mentions: Dict[str, List[EntityMention]] = {}
+        self._names: Dict[str, str] = {}
+
+    @staticmethod
+    def key(entity: str) -> str:
+        return " ".join(entity.split()).casefold()
+
+    def add(self, entity: str, mention: EntityMention):
+        key = self.key(entity)
+        self._names.setdefault(key, entity)
+        self._mentions.setdefault(key, []).append(mention)
+
+    def lookup(self, entity: str) -> List[EntityMention]:
+        """Every mention of an entity, in build order."""
+        return self._mentions.get(self.key(entity), [])
+
+    def applications(self, entity: str) -> Set[str]:
+        return {mention.application_id for mention in self.lookup(entity)}
+
+    def shared(self, min_applications: int = 2) -> Dict[str, Set[str]]:
+        """Entities mentioned by at least min_applications applications -> their application IDs."""
+        shared = {}
+        for key, mentions in self._mentions.items():
+            applications = {mention.application_id for mention in mentions}
+            if len(applications) >= min_applications:
+                shared[self._names[key]] = applications
+        return shared
+
+
+def entity_index(G: Graph) -> EntityIndex:
+    """Returns the entity index of a corpus graph (see build_corpus_graph)."""
+    return G.graph["entity_index"]
+
+
+def _new_graph(backend: Optional[str]) -> Graph:
+    if (backend or GRAPH_BACKEND) == "compact":
+        return CompactGraph()
+    import networkx as nx
+    return nx.DiGraph()
+
+
+def build_graph(extracted_data_list: List[Dict[str, Any]], backend: Optional[str] = None) -> Graph:
     """
     Constructs a Knowledge Graph from a list of extracted document data.
     Generic implementation that creates nodes for ALL extracted fields.
     
     Args:
-        extracted_data_list: List of dicts, each containing 'data' (JSON from VLM) 
-                             and 'metadata' (filename, category).
+        extracted_data_list: List of dicts, each containing 'data' (JSON from VLM),
+                             'metadata' (filename, category) and optionally 'record'
+                             (typed data, see schemas.normalize_record).
+        backend: "networkx" or "compact"; defaults to GRAPH_BACKEND.
                              
     Returns:
-        networkx.DiGraph representing the knowledge graph.
+        networkx.DiGraph (or CompactGraph) representing the knowledge graph.
+        G.graph["field_index"] holds its FieldIndex (see field_index).
     """
-    G = nx.DiGraph()
-    
+    G = _new_graph(backend)
+    index = FieldIndex()
+    G.graph["field_index"] = index
+    _add_application(G, extracted_data_list, index)
+    return G
+
+
+def build_corpus_graph(applications: Dict[str, List[Dict[str, Any]]], backend: Optional[str] = None) -> Graph:
+    """
+    Constructs one Knowledge Graph of many applications for cross-application analytics
+    (e.g. the same landlord, employer or issuing authority across many applicants).
+
+    Nodes of each application are namespaced with "Application:{id}/"; only entity nodes
+    are shared by all applications. G.graph["entity_index"] holds an EntityIndex of the
+    corpus and G.graph["field_indexes"] the FieldIndex of every application.
+
+    Args:
+        applications: application ID -> extracted data list as passed to build_graph.
+        backend: "networkx" or "compact"; defaults to GRAPH_BACKEND.
+    """
+    G = _new_graph(backend)
+    entities = EntityIndex()
+    field_indexes: Dict[str, FieldIndex] = {}
+    G.graph["entity_index"] = entities
+    G.graph["field_indexes"] = field_indexes
+    for application_id, extracted_data_list in applications.items():
+        field_indexes[application_id] = FieldIndex()
+        _add_application(G, extracted_data_list, field_indexes[application_id], entities, application_id)
+    return G
+
+
+def _add_application(
+    G: Graph,
+    extracted_data_list: List[Dict[str, Any]],
+    index: FieldIndex,
+    entities: Optional[EntityIndex] = None,
+    application_id: Optional[str] = None
+):
+    """
+    Adds the documents of one application to G. Field, date and period nodes belong to
+    one document; name nodes are shared by the documents of the application (to link the
+    same person), entity nodes by all applications in G.
+    """
+    prefix = f"Application:{application_id}/" if application_id is not None else ""
+
     # Central Root Node
-    root_id = "Root:Applicant"
+    root_id = f"{prefix}Root:Applicant"
     G.add_node(root_id, type="Applicant", label="Applicant")
     
     for item in extracted_data_list:
-        doc_data = item.get("data", {})
         metadata = item.get("metadata", {})
         category = metadata.get("category")
         filename = metadata.get("filename")
         
         # Document Node
-        doc_id = f"Document:{filename}"
+        doc_id = f"{prefix}Document:{filename}"
         G.add_node(doc_id, type="Document", category=category, filename=filename)
         G.add_edge(root_id, doc_id, relation="has_document")
+        if application_id is not None:
+            G.add_node(doc_id, application=application_id)
+
+        # Same scan as another document (see dedup.py)
+        duplicate_of = metadata.get("duplicate_of")
+        index.add_document(doc_id, category=category, filename=filename, duplicate_of=duplicate_of)
+        if duplicate_of:
+            G.add_node(doc_id, duplicate_of=duplicate_of)
+            G.add_edge(doc_id, f"{prefix}Document:{duplicate_of}", relation="duplicate_of")
         
-        # Generic field processing - create nodes for ALL fields
-        for field_name, field_value in doc_data.items():
+        # Generic field processing - create nodes for ALL fields of the typed record
+        record = record_of(item)
+        for field_name, field_value in record.items():
             # Skip null/None values
             if field_value is None:
                 continue
+            if not isinstance(field_value, (bool, int, float, date, str)):
+                continue
+            index.add(doc_id, field_name, field_value)
             
-            # Determine field type and create appropriate node
+            # Node type follows the value type and the schema kind of the field
             if isinstance(field_value, bool):
                 # Boolean fields
-                node_id = f"Field:{field_name}:{field_value}"
+                node_id = f"{prefix}Field:{filename}:{field_name}"
                 G.add_node(node_id, type="BooleanField", field=field_name, value=field_value)
                 G.add_edge(doc_id, node_id, relation=f"has_{field_name}")
                 
             elif isinstance(field_value, (int, float)):
                 # Numeric fields (amounts, scores, etc.)
-                node_id = f"Field:{field_name}:{field_value}"
+                node_id = f"{prefix}Field:{filename}:{field_name}"
                 G.add_node(node_id, type="NumericField", field=field_name, value=field_value)
                 G.add_edge(doc_id, node_id, relation=f"has_{field_name}")
+
+            elif isinstance(field_value, date):
+                # Date fields (normalized to datetime.date)
+                node_id = f"{prefix}Date:{filename}:{field_name}"
+                G.add_node(node_id, type="DateField", field=field_name, value=field_value)
+                G.add_edge(doc_id, node_id, relation=f"has_{field_name}")
                 
             elif isinstance(field_value, str):
-                # String fields - categorize by common patterns
-                
-                # Date fields (YYYY-MM-DD or DD.MM.YYYY)
-                if any(date_keyword in field_name.lower() for date_keyword in ['date', 'from', 'until', 'start', 'end']):
-                    parsed_date = parse_date(field_value)
-                    if parsed_date:
-                        node_id = f"Date:{field_name}:{field_value}"
-                        G.add_node(node_id, type="DateField", field=field_name, value=field_value, parsed=parsed_date)
-                        G.add_edge(doc_id, node_id, relation=f"has_{field_name}")
-                        continue
+                kind = field_kind(category, field_name)
                 
                 # Name fields
-                if 'name' in field_name.lower():
-                    node_id = f"Name:{field_value}"
+                if kind == NAME:
+                    node_id = f"{prefix}Name:{field_value}"
                     # Check if this name node already exists (to link same person across docs)
                     if node_id not in G:
                         G.add_node(node_id, type="NameField", field=field_name, value=field_value)
@@ -96,48 +270,44 @@ def build_graph(extracted_data_list: List[Dict[str, Any]]) -> nx.DiGraph:
                         G.add_edge(root_id, node_id, relation="identified_as")
                     continue
                 
-                # Authority/Institution fields
-                if any(keyword in field_name.lower() for keyword in ['authority', 'institute', 'provider', 'landlord']):
+                # Authority/Institution fields (shared across applications)
+                if kind == ENTITY:
                     node_id = f"Entity:{field_value}"
                     if node_id not in G:
                         G.add_node(node_id, type="EntityField", field=field_name, value=field_value)
                     G.add_edge(doc_id, node_id, relation=f"issued_by" if 'authority' in field_name.lower() else f"has_{field_name}")
+                    if entities is not None:
+                        entities.add(field_value, EntityMention(application_id, doc_id, field_name))
                     continue
                 
                 # Generic string field
-                node_id = f"Field:{field_name}:{field_value}"
+                node_id = f"{prefix}Field:{filename}:{field_name}"
                 G.add_node(node_id, type="StringField", field=field_name, value=field_value)
                 G.add_edge(doc_id, node_id, relation=f"has_{field_name}")
         
         # Special handling for date ranges (valid_from + valid_until)
-        if 'valid_from' in doc_data and 'valid_until' in doc_data:
-            valid_from = parse_date(doc_data.get('valid_from'))
-            valid_until = parse_date(doc_data.get('valid_until'))
-            if valid_from and valid_until:
-                period_id = f"Period:{valid_from.date()}_{valid_until.date()}"
-                if period_id not in G:
-                    G.add_node(period_id, type="ValidityPeriod", start=valid_from, end=valid_until)
-                G.add_edge(doc_id, period_id, relation="has_validity_period")
+        valid_from = record.get('valid_from')
+        valid_until = record.get('valid_until')
+        if isinstance(valid_from, date) and isinstance(valid_until, date):
+            period_id = f"{prefix}Period:{filename}"
+            G.add_node(period_id, type="ValidityPeriod", start=valid_from, end=valid_until)
+            G.add_edge(doc_id, period_id, relation="has_validity_period")
         
         # Special handling for funding periods
-        if 'funding_period_start' in doc_data and 'funding_period_end' in doc_data:
-            start = parse_date(doc_data.get('funding_period_start'))
-            end = parse_date(doc_data.get('funding_period_end'))
-            if start and end:
-                period_id = f"FundingPeriod:{start.date()}_{end.date()}"
-                if period_id not in G:
-                    G.add_node(period_id, type="FundingPeriod", start=start, end=end)
-                G.add_edge(doc_id, period_id, relation="has_funding_period")
-
-    return G
+        start = record.get('funding_period_start')
+        end = record.get('funding_period_end')
+        if isinstance(start, date) and isinstance(end, date):
+            period_id = f"{prefix}FundingPeriod:{filename}"
+            G.add_node(period_id, type="FundingPeriod", start=start, end=end)
+            G.add_edge(doc_id, period_id, relation="has_funding_period")
 
 
-def visualize_graph(G: nx.DiGraph, output_file: str = "knowledge_graph.html"):
+def visualize_graph(G: Graph, output_file: str = "knowledge_graph.html"):
     """
     Creates an interactive HTML visualization of the knowledge graph.
     
     Args:
-        G: NetworkX DiGraph to visualize
+        G: NetworkX DiGraph (or CompactGraph, converted first) to visualize
         output_file: Output HTML file path
     """
     try:
@@ -145,6 +315,9 @@ def visualize_graph(G: nx.DiGraph, output_file: str = "knowledge_graph.html"):
     except ImportError:
         print("⚠️ pyvis not installed. Install with: pip install pyvis")
         return
+
+    if isinstance(G, CompactGraph):
+        G = G.to_networkx()
     
     # Create pyvis network
     net = Network(height="900px", width="100%", directed=True, notebook=False)
@@ -1,86 +1,162 @@
 import os
+import re
 import json
+import hashlib
+import time
+import asyncio
 import argparse
-from typing import List
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from pathlib import Path
-import torch
-from verity_check.ingest import ingest_documents
-from verity_check.perception import extract_data
+from verity_check.ingest import ingest_documents, ingest_documents_async
+from verity_check.perception import extract_data, aclose_client
+from verity_check.dedup import DuplicateIndex, perceive_once, unique_pages
 from verity_check.knowledge_graph import build_graph
-from verity_check.consistency_check import run_checks
-import networkx as nx
+from verity_check.consistency_check import evaluate_checks
 from verity_check.knowledge_graph import visualize_graph
+from verity_check.schemas import normalize_record
+from verity_check.reports import JsonlReportWriter, without_record
 
 
-def run_pipeline(input_dir: str, output_file: str = "verification_report.json"):
-    print(f"🚀 Starting VerityGraph Pipeline on {input_dir}...")
-    
-    # 1. Ingest
-    files = [str(p) for p in Path(input_dir).glob("*") if p.is_file()]
-    print(f"📂 Found {len(files)} files.")
-    
-    processed_images = ingest_documents(files)
-    print(f"🖼️  Processed {len(processed_images)} images.")
-    
-    # 2. Perception
-    extracted_data = []
-    for img_data in processed_images:
+# Batch mode: applications validated concurrently (VLM requests stay bounded by VLM_MAX_CONCURRENCY)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+SUMMARY_FILE = "summary.jsonl"
+REPORT_FILE = "verification_report.jsonl"
+
+
+async def perceive_documents(
+    processed_images: List[dict],
+    batch_key: str = "cli",
+    on_document: Optional[Callable[[dict], None]] = None
+) -> List[dict]:
+    """
+    Runs perception on all ingested files concurrently (bounded by VLM_MAX_CONCURRENCY).
+    Duplicate scans are only sent to the VLM once. Results carry their typed record;
+    on_document(result) is called as soon as a document is done. The caller closes
+    the VLM client.
+    """
+    duplicates = DuplicateIndex()
+
+    async def perceive(img_data: dict) -> dict:
         print(f"👁️  Analyzing {img_data['filename']}...")
-        
-        # Pass None for category to trigger auto-categorization
-        # img_data["image_base64"] is now a list of strings
-        result = extract_data(img_data["image_base64"], img_data["filename"])
-        
+        images, fingerprints = unique_pages(img_data["images"], img_data["page_fingerprints"])
+
+        # Auto-categorization, img_data["images"] holds the JPEG bytes of each page.
+        # All files of the input directory belong to one application and may be grouped.
+        result, duplicate_of = await perceive_once(
+            duplicates, fingerprints, img_data["filename"],
+            lambda: extract_data(images, img_data["filename"], batch_key=batch_key)
+        )
+
         category = result["category"]
         data = result["data"]
         print(data)
-        print(f"    -> Categorized as {category}\n\n")
-        
-        extracted_data.append({
+        print(f"    -> Categorized {img_data['filename']} as {category}\n\n")
+
+        item = {
             "data": data,
+            "record": normalize_record(category, data),
             "metadata": {
                 "filename": img_data["filename"],
                 "page": img_data["page_number"],
-                "category": category
+                "pages_skipped": img_data.get("pages_skipped", 0),
+                "category": category,
+                "duplicate_of": duplicate_of
             }
-        })
-    # save extracted data to json
-    with open("extracted_data.json", "w") as f:
-        json.dump(extracted_data, f, indent=2)
-    # Clear GPU cache after processing all documents
-    print("🧹 Clearing cache...")
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-        print("✅ GPU cache cleared")
-
-    with open("extracted_data.json", "r") as f:
-        extracted_data = json.load(f)
-
-    # 3. Build Graph
-    print("🕸️  Building Knowledge Graph...")
+        }
+        if result.get("categorization_failed"):
+            item["metadata"]["categorization_failed"] = True
+        if on_document:
+            on_document(item)
+        return item
+
+    return list(await asyncio.gather(*(perceive(img_data) for img_data in processed_images)))
+
+
+async def _closing_client(coro):
+    try:
+        return await coro
+    finally:
+        await aclose_client()
+
+
+def validate_extractions(
+    extracted_data: List[dict],
+    on_alerts: Optional[Callable[[str, List[dict]], None]] = None
+) -> Tuple[Dict[str, Any], Any]:
+    """
+    Builds the knowledge graph of one application, runs the checks and returns
+    (report, graph). on_alerts is passed to evaluate_checks.
+    """
     G = build_graph(extracted_data)
-    print(f"    Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
-    
-    # Visualize graph
-    visualize_graph(G, "knowledge_graph.html")
-    
-    # 4. Consistency Checks
-    print("⚖️  Running Consistency Checks...")
-    alerts = run_checks(G)
-    
-    # 5. Report
+    alerts, check_timings = evaluate_checks(G, on_alerts=on_alerts)
     report = {
-        "extracted_data": extracted_data,
+        "extracted_data": [without_record(item) for item in extracted_data],
         "graph_stats": {
             "nodes": G.number_of_nodes(),
             "edges": G.number_of_edges()
         },
         "alerts": alerts,
+        "check_timings": check_timings,
         "status": "FAIL" if alerts else "PASS"
     }
+    return report, G
+
+
+def run_pipeline(input_dir: str, output_file: str = "verification_report.json", extracted_file: Optional[str] = None):
+    """
+    Validates the documents of one application in input_dir. Perception results are
+    handed to the graph in memory; extracted_file optionally persists them. An
+    output_file ending in .jsonl is written as a streaming report (see reports.py),
+    anything else as one JSON report.
+    """
+    print(f"🚀 Starting VerityGraph Pipeline on {input_dir}...")
+    with ExitStack() as stack:
+        # Closed (and flushed) even if a step fails, so the report is never left half-written
+        writer = stack.enter_context(JsonlReportWriter(output_file)) if output_file.endswith(".jsonl") else None
     
-    with open(output_file, "w") as f:
-        json.dump(report, f, indent=2, default=str)
+        # 1. Ingest
+        files = [str(p) for p in Path(input_dir).glob("*") if p.is_file()]
+        print(f"📂 Found {len(files)} files.")
+    
+        processed_images = ingest_documents(files)
+        print(f"🖼️  Processed {len(processed_images)} images.")
+    
+        # 2. Perception
+        extracted_data = asyncio.run(_closing_client(
+            perceive_documents(processed_images, on_document=writer.document if writer else None)
+        ))
+
+        # Optionally persist the perception results; the graph is built from memory
+        if extracted_file:
+            with open(extracted_file, "w") as f:
+                json.dump([without_record(item) for item in extracted_data], f, indent=2)
+        # Clear GPU cache after processing all documents. torch is optional (the VLM runs in
+        # the vLLM server) and imported here: batch mode never clears the GPU cache
+        try:
+            import torch
+        except ImportError:
+            torch = None
+        if torch is not None and torch.cuda.is_available():
+            print("🧹 Clearing cache...")
+            torch.cuda.empty_cache()
+            print("✅ GPU cache cleared")
+
+        # 3. Build Graph + 4. Consistency Checks
+        print("🕸️  Building Knowledge Graph and running Consistency Checks...")
+        report, G = validate_extractions(extracted_data, on_alerts=writer.alerts if writer else None)
+        alerts = report["alerts"]
+        print(f"    Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
+    
+        # Visualize graph
+        visualize_graph(G, "knowledge_graph.html")
+    
+        # 5. Report
+        if writer:
+            writer.summary(report)
+        else:
+            with open(output_file, "w") as f:
+                json.dump(report, f, indent=2, default=str)
         
     print(f"🏁 Done! Report saved to {output_file}")
     if alerts:
@@ -92,9 +168,170 @@ def run_pipeline(input_dir: str, output_file: str = "verification_report.json"):
     else:
         print("✅ Verification Passed!")
 
+
+# ========== BATCH MODE ==========
+def discover_applications(root_dir: Optional[str] = None, manifest: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Returns application ID -> document paths, either one application per sub-folder of
+    root_dir (named after the folder) or from a JSONL manifest with one
+    {"application_id": ..., "input_dir": ...} or {"application_id": ..., "files": [...]}
+    per line (relative paths are resolved against the manifest's folder).
+    """
+    applications: Dict[str, List[str]] = {}
+    if root_dir:
+        for folder in sorted(p for p in Path(root_dir).iterdir() if p.is_dir()):
+            applications[folder.name] = sorted(str(p) for p in folder.glob("*") if p.is_file())
+    if manifest:
+        base = Path(manifest).parent
+        with open(manifest, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "files" in entry:
+                    files = [str(base / path) for path in entry["files"]]
+                else:
+                    files = sorted(str(p) for p in (base / entry["input_dir"]).glob("*") if p.is_file())
+                applications[str(entry["application_id"])] = files
+    return applications
+
+
+def completed_applications(summary_path: Path) -> Set[str]:
+    """
+    Application IDs with a PASS/FAIL entry in the summary JSONL, which doubles as the
+    checkpoint: a resumed batch skips them and retries the ones that errored. A line cut
+    off by a crash is ignored.
+    """
+    status: Dict[str, str] = {}
+    if summary_path.exists():
+        with open(summary_path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                status[entry["application_id"]] = entry["status"]
+    return {application_id for application_id, s in status.items() if s != "ERROR"}
+
+
+def report_folder(application_id: str) -> str:
+    """
+    Folder name of an application's report: the ID with unsafe characters replaced, plus
+    a short hash of the raw ID so that e.g. "a/b" and "a_b" don't share a folder.
+    """
+    if not application_id.strip("."):
+        raise ValueError(f"Invalid application ID: {application_id!r}")
+    safe = re.sub(r"[^\w.-]", "_", application_id)
+    digest = hashlib.sha1(application_id.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}-{digest}"
+
+
+async def validate_application(application_id: str, files: List[str], report_path: Path) -> Dict[str, Any]:
+    """
+    Ingests, perceives and validates one application, streaming its report to
+    report_path (JSONL) as documents and checks finish; returns the report.
+    """
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with JsonlReportWriter(str(report_path), application_id) as writer:
+        processed_images = await ingest_documents_async(files)
+        extracted_data = await perceive_documents(processed_images, application_id, writer.document)
+        # A VLM outage must not turn into a FAIL verdict that the checkpoint then skips
+        failed = [
+            item["metadata"]["filename"] for item in extracted_data
+            if "error" in item["data"] or item["metadata"].get("categorization_failed")
+        ]
+        if failed:
+            raise RuntimeError(f"Perception failed for {', '.join(failed)}")
+        # Graph and checks are CPU work: off the event loop, other applications keep streaming
+        report, _ = await asyncio.to_thread(validate_extractions, extracted_data, writer.alerts)
+        writer.summary(report)
+    return report
+
+
+async def run_batch(
+    applications: Dict[str, List[str]],
+    output_dir: str,
+    concurrency: int = BATCH_CONCURRENCY
+) -> Dict[str, Any]:
+    """
+    Validates many applications, at most `concurrency` at a time, all sharing the VLM
+    client and its VLM_MAX_CONCURRENCY limit. Every application streams its report to
+    output_dir/<report_folder(application_id)>/verification_report.jsonl (see reports.py),
+    and every finished one gets a line in output_dir/summary.jsonl (the resume checkpoint).
+    Applications whose perception failed are recorded as ERROR and retried on resume.
+    Returns the batch statistics.
+    """
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    summary_path = out / SUMMARY_FILE
+    done = completed_applications(summary_path)
+    pending = {k: v for k, v in applications.items() if k not in done}
+    print(f"📦 {len(applications)} applications: {len(done & set(applications))} already validated, {len(pending)} to go")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"PASS": 0, "FAIL": 0, "ERROR": 0}
+    start = time.perf_counter()
+
+    with open(summary_path, "a") as summary:
+        if summary.tell() and summary_path.read_bytes()[-1:] != b"\n":
+            summary.write("\n")  # after a line cut off by a crash
+
+        async def validate(application_id: str, files: List[str]):
+            async with semaphore:
+                started = time.perf_counter()
+                entry: Dict[str, Any] = {"application_id": application_id}
+                try:
+                    report_path = out / report_folder(application_id) / REPORT_FILE
+                    report = await validate_application(application_id, files, report_path)
+                    entry.update({
+                        "status": report["status"],
+                        "documents": len(report["extracted_data"]),
+                        "alerts": len(report["alerts"]),
+                        "checks_failed": sorted({a["check"] for a in report["alerts"]}),
+                        "report": str(report_path)
+                    })
+                except Exception as e:
+                    entry.update({"status": "ERROR", "error": str(e)})
+                entry["seconds"] = round(time.perf_counter() - started, 3)
+                summary.write(json.dumps(entry) + "\n")
+                summary.flush()
+                os.fsync(summary.fileno())
+                counts[entry["status"]] += 1
+                icon = {"PASS": "✅", "FAIL": "⚠️ ", "ERROR": "❌"}[entry["status"]]
+                print(f"    {icon} {application_id}: {entry['status']} ({entry['seconds']:.1f}s)")
+
+        try:
+            await asyncio.gather(*(validate(k, v) for k, v in pending.items()))
+        finally:
+            await aclose_client()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "validated": len(pending),
+        "skipped": len(applications) - len(pending),
+        **counts,
+        "seconds": round(seconds, 3),
+        "applications_per_hour": round(len(pending) / seconds * 3600, 1) if pending and seconds > 0 else 0.0
+    }
+    print(
+        f"🏁 Batch done: {stats['PASS']} passed, {stats['FAIL']} failed, {stats['ERROR']} errors "
+        f"in {seconds:.1f}s ({stats['applications_per_hour']} applications/hour). Summary: {summary_path}"
+    )
+    return stats
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--input_dir", help="Directory containing input documents")
+    parser.add_argument("--output_file", default="verification_report.json", help="Report file (.jsonl: streamed)")
+    parser.add_argument("--extracted_file", help="Also save the perception results to this JSON file")
+    parser.add_argument("--batch_root", help="Batch mode: directory with one sub-folder per application")
+    parser.add_argument("--manifest", help="Batch mode: JSONL manifest of applications")
+    parser.add_argument("--output_dir", default="batch_reports", help="Batch mode: reports, summary.jsonl and checkpoint")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="Batch mode: applications in flight")
     args = parser.parse_args()
     
-    run_pipeline(args.input_dir)
+    if args.batch_root or args.manifest:
+        applications = discover_applications(args.batch_root, args.manifest)
+        asyncio.run(run_batch(applications, args.output_dir, args.concurrency))
+    else:
+        run_pipeline(args.input_dir, args.output_file, args.extracted_file)
@@ -0,0 +1,162 @@
+"""
+Person name matching for the name consistency check.
+
+Names are normalized once and cached: case and Unicode folding with German
+transliteration (ü -> ue, ß -> ss, accents dropped), MRZ filler characters and
+punctuation treated as separators, honorifics removed and tokens sorted, so
+"Frau Jürgens, Anna", "ANNA JUERGENS" and "JUERGENS<<ANNA" are the same name.
+Similarity is the normalized Indel (LCS) ratio of two normalized names, like
+difflib's ratio but exact. similarity_matrix() computes all pairs of distinct
+names in one pass with a bit-parallel LCS kernel: rapidfuzz's cdist if rapidfuzz is
+installed, else the same kernel vectorized over blocks of name pairs with numpy,
+else in pure Python with character masks built once per name.
+"""
+
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+try:
+    from rapidfuzz import fuzz as _fuzz, process as _process
+except ImportError:
+    _process = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Names less similar than this are reported as mismatches
+NAME_MATCH_THRESHOLD = float(os.getenv("NAME_MATCH_THRESHOLD", "0.9"))
+
+_TRANSLITERATION = str.maketrans({
+    "ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss", "æ": "ae", "ø": "oe", "œ": "oe", "ł": "l", "đ": "d", "ı": "i"
+})
+_SEPARATORS = re.compile(r"[\s<,.;:()'\"-]+")
+_HONORIFICS = {"frau", "herr", "fr", "hr", "mr", "mrs", "ms", "dr", "prof"}
+# cdist only starts worker threads from this many names on; below, their start-up
+# costs more than the whole matrix (a check typically sees fewer than 20 names)
+_PARALLEL_MIN_NAMES = 128
+# The numpy kernel pays off from about this many names (below, array set-up dominates).
+# It keeps a name's bit row in one uint64, so names must be shorter than 64 characters,
+# and computes about _NUMPY_BLOCK_PAIRS pairs per block
+_NUMPY_MIN_NAMES = 16
+_NUMPY_MAX_LENGTH = 63
+_NUMPY_BLOCK_PAIRS = 1 << 20
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(name: str) -> str:
+    """Folded, transliterated, honorific-free name with its tokens sorted."""
+    folded = name.casefold().translate(_TRANSLITERATION)
+    folded = "".join(c for c in unicodedata.normalize("NFKD", folded) if not unicodedata.combining(c))
+    tokens = [token for token in _SEPARATORS.split(folded) if token and token not in _HONORIFICS]
+    return " ".join(sorted(tokens))
+
+
+def _char_masks(text: str) -> Dict[str, int]:
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def _lcs_length(masks: Dict[str, int], length: int, other: str) -> int:
+    """Length of the longest common subsequence (bit-parallel, one big-int step per character of other)."""
+    full = (1 << length) - 1
+    row = full
+    for char in other:
+        matches = row & masks.get(char, 0)
+        row = ((row + matches) | (row - matches)) & full
+    return length - bin(row).count("1")
+
+
+def ratio(a: str, b: str) -> float:
+    """Indel similarity in [0, 1]: 2 * LCS / (len(a) + len(b)); 0 if either is empty."""
+    if not a or not b:
+        return 0.0
+    return 2 * _lcs_length(_char_masks(a), len(a), b) / (len(a) + len(b))
+
+
+def _numpy_similarity_matrix(names: List[str]) -> List[List[float]]:
+    """
+    similarity_matrix() with the bit-parallel LCS kernel run for a block of rows against
+    all names at once: masks[i, c] holds the positions of character c in name i, and
+    each step advances the bit rows of every pair by one character of the column name.
+    """
+    alphabet = {char: code for code, char in enumerate(sorted(set("".join(names))), 1)}
+    lengths = np.array([len(name) for name in names], dtype=np.int64)
+    masks = np.zeros((len(names), len(alphabet) + 1), dtype=np.uint64)
+    # Column names as character codes, padded with 0 (no positions, leaves rows unchanged)
+    chars = np.zeros((len(names), max(1, int(lengths.max()))), dtype=np.intp)
+    for i, name in enumerate(names):
+        for position, char in enumerate(name):
+            masks[i, alphabet[char]] |= np.uint64(1 << position)
+            chars[i, position] = alphabet[char]
+    full = (np.uint64(1) << lengths.astype(np.uint64)) - np.uint64(1)
+    totals = lengths[:, None] + lengths[None, :]
+
+    matrix = np.empty((len(names), len(names)))
+    block = max(1, _NUMPY_BLOCK_PAIRS // len(names))
+    for start in range(0, len(names), block):
+        stop = min(len(names), start + block)
+        block_masks, block_full = masks[start:stop], full[start:stop, None]
+        rows = np.repeat(block_full, len(names), axis=1)
+        for position in range(chars.shape[1]):
+            matches = rows & block_masks[:, chars[:, position]]
+            rows = ((rows + matches) | (rows - matches)) & block_full
+        lcs = lengths[start:stop, None] - np.bitwise_count(rows).astype(np.int64)
+        block_totals = totals[start:stop]
+        matrix[start:stop] = np.where(block_totals > 0, 2 * lcs / np.maximum(block_totals, 1), 0.0)
+    return matrix.tolist()
+
+
+def similarity_matrix(names: List[str]) -> List[List[float]]:
+    """Pairwise ratio() of names (use distinct, normalized names); the diagonal is 1 for non-empty names."""
+    if _process is not None:
+        workers = -1 if len(names) >= _PARALLEL_MIN_NAMES else 1
+        scores = _process.cdist(names, names, scorer=_fuzz.ratio, workers=workers)
+        matrix = [[score / 100 for score in row] for row in scores.tolist()]
+        for i, name in enumerate(names):
+            if not name:
+                matrix[i] = [0.0] * len(names)
+                for row in matrix:
+                    row[i] = 0.0
+        return matrix
+
+    if np is not None and len(names) >= _NUMPY_MIN_NAMES and max(map(len, names)) <= _NUMPY_MAX_LENGTH:
+        return _numpy_similarity_matrix(names)
+
+    masks = [_char_masks(name) for name in names]
+    matrix = [[0.0] * len(names) for _ in names]
+    for i, a in enumerate(names):
+        if not a:
+            continue
+        matrix[i][i] = 1.0
+        for j in range(i + 1, len(names)):
+            b = names[j]
+            if b:
+                matrix[i][j] = matrix[j][i] = 2 * _lcs_length(masks[i], len(a), b) / (len(a) + len(b))
+    return matrix
+
+
+def mismatched_pairs(names: List[str], threshold: float = NAME_MATCH_THRESHOLD) -> List[Tuple[int, int, float]]:
+    """
+    (i, j, similarity) for every pair i < j of names whose normalized forms are less
+    similar than threshold. Similarities are computed once per pair of distinct forms.
+    """
+    normalized = [normalize_name(name) for name in names]
+    distinct = list(dict.fromkeys(normalized))
+    position = {name: k for k, name in enumerate(distinct)}
+    matrix = similarity_matrix(distinct)
+    rows = [matrix[position[name]] for name in normalized]
+    columns = [position[name] for name in normalized]
+    pairs = []
+    for i, row in enumerate(rows):
+        for j in range(i + 1, len(names)):
+            similarity = row[columns[j]]
+            if similarity < threshold:
+                pairs.append((i, j, similarity))
+    return pairs
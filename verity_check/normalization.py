@@ -0,0 +1,127 @@
+"""
+Date and amount parsing shared by schemas, knowledge_graph and consistency_check.
+
+VLM output repeats the same few strings across the fields, documents and checks of an
+application (and across applications), so both parsers are memoized. Dates are matched
+by one compiled alternation whose matching branch selects the format: ISO (optionally
+with a time), German DD.MM.YYYY, MRZ YYMMDD and textual months ("14. März 2021",
+"14 MAR 2021", "March 14, 2021"). Invalid calendar dates and unknown formats yield None;
+nothing on the parse path raises.
+"""
+
+import os
+import re
+from calendar import isleap
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Optional
+
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "65536"))
+
+# Two-digit MRZ years up to this value are 20YY, above it 19YY. Expiry and issue dates
+# reach ~10 years ahead; birth dates are never in the future, so they pivot at this year
+MRZ_CENTURY_PIVOT = (date.today().year + 20) % 100
+MRZ_BIRTH_CENTURY_PIVOT = date.today().year % 100
+
+_MONTHS = {
+    "januar": 1, "january": 1, "jan": 1, "jänner": 1,
+    "februar": 2, "february": 2, "feb": 2,
+    "märz": 3, "maerz": 3, "march": 3, "mär": 3, "mar": 3, "mrz": 3,
+    "april": 4, "apr": 4,
+    "mai": 5, "may": 5,
+    "juni": 6, "june": 6, "jun": 6,
+    "juli": 7, "july": 7, "jul": 7,
+    "august": 8, "aug": 8,
+    "september": 9, "sep": 9, "sept": 9,
+    "oktober": 10, "october": 10, "okt": 10, "oct": 10,
+    "november": 11, "nov": 11,
+    "dezember": 12, "december": 12, "dez": 12, "dec": 12,
+}
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+_DATE = re.compile(r"""
+    (?P<iso>(?P<iso_y>\d{4})-(?P<iso_m>\d{2})-(?P<iso_d>\d{2}))(?:[T\s].*)?
+  | (?P<german>(?P<de_d>\d{1,2})\.(?P<de_m>\d{1,2})\.(?P<de_y>\d{4}))
+  | (?P<mrz>(?P<mrz_y>\d{2})(?P<mrz_m>\d{2})(?P<mrz_d>\d{2}))
+  | (?P<day_month>(?P<dm_d>\d{1,2})\.?\s*(?P<dm_m>[^\W\d_]+)\.?,?\s*(?P<dm_y>\d{4}))
+  | (?P<month_day>(?P<md_m>[^\W\d_]+)\.?\s+(?P<md_d>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<md_y>\d{4}))
+""", re.VERBOSE)
+
+_CURRENCY = re.compile(r"€|euro?|\s", re.IGNORECASE)
+_AMOUNT = re.compile(r"-?\d[\d.,]*")
+_DECIMALS = re.compile(r"[.,](\d*)$")
+
+
+def _valid_date(year: int, month: int, day: int) -> Optional[date]:
+    if year < 1 or not 1 <= month <= 12:
+        return None
+    last_day = 29 if month == 2 and isleap(year) else _DAYS_IN_MONTH[month]
+    return date(year, month, day) if 1 <= day <= last_day else None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_date(text: str, birth: bool = False) -> Optional[date]:
+    """
+    Parses one date in any of the supported formats (see module docstring); None otherwise.
+    With birth=True, two-digit MRZ years resolve to the most recent past year.
+    """
+    match = _DATE.fullmatch(text)
+    if not match:
+        return None
+    kind = match.lastgroup
+    if kind == "iso":
+        return _valid_date(int(match["iso_y"]), int(match["iso_m"]), int(match["iso_d"]))
+    if kind == "german":
+        return _valid_date(int(match["de_y"]), int(match["de_m"]), int(match["de_d"]))
+    if kind == "mrz":
+        year = int(match["mrz_y"])
+        year += 2000 if year <= (MRZ_BIRTH_CENTURY_PIVOT if birth else MRZ_CENTURY_PIVOT) else 1900
+        parsed = _valid_date(year, int(match["mrz_m"]), int(match["mrz_d"]))
+        if birth and parsed and parsed > date.today():
+            parsed = _valid_date(year - 100, parsed.month, parsed.day)
+        return parsed
+    if kind == "day_month":
+        month = _MONTHS.get(match["dm_m"].lower())
+        return _valid_date(int(match["dm_y"]), month, int(match["dm_d"])) if month else None
+    month = _MONTHS.get(match["md_m"].lower())
+    return _valid_date(int(match["md_y"]), month, int(match["md_d"])) if month else None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Parses a single amount with optional currency: "2100.5", "2.100,50 €", "1,234.56 EUR".
+    The last separator is the decimal point unless exactly three digits follow it
+    (then all separators group thousands). Returns None if text is not one amount.
+    """
+    clean = _CURRENCY.sub("", text)
+    if not _AMOUNT.fullmatch(clean):
+        return None
+    decimals = _DECIMALS.search(clean)
+    if decimals and len(decimals.group(1)) != 3:
+        integer, fraction = clean[:decimals.start()], decimals.group(1)
+    else:
+        integer, fraction = clean, ""
+    return float(f"{integer.replace('.', '').replace(',', '')}.{fraction or 0}")
+
+
+def as_date(value: Any, birth: bool = False) -> Optional[date]:
+    """The date of a typed or raw field value (date, datetime or string); None if it has none."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return parse_date(value.strip(), birth)
+    return None
+
+
+def as_amount(value: Any) -> Optional[float]:
+    """The amount of a typed or raw field value (number or string); None if it has none."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return parse_amount(value.strip())
+    return None
@@ -0,0 +1,204 @@
+"""
+Packing of page images into VLM requests.
+
+Instead of truncating documents to a fixed page count, page images are packed into as
+few requests as the model's context allows: image tokens are estimated from the page
+resolution (Qwen2-VL turns every 28x28 pixel patch into one token), large documents are
+split into several requests whose JSON results are merged, and small documents of the
+same application and category are grouped into one request by PageBatcher.
+"""
+
+import io
+import os
+import asyncio
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from PIL import Image
+
+from verity_check.ingest import (
+    MAX_IMAGE_SIZE, MAX_PAGES, DEFAULT_PROFILE, DocumentSource, ImageProfile,
+    pdf_info, pdf_page_points, pdf_render_dpi
+)
+
+# Packing configuration - can be overridden by env vars
+VLM_MAX_MODEL_LEN = int(os.getenv("VLM_MAX_MODEL_LEN", "32768"))
+VLM_MAX_IMAGES_PER_REQUEST = int(os.getenv("VLM_MAX_IMAGES_PER_REQUEST", "5"))
+VLM_PATCH_SIZE = int(os.getenv("VLM_PATCH_SIZE", "28"))
+VLM_MIN_PIXELS = int(os.getenv("VLM_MIN_PIXELS", str(4 * 28 * 28)))
+VLM_MAX_PIXELS = int(os.getenv("VLM_MAX_PIXELS", str(16384 * 28 * 28)))
+# How long a small document waits for others of its group before being sent alone
+VLM_BATCH_WINDOW = float(os.getenv("VLM_BATCH_WINDOW", "0.25"))
+# Conservative for the German prompts; only used for budgeting
+CHARS_PER_TOKEN = 3
+
+
+def image_size(image_bytes: bytes) -> Optional[Tuple[int, int]]:
+    """Returns (width, height) of an encoded image (only its header is parsed), or None if it can't be read."""
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return image.size
+    except (ValueError, OSError):
+        return None
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """
+    Estimates the visual tokens of one image the way Qwen2-VL resizes it: both sides are
+    rounded to multiples of the patch size, the pixel count is clamped to
+    [VLM_MIN_PIXELS, VLM_MAX_PIXELS], and every patch is one token (+2 for the
+    vision start/end tokens).
+    """
+    pixels = max(1, width) * max(1, height)
+    scale = 1.0
+    if pixels > VLM_MAX_PIXELS:
+        scale = (VLM_MAX_PIXELS / pixels) ** 0.5
+    elif pixels < VLM_MIN_PIXELS:
+        scale = (VLM_MIN_PIXELS / pixels) ** 0.5
+    patches_w = max(1, round(width * scale / VLM_PATCH_SIZE))
+    patches_h = max(1, round(height * scale / VLM_PATCH_SIZE))
+    return patches_w * patches_h + 2
+
+
+def estimate_page_tokens(images: List[bytes]) -> List[int]:
+    """Estimates the tokens of each page; unreadable images count as a full-size square page."""
+    tokens = []
+    for image_bytes in images:
+        size = image_size(image_bytes) or (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE)
+        tokens.append(estimate_image_tokens(*size))
+    return tokens
+
+
+def estimate_document_tokens(source: DocumentSource, filename: str, profile: ImageProfile = DEFAULT_PROFILE) -> Dict[str, Any]:
+    """
+    Dry run: estimates the image tokens a document costs with a profile from its page
+    sizes alone, without rendering pages or calling the VLM. PDF pages are assumed to
+    share the size of the first page.
+
+    Returns:
+        Dictionary with pages (rendered pages), page_size (pixels per page) and image_tokens.
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".pdf":
+        info = pdf_info(source)
+        pages = min(int(info.get("Pages", 0)), MAX_PAGES)
+        points = pdf_page_points(info.get("Page size"))
+        dpi = pdf_render_dpi(info.get("Page size"), profile.max_size)
+        size = (round(points[0] / 72 * dpi), round(points[1] / 72 * dpi)) if points else (profile.max_size, profile.max_size)
+    else:
+        with Image.open(source if isinstance(source, Path) else io.BytesIO(source)) as image:
+            size = image.size
+        pages = 1
+        if max(size) > profile.max_size:
+            ratio = profile.max_size / max(size)
+            size = (int(size[0] * ratio), int(size[1] * ratio))
+    return {"pages": pages, "page_size": size, "image_tokens": pages * estimate_image_tokens(*size)}
+
+
+def estimate_text_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def request_budget(prompt: str, max_tokens: int) -> int:
+    """Returns the tokens left for images in a request with this prompt and output limit."""
+    return VLM_MAX_MODEL_LEN - estimate_text_tokens(prompt) - max_tokens
+
+
+def pack_pages(page_tokens: List[int], budget: int, max_images: int = VLM_MAX_IMAGES_PER_REQUEST) -> List[List[int]]:
+    """
+    Splits consecutive pages into chunks of at most max_images pages and budget tokens.
+    Returns lists of page indices; a single page above the budget gets a chunk of its own.
+    """
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for index, tokens in enumerate(page_tokens):
+        if current and (len(current) >= max_images or used + tokens > budget):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def merge_extractions(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merges the JSON results of the chunks of one document: for every field the first
+    non-null value wins. Failed chunks are ignored unless all of them failed.
+    """
+    valid = [part for part in parts if "error" not in part]
+    if not valid:
+        return parts[0] if parts else {}
+    merged: Dict[str, Any] = {}
+    for part in valid:
+        for key, value in part.items():
+            if merged.get(key) is None:
+                merged[key] = value
+    return merged
+
+
+@dataclass
+class _Group:
+    items: List[Any] = field(default_factory=list)
+    futures: List[asyncio.Future] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class PageBatcher:
+    """
+    Groups items submitted under the same key within a short window.
+
+    fits(items) decides whether a group may grow to the given items; a group that
+    would no longer fit is flushed first. flush(items) receives the group and returns
+    one result per item, which submit() hands back to the respective caller.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[List[Any]]],
+        fits: Callable[[List[Any]], bool],
+        window: float = VLM_BATCH_WINDOW
+    ):
+        self._flush = flush
+        self._fits = fits
+        self.window = window
+        self._groups: Dict[Hashable, _Group] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        group = self._groups.get(key)
+        if group is not None and not self._fits(group.items + [item]):
+            self._start_flush(key, group)
+            group = None
+        if group is None:
+            group = _Group()
+            group.timer = loop.call_later(self.window, self._start_flush, key, group)
+            self._groups[key] = group
+        future = loop.create_future()
+        group.items.append(item)
+        group.futures.append(future)
+        return await future
+
+    def _start_flush(self, key: Hashable, group: _Group):
+        if self._groups.get(key) is not group:
+            return
+        del self._groups[key]
+        group.timer.cancel()
+        task = asyncio.ensure_future(self._run(group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, group: _Group):
+        try:
+            results = await self._flush(group.items)
+        except Exception as e:
+            for future in group.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(group.futures, results):
+            if not future.done():
+                future.set_result(result)
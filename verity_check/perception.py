@@ -1,35 +1,330 @@
 import json
-import requests
+import base64
+import httpx
+import asyncio
+import random
 import os
 from typing import Dict, Any, Optional, List
 import re
-from prompt import CATEGORIZATION_PROMPT, PROMPTS
+from verity_check.prompt import CATEGORIZATION_PROMPT, COMBINED_PROMPT, GROUPED_PROMPT, PROMPTS
+from verity_check.perception_cache import get_cache, hash_pages, make_key
+from verity_check.packing import (
+    PageBatcher, estimate_page_tokens, estimate_text_tokens, request_budget, pack_pages,
+    merge_extractions, VLM_MAX_IMAGES_PER_REQUEST, VLM_MAX_MODEL_LEN
+)
 # Default vLLM endpoint - can be overridden by env var
 VLLM_API_URL = os.getenv("VLLM_API_URL", "http://localhost:8000/v1/chat/completions")
 MODEL_NAME = os.getenv("VLLM_MODEL_NAME", "Qwen/Qwen2-VL-7B-Instruct")
 
-def categorize_document(image_content_blocks: List[Dict[str, Any]], doc_name: str) -> str:
-    """Categorizes the document using the VLM."""
+# VLM client configuration - can be overridden by env vars
+VLM_MAX_CONCURRENCY = int(os.getenv("VLM_MAX_CONCURRENCY", "8"))
+VLM_TIMEOUT = float(os.getenv("VLM_TIMEOUT", "180"))
+VLM_CONNECT_TIMEOUT = float(os.getenv("VLM_CONNECT_TIMEOUT", "10"))
+VLM_MAX_RETRIES = int(os.getenv("VLM_MAX_RETRIES", "4"))
+VLM_BACKOFF_BASE = float(os.getenv("VLM_BACKOFF_BASE", "0.5"))
+VLM_BACKOFF_MAX = float(os.getenv("VLM_BACKOFF_MAX", "30"))
+VLM_HTTP2 = os.getenv("VLM_HTTP2", "0") == "1"
+RETRY_STATUS_CODES = {429, 503}
+# Stream extractions and stop generating once the first JSON object is complete. Off by
+# default: stopping early closes the HTTP/1.1 connection instead of returning it to the
+# pool, so every early stop costs a new connection. Only worth it when models tend to
+# keep generating after the object (saved decode time > one connection setup).
+VLM_STREAM = os.getenv("VLM_STREAM", "0") == "1"
+# Ask the server to constrain extractions to a JSON schema built from the prompt's fields
+# (OpenAI-style response_format; needs a server with guided decoding, e.g. vLLM)
+VLM_GUIDED_JSON = os.getenv("VLM_GUIDED_JSON", "0") == "1"
+# Extract small documents of one application and category together in one request
+# (see _extract_group). Off by default: the grouped prompt is a different extraction path.
+VLM_GROUP_DOCUMENTS = os.getenv("VLM_GROUP_DOCUMENTS", "0") == "1"
+
+# "two_step" (categorize, then extract) or "combined" (one round trip, two-step fallback)
+PERCEPTION_MODE = os.getenv("VLM_PERCEPTION_MODE", "two_step")
+
+# Submitted document types (broker types and Application columns) whose category is known
+# up front, so no categorization call is needed. VLM_DOC_TYPE_CATEGORIES (JSON object)
+# adds or overrides entries; mapping a type to null forces VLM categorization for it.
+DEFAULT_DOC_TYPE_CATEGORIES = {
+    "passport": "Identity",
+    "pass": "Identity",
+    "residence_permit_1": "Identity",
+    "residence_permit_2": "Identity",
+    "residence_permit_3": "Identity",
+    "aufenthaltstitel1": "Identity",
+    "aufenthaltstitel2": "Identity",
+    "aufenthaltstitel3": "Identity",
+    "salary_slip": "Livelihood",
+    "einkommensnachweise": "Livelihood",
+    "rent_contract": "Livelihood",
+    "mietvertrag": "Livelihood",
+    "language_certificate": "Integration",
+    "sprachzertifikat": "Integration",
+    "naturalization_test": "Integration",
+    "einbürgerungstest": "Integration",
+}
+
+def _load_doc_type_categories() -> Dict[str, Optional[str]]:
+    mapping = dict(DEFAULT_DOC_TYPE_CATEGORIES)
+    override = os.getenv("VLM_DOC_TYPE_CATEGORIES")
+    if override:
+        try:
+            mapping.update({k.lower(): v for k, v in json.loads(override).items()})
+        except (ValueError, AttributeError) as e:
+            print(f"⚠️ Ignoring invalid VLM_DOC_TYPE_CATEGORIES: {e}")
+    return mapping
+
+DOC_TYPE_CATEGORIES = _load_doc_type_categories()
+
+# Output token limit of one extraction (per document in grouped requests)
+EXTRACTION_MAX_TOKENS = 1024
+
+# Field lines of the extraction prompts, e.g. '- "monthly_amount": float.'
+_FIELD_LINE = re.compile(r'^\s*- "(\w+)":\s*(.*)$', re.MULTILINE)
+
+def _field_types(description: str) -> List[str]:
+    if description.startswith("float"):
+        return ["number", "null"]
+    if description.startswith("boolean"):
+        return ["boolean", "null"]
+    if description.startswith(("YYYY-MM-DD", "String", '"')):
+        return ["string", "null"]
+    # Amounts and scores described in prose may come back as numbers or text
+    return ["string", "number", "null"]
+
+def extraction_schema(category: str) -> Dict[str, Any]:
+    """
+    JSON schema of the extraction for a category, derived from the fields listed in
+    its prompt. All fields are optional and nullable, like the prompts describe them.
+    """
+    properties: Dict[str, Any] = {}
+    for name, description in _FIELD_LINE.findall(PROMPTS[category]):
+        properties.setdefault(name, {"type": _field_types(description.strip())})
+    return {"type": "object", "properties": properties}
+
+def _extraction_options(category: str) -> Dict[str, Any]:
+    """Extra request fields of an extraction: streaming and/or guided JSON, per VLM_STREAM and VLM_GUIDED_JSON."""
+    options: Dict[str, Any] = {}
+    if VLM_STREAM:
+        options["stream"] = True
+    if VLM_GUIDED_JSON:
+        options["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": f"{category.lower()}_extraction", "schema": extraction_schema(category)}
+        }
+    return options
+
+_stats = {
+    "categorizations": 0,
+    "categorizations_skipped": 0,
+    "split_documents": 0,
+    "grouped_requests": 0,
+    "grouped_documents": 0,
+    "streams_stopped_early": 0
+}
+
+def category_for_doc_type(doc_type: Optional[str]) -> Optional[str]:
+    """Returns the category implied by a submitted document type, or None if unknown/ambiguous."""
+    if not doc_type:
+        return None
+    category = DOC_TYPE_CATEGORIES.get(doc_type.lower())
+    return category if category in PROMPTS else None
+
+def perception_stats() -> Dict[str, int]:
+    """Returns counters of categorization calls made/skipped, split/grouped documents and streams stopped early."""
+    return dict(_stats)
+
+_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _create_client() -> httpx.AsyncClient:
+    """Creates the pooled keep-alive client used for all VLM requests."""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(VLM_TIMEOUT, connect=VLM_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=VLM_MAX_CONCURRENCY,
+            max_keepalive_connections=VLM_MAX_CONCURRENCY
+        ),
+        http2=VLM_HTTP2
+    )
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared VLM client of the running event loop, creating it on first use.
+    The client and the concurrency semaphore are bound to one loop, so a new loop
+    (e.g. a second asyncio.run in the CLI) gets fresh ones.
+    """
+    global _client, _semaphore, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = _create_client()
+        _semaphore = asyncio.Semaphore(VLM_MAX_CONCURRENCY)
+        _client_loop = loop
+    return _client
+
+async def aclose_client():
+    """Closes the shared VLM client (a later get_client() creates a new one)."""
+    global _client, _semaphore, _client_loop
+    client, _client, _semaphore, _client_loop = _client, None, None, None
+    if client is not None:
+        await client.aclose()
+
+def _backoff_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Full-jitter exponential backoff, honouring a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return min(float(retry_after), VLM_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(VLM_BACKOFF_MAX, VLM_BACKOFF_BASE * 2 ** attempt))
+
+class PageImage:
+    """
+    One JPEG page. Its data-URL content block is base64-encoded once, on first use, and
+    the same bytes are reused by every request the page is part of (categorization,
+    extraction, retries).
+    """
+    __slots__ = ("jpeg", "_block")
+
+    def __init__(self, jpeg: bytes):
+        self.jpeg = jpeg
+        self._block: Optional[bytes] = None
+
+    @property
+    def block(self) -> bytes:
+        if self._block is None:
+            self._block = b"".join((
+                b'{"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,',
+                base64.b64encode(self.jpeg),
+                b'"}}'
+            ))
+        return self._block
+
+def _chat_payload(prompt: str, pages: List[PageImage], max_tokens: int, **options: Any) -> bytes:
+    """
+    Serializes a chat completion request with one text block and the page images.
+    The JSON body is assembled from the pages' cached blocks instead of passing the
+    base64 strings through json.dumps for every request. Extra request fields
+    (stream, response_format, ...) are passed as keyword arguments.
+    """
+    head = json.dumps({"model": MODEL_NAME, "max_tokens": max_tokens, "temperature": 0.1, **options})[:-1]
+    parts = [
+        head.encode("utf-8"),
+        b', "messages": [{"role": "user", "content": [',
+        json.dumps({"type": "text", "text": prompt}).encode("utf-8")
+    ]
+    for page in pages:
+        parts.append(b", ")
+        parts.append(page.block)
+    parts.append(b"]}]}")
+    return b"".join(parts)
+
+class _JsonObjectScanner:
+    """
+    Incrementally finds the end of the first top-level JSON object in streamed text.
+    Text before its opening brace (e.g. a ```json fence) is skipped; braces inside
+    strings are ignored.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> Optional[str]:
+        """Adds a chunk of text; returns the object's text once its closing brace arrives, else None."""
+        start = 0
+        if self._depth == 0:
+            start = text.find("{")
+            if start == -1:
+                return None
+        for index in range(start, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:index + 1])
+                    return "".join(self._parts)
+        self._parts.append(text[start:])
+        return None
+
+async def _read_stream(response: httpx.Response) -> str:
+    """
+    Reads an SSE chat completion stream. Returns as soon as the first top-level JSON
+    object of the content is complete; the caller then closes the response, which
+    makes the server abort the remaining generation. Returns the whole content if no
+    object completes.
+    """
+    scanner = _JsonObjectScanner()
+    parts = []
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            break
+        choices = json.loads(data).get("choices") or [{}]
+        delta = (choices[0].get("delta") or {}).get("content") or ""
+        parts.append(delta)
+        complete = scanner.feed(delta)
+        if complete is not None:
+            if choices[0].get("finish_reason") is None:
+                _stats["streams_stopped_early"] += 1
+            return complete
+    return "".join(parts)
+
+async def _post_chat(payload: bytes, stream: bool = False) -> str:
+    """
+    Sends a serialized chat completion request (see _chat_payload) to the VLM and returns the message content.
+    At most VLM_MAX_CONCURRENCY requests are in flight; 429/503 responses are
+    retried with jittered backoff up to VLM_MAX_RETRIES times. With stream=True the
+    payload must request an SSE stream; only the first JSON object of it is returned
+    (see _read_stream). Servers that answer with a plain JSON response are handled too.
+    """
+    client = get_client()
+    for attempt in range(VLM_MAX_RETRIES + 1):
+        async with _semaphore:
+            async with client.stream("POST", VLLM_API_URL, content=payload, headers={"Content-Type": "application/json"}) as response:
+                retry_after = response.headers.get("Retry-After")
+                retry = response.status_code in RETRY_STATUS_CODES and attempt < VLM_MAX_RETRIES
+                if not retry:
+                    response.raise_for_status()
+                    if stream and response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                        return await _read_stream(response)
+                    await response.aread()
+                    return response.json()["choices"][0]["message"]["content"]
+        delay = _backoff_delay(attempt, retry_after)
+        print(f"⏳ VLM returned {response.status_code}, retrying in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+async def categorize_document(pages: List[PageImage], doc_name: str, pages_hash: Optional[str] = None) -> Optional[str]:
+    """
+    Categorizes the document using the VLM. Results are cached per pages_hash if given.
+    Returns None if the VLM call or its answer fails.
+    """
+    cache = get_cache() if pages_hash else None
+    cache_key = make_key(pages_hash, MODEL_NAME, CATEGORIZATION_PROMPT) if cache else None
+    if cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            print(f"♻️ Using cached category for {doc_name}: {cached}")
+            return cached
+
     print("🔍 Categorizing document...")
-    cat_payload = {
-        "model": MODEL_NAME,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": CATEGORIZATION_PROMPT},
-                    *image_content_blocks
-                ]
-            }
-        ],
-        "max_tokens": 256,
-        "temperature": 0.1
-    }
+    cat_payload = _chat_payload(CATEGORIZATION_PROMPT, pages, 256)
     try:
-        response = requests.post(VLLM_API_URL, json=cat_payload)
-        response.raise_for_status()
-        cat_result = response.json()
-        cat_content = cat_result["choices"][0]["message"]["content"]
+        cat_content = await _post_chat(cat_payload)
         
         clean_cat = cat_content.strip()
         if clean_cat.startswith("```json"): clean_cat = clean_cat[7:]
@@ -38,42 +333,35 @@ def categorize_document(image_content_blocks: List[Dict[str, Any]], doc_name: st
         cat_data = json.loads(clean_cat.strip())
         doc_category = cat_data.get("category", "Identity")
         print(f"✅ Categorized {doc_name} as: {doc_category} (Confidence: {cat_data.get('confidence')})")
+        if cache:
+            await asyncio.to_thread(cache.put, cache_key, doc_category)
         return doc_category
         
     except Exception as e:
-        print(f"⚠️ Categorization of {doc_name} failed: {e}. Defaulting to Identity.")
-        return "Identity"
+        print(f"⚠️ Categorization of {doc_name} failed: {e}.")
+        return None
 
-def extract_structured_data(image_content_blocks: List[Dict[str, Any]], doc_category: str, doc_name: str) -> Dict[str, Any]:
-    """Extracts structured data from the document using the VLM."""
+async def extract_structured_data(pages: List[PageImage], doc_category: str, doc_name: str, pages_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Extracts structured data from the document using the VLM. Results are cached per pages_hash if given."""
     if doc_category not in PROMPTS:
         print(f"⚠️ Unknown category '{doc_category}' for {doc_name}, defaulting to Identity prompt.")
         doc_category = "Identity"
 
     prompt = PROMPTS[doc_category]
+
+    cache = get_cache() if pages_hash else None
+    cache_key = make_key(pages_hash, MODEL_NAME, prompt) if cache else None
+    if cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            print(f"♻️ Using cached extraction for {doc_name}")
+            return cached
     
-    payload = {
-        "model": MODEL_NAME,
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    *image_content_blocks
-                ]
-            }
-        ],
-        "max_tokens": 1024,
-        "temperature": 0.1
-    }
+    payload = _chat_payload(prompt, pages, EXTRACTION_MAX_TOKENS, **_extraction_options(doc_category))
     
     extracted_json = {}
     try:
-        response = requests.post(VLLM_API_URL, json=payload)
-        response.raise_for_status()
-        result = response.json()
-        
-        content = result["choices"][0]["message"]["content"]
+        content = await _post_chat(payload, stream=VLM_STREAM)
         json_blocks = re.findall(r"```json\s*(.*?)\s*```", content, re.DOTALL)
         
         if not json_blocks:
@@ -98,38 +386,234 @@ def extract_structured_data(image_content_blocks: List[Dict[str, Any]], doc_cate
         print(f"Raw content was: {content if 'content' in locals() else 'N/A'}")
         extracted_json = {"error": str(e), "raw_content": content if 'content' in locals() else "N/A"}
     print(f"✅ Extracted JSON: {extracted_json}")
+    # Failed extractions are not cached so the next run retries them
+    if cache and "error" not in extracted_json:
+        await asyncio.to_thread(cache.put, cache_key, extracted_json)
     return extracted_json
 
-def extract_data(images_base64: List[str], doc_name: str) -> Dict[str, Any]:
+def _parse_json_object(content: str) -> Optional[Dict[str, Any]]:
+    """Returns the first top-level JSON object in content (nested objects allowed), or None."""
+    decoder = json.JSONDecoder()
+    start = content.find("{")
+    while start != -1:
+        try:
+            data, _ = decoder.raw_decode(content, start)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+        start = content.find("{", start + 1)
+    return None
+
+async def categorize_and_extract(pages: List[PageImage], doc_name: str, pages_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Categorizes the document and extracts its fields in a single VLM round trip.
+    Returns {"category", "data"}, or None if the response fails validation
+    (callers then fall back to the two-step path). Valid results are cached per pages_hash.
+    """
+    cache = get_cache() if pages_hash else None
+    cache_key = make_key(pages_hash, MODEL_NAME, COMBINED_PROMPT) if cache else None
+    if cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            print(f"♻️ Using cached combined result for {doc_name}")
+            return cached
+
+    print("🔍 Categorizing and extracting document...")
+    payload = _chat_payload(COMBINED_PROMPT, pages, EXTRACTION_MAX_TOKENS)
+    try:
+        content = await _post_chat(payload)
+    except Exception as e:
+        print(f"⚠️ Combined perception of {doc_name} failed: {e}")
+        return None
+
+    combined = _parse_json_object(content)
+    if (
+        not combined
+        or combined.get("category") not in PROMPTS
+        or not isinstance(combined.get("data"), dict)
+        or not combined["data"]
+    ):
+        print(f"⚠️ Combined output for {doc_name} failed validation. Raw content was: {content}")
+        return None
+
+    result = {"category": combined["category"], "data": combined["data"]}
+    print(f"✅ Categorized {doc_name} as: {result['category']}, extracted JSON: {result['data']}")
+    if cache:
+        await asyncio.to_thread(cache.put, cache_key, result)
+    return result
+
+class _GroupedDocument:
+    """One single-request document waiting to be grouped with others of its category."""
+
+    def __init__(self, pages: List[PageImage], page_tokens: List[int], category: str, doc_name: str, pages_hash: str):
+        self.pages = pages
+        self.tokens = sum(page_tokens)
+        self.category = category
+        self.doc_name = doc_name
+        self.pages_hash = pages_hash
+
+def _grouped_prompt(documents: List[_GroupedDocument]) -> str:
+    listing = []
+    first = 1
+    for number, doc in enumerate(documents, 1):
+        last = first + len(doc.pages) - 1
+        images = f"image {first}" if first == last else f"images {first}-{last}"
+        listing.append(f'- Document {number}: {images} ("{doc.doc_name}")')
+        first = last + 1
+    return GROUPED_PROMPT.format(
+        count=len(documents),
+        documents="\n".join(listing),
+        category_prompt=PROMPTS[documents[0].category]
+    )
+
+def _group_fits(documents: List[_GroupedDocument]) -> bool:
+    """A group fits if its images stay within the per-request image limit and token budget."""
+    if sum(len(doc.pages) for doc in documents) > VLM_MAX_IMAGES_PER_REQUEST:
+        return False
+    # The listing adds about one line per document to the prompt
+    prompt_tokens = estimate_text_tokens(GROUPED_PROMPT + PROMPTS[documents[0].category]) + 20 * len(documents)
+    output_tokens = EXTRACTION_MAX_TOKENS * len(documents)
+    return prompt_tokens + output_tokens + sum(doc.tokens for doc in documents) <= VLM_MAX_MODEL_LEN
+
+async def _extract_group(documents: List[_GroupedDocument]) -> List[Dict[str, Any]]:
+    """
+    Extracts several documents of one category in a single request. Falls back to
+    one request per document if the answer doesn't contain one object per document.
+    """
+    if len(documents) > 1:
+        names = ", ".join(doc.doc_name for doc in documents)
+        print(f"📦 Extracting {len(documents)} {documents[0].category} documents in one request: {names}")
+        payload = _chat_payload(
+            _grouped_prompt(documents),
+            [page for doc in documents for page in doc.pages],
+            EXTRACTION_MAX_TOKENS * len(documents)
+        )
+        try:
+            content = await _post_chat(payload)
+            answer = _parse_json_object(content) or {}
+            results = answer.get("documents")
+            if (
+                isinstance(results, list)
+                and len(results) == len(documents)
+                and all(isinstance(result, dict) for result in results)
+            ):
+                _stats["grouped_requests"] += 1
+                _stats["grouped_documents"] += len(documents)
+                cache = get_cache()
+                for doc, result in zip(documents, results):
+                    print(f"✅ Extracted JSON for {doc.doc_name}: {result}")
+                    if cache:
+                        await asyncio.to_thread(cache.put, _grouped_cache_key(doc.pages_hash, doc.category), result)
+                return results
+            print(f"⚠️ Grouped output failed validation, extracting one by one. Raw content was: {content}")
+        except Exception as e:
+            print(f"⚠️ Grouped extraction failed: {e}. Extracting one by one.")
+
+    return list(await asyncio.gather(*(
+        extract_structured_data(doc.pages, doc.category, doc.doc_name, doc.pages_hash)
+        for doc in documents
+    )))
+
+_batcher = PageBatcher(_extract_group, _group_fits)
+
+def _grouped_cache_key(pages_hash: str, category: str) -> str:
+    """Grouped results come from a different prompt, so they never share a key with single extractions."""
+    return make_key(pages_hash, MODEL_NAME, GROUPED_PROMPT + PROMPTS[category])
+
+async def _cached_extraction(pages_hash: str, category: str) -> Optional[Dict[str, Any]]:
+    """Looks up a single-document extraction first, then a grouped one."""
+    cache = get_cache()
+    if not cache:
+        return None
+    cached = await asyncio.to_thread(cache.get, make_key(pages_hash, MODEL_NAME, PROMPTS[category]))
+    if cached is None:
+        cached = await asyncio.to_thread(cache.get, _grouped_cache_key(pages_hash, category))
+    return cached
+
+async def extract_data(
+    images: List[bytes],
+    doc_name: str,
+    doc_category: Optional[str] = None,
+    mode: Optional[str] = None,
+    batch_key: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Sends images to the VLM. If category is not provided, it first categorizes the document,
     then extracts structured data based on the determined category.
+
+    Pages are packed into as few requests as the context allows (see packing.py): a
+    document that doesn't fit one request is split and the results of its chunks are
+    merged; categorization only looks at the first chunk.
     
     Args:
-        images_base64: List of Base64 encoded image strings (one per page).
+        images: JPEG bytes of each page (base64-encoded once, when the first request is built).
         doc_name: Name of the document for logging.
+        doc_category: Known category (e.g. from category_for_doc_type); skips categorization.
+        mode: "two_step" or "combined" (defaults to PERCEPTION_MODE). Combined mode
+              categorizes and extracts in one request and falls back to two steps
+              if its output fails validation.
+        batch_key: Documents submitted with the same key (e.g. the application ID) and
+              category may be extracted together in one request. Only used when
+              VLM_GROUP_DOCUMENTS is enabled; None disables grouping.
         
     Returns:
         Dictionary containing:
             - category: The determined or provided category
             - data: The extracted JSON data
+            - categorization_failed: True if categorization failed and the document was
+              extracted as Identity (only present then)
     """
-    # Limit to first 5 pages to avoid token overflow
-    if len(images_base64) > 5:
-        print(f"⚠️ Document has {len(images_base64)} pages. Limiting to first 5 pages.")
-        images_base64 = images_base64[:5]
-    
-    image_content_blocks = []
-    for img_b64 in images_base64:
-        image_content_blocks.append({
-            "type": "image_url",
-            "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
-        })
-
-    doc_category = categorize_document(image_content_blocks, doc_name)
-    extracted_json = extract_structured_data(image_content_blocks, doc_category, doc_name)
-
-    return {
-        "category": doc_category,
-        "data": extracted_json
-    }
+    pages = [PageImage(jpeg) for jpeg in images]
+    page_tokens = estimate_page_tokens(images)
+    # Budget for the longest prompt a chunk may be sent with
+    budget = request_budget(max([COMBINED_PROMPT, *PROMPTS.values()], key=len), EXTRACTION_MAX_TOKENS)
+    chunks = pack_pages(page_tokens, budget)
+    if len(chunks) > 1:
+        _stats["split_documents"] += 1
+        print(f"📄 {doc_name} has {len(images)} pages, splitting into {len(chunks)} requests")
+    chunk_pages = [[pages[i] for i in chunk] for chunk in chunks]
+    chunk_hashes = [hash_pages([images[i] for i in chunk]) for chunk in chunks]
+
+    parts: List[Dict[str, Any]] = []
+    categorization_failed = False
+    if doc_category:
+        _stats["categorizations_skipped"] += 1
+        print(f"⏭️ Skipping categorization of {doc_name}, category known: {doc_category}")
+    else:
+        _stats["categorizations"] += 1
+        if (mode or PERCEPTION_MODE) == "combined":
+            combined = await categorize_and_extract(chunk_pages[0], doc_name, chunk_hashes[0])
+            if combined and len(chunks) == 1:
+                return combined
+            if combined:
+                doc_category = combined["category"]
+                parts.append(combined["data"])
+            else:
+                print(f"↩️ Falling back to two-step perception for {doc_name}")
+
+        if not doc_category:
+            doc_category = await categorize_document(chunk_pages[0], doc_name, chunk_hashes[0])
+            if doc_category is None:
+                print(f"↩️ Defaulting {doc_name} to Identity")
+                doc_category = "Identity"
+                categorization_failed = True
+
+    if VLM_GROUP_DOCUMENTS and len(chunks) == 1 and batch_key is not None and doc_category in PROMPTS:
+        extracted_json = await _cached_extraction(chunk_hashes[0], doc_category)
+        if extracted_json is None:
+            document = _GroupedDocument(pages, page_tokens, doc_category, doc_name, chunk_hashes[0])
+            extracted_json = await _batcher.submit((batch_key, doc_category), document)
+        else:
+            print(f"♻️ Using cached extraction for {doc_name}")
+    else:
+        parts.extend(await asyncio.gather(*(
+            extract_structured_data(chunk_pages[i], doc_category, doc_name, chunk_hashes[i])
+            for i in range(len(parts), len(chunks))
+        )))
+        extracted_json = merge_extractions(parts)
+
+    result = {"category": doc_category, "data": extracted_json}
+    if categorization_failed:
+        result["categorization_failed"] = True
+    return result
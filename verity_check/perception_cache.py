@@ -0,0 +1,169 @@
+"""
+Persistent cache for VLM perception results.
+
+Entries are keyed on a hash of the page images, the model name and the prompt text,
+so re-validating an unchanged application makes no VLM calls, while editing a prompt
+in prompt.py automatically misses (and eventually evicts) the entries built with it.
+Storage is a single SQLite file with size-based LRU eviction. The methods block on
+disk I/O, so async callers run them off the event loop (asyncio.to_thread).
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Cache configuration - can be overridden by env vars (empty path disables the cache)
+CACHE_PATH = os.getenv(
+    "PERCEPTION_CACHE_PATH",
+    str(Path.home() / ".cache" / "verity_check" / "perception_cache.sqlite")
+)
+CACHE_MAX_BYTES = int(os.getenv("PERCEPTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# A hit only rewrites an entry's last_access if it is older than this (seconds), so
+# repeated reads don't each cost a write; LRU order is exact up to this interval
+CACHE_TOUCH_INTERVAL = float(os.getenv("PERCEPTION_CACHE_TOUCH_INTERVAL", "3600"))
+# Entries deleted per eviction query
+EVICT_BATCH = 64
+
+
+def hash_pages(images: List[bytes]) -> str:
+    """Returns a digest of the page images (JPEG bytes) of one document."""
+    digest = hashlib.sha256()
+    for image in images:
+        digest.update(hashlib.sha256(image).digest())
+    return digest.hexdigest()
+
+
+def make_key(pages_hash: str, model: str, prompt: str) -> str:
+    """Builds the cache key for one VLM call from page digest, model name and prompt text."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{pages_hash}|{model}|{prompt_hash}".encode("utf-8")).hexdigest()
+
+
+class PerceptionCache:
+    """SQLite-backed key/value store for JSON results with LRU eviction by total size."""
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent with NORMAL; a crash can only lose the last commits, which are re-fetchable
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries (last_access)")
+        # Running total of entries.size, kept in the same transactions as the entries
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (id, total) SELECT 0, COALESCE(SUM(size), 0) FROM entries")
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for key (and marks it as recently used), or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, last_access FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[1] > CACHE_TOUCH_INTERVAL:
+                self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        """Stores a JSON-serializable value and evicts least recently used entries above max_bytes."""
+        serialized = json.dumps(value, default=str)
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, serialized, len(serialized), time.time())
+            )
+            self._add_size(len(serialized) - (row[0] if row else 0))
+            self._evict()
+            self._conn.commit()
+
+    def _add_size(self, delta: int):
+        self._conn.execute("UPDATE meta SET total = total + ? WHERE id = 0", (delta,))
+
+    def _total(self) -> int:
+        return self._conn.execute("SELECT total FROM meta WHERE id = 0").fetchone()[0]
+
+    def _evict(self):
+        """Deletes least recently used entries until the total fits, reading EVICT_BATCH rows at a time."""
+        total = self._total()
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            evicted = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+            self._add_size(-sum(size for _, size in rows[:len(evicted)]))
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = self._total()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[PerceptionCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[PerceptionCache]:
+    """Returns the process-wide cache, or None if caching is disabled or the file can't be opened."""
+    global _cache, _cache_failed
+    if not CACHE_PATH or _cache_failed:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = PerceptionCache(CACHE_PATH, CACHE_MAX_BYTES)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Perception cache unavailable ({e}). Continuing without cache.")
+                _cache_failed = True
+                return None
+        return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Returns metrics of the process-wide cache, or an empty dict if it is not open."""
+    cache = _cache
+    return cache.stats() if cache is not None else {}
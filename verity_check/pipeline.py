@@ -0,0 +1,108 @@
+"""
+Staged document pipeline (download -> rasterize -> perception).
+
+Stages are connected by bounded asyncio queues, so the download of document N+1
+overlaps with VLM inference of document N, and one large PDF only occupies a worker
+of its own stage instead of holding up a whole asyncio.gather. Every stage also has a
+process-wide concurrency limit shared by all applications in flight, so concurrent
+applications queue for a stage instead of oversubscribing it.
+"""
+
+import os
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Stage configuration - can be overridden by env vars
+DOWNLOAD_CONCURRENCY = int(os.getenv("PIPELINE_DOWNLOAD_CONCURRENCY", "8"))
+RASTERIZE_CONCURRENCY = int(os.getenv("PIPELINE_RASTERIZE_CONCURRENCY", str(os.cpu_count() or 1)))
+PERCEPTION_CONCURRENCY = int(os.getenv("PIPELINE_PERCEPTION_CONCURRENCY", "4"))
+QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage.
+
+    fn receives the output of the previous stage (or the input item for the first stage)
+    and returns the input of the next stage; returning None drops the item.
+    concurrency caps workers of this stage across all pipelines of the process.
+    """
+    name: str
+    fn: Callable[[Any], Awaitable[Any]]
+    concurrency: int
+
+
+_limiters: Dict[str, asyncio.Semaphore] = {}
+_limiters_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _limiter(stage: Stage) -> asyncio.Semaphore:
+    """Returns the process-wide semaphore of a stage for the running event loop."""
+    global _limiters_loop
+    loop = asyncio.get_running_loop()
+    if _limiters_loop is not loop:
+        _limiters.clear()
+        _limiters_loop = loop
+    if stage.name not in _limiters:
+        _limiters[stage.name] = asyncio.Semaphore(stage.concurrency)
+    return _limiters[stage.name]
+
+
+async def run_stages(
+    items: List[Any],
+    stages: List[Stage],
+    queue_size: int = QUEUE_SIZE,
+    on_result: Optional[Callable[[int, Any], None]] = None
+) -> List[Any]:
+    """
+    Pushes items through stages and returns the final outputs in input order.
+    Items dropped by a stage or failing with an exception end up as None.
+    on_result(index, output) is called as soon as an item leaves the last stage.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    results: List[Any] = [None] * len(items)
+    # Workers per stage for this pipeline; the limiter bounds them across pipelines
+    workers = [max(1, min(stage.concurrency, len(items))) for stage in stages]
+
+    async def feed():
+        for index, item in enumerate(items):
+            await queues[0].put((index, item))
+        for _ in range(workers[0]):
+            await queues[0].put(_DONE)
+
+    async def work(stage_index: int, stage: Stage):
+        limiter = _limiter(stage)
+        is_last = stage_index == len(stages) - 1
+        while True:
+            entry = await queues[stage_index].get()
+            if entry is _DONE:
+                return
+            index, value = entry
+            try:
+                async with limiter:
+                    value = await stage.fn(value)
+            except Exception as e:
+                print(f"    ❌ Stage '{stage.name}' failed: {e}")
+                value = None
+            if value is None:
+                continue
+            if is_last:
+                results[index] = value
+                if on_result:
+                    on_result(index, value)
+            else:
+                await queues[stage_index + 1].put((index, value))
+
+    async def run_stage(stage_index: int, stage: Stage):
+        await asyncio.gather(*(work(stage_index, stage) for _ in range(workers[stage_index])))
+        # Downstream workers stop once this stage has drained
+        if stage_index + 1 < len(stages):
+            for _ in range(workers[stage_index + 1]):
+                await queues[stage_index + 1].put(_DONE)
+
+    await asyncio.gather(feed(), *(run_stage(i, stage) for i, stage in enumerate(stages)))
+    return results
@@ -135,4 +135,39 @@ Return a JSON object with the following structure:
   "confidence": float (0.0 to 1.0),
   "reasoning": "Short explanation"
 }
-"""
\ No newline at end of file
+"""
+# Single round trip: categorize and extract in one response (see perception.categorize_and_extract)
+COMBINED_PROMPT = """
+Analyze the document image in two steps and answer with ONE JSON object.
+
+STEP 1 - CATEGORY:
+1. "Identity": Passports, ID cards, Residence Permits.
+2. "Livelihood": Payslips (Lohnabrechnung), Rent Contracts (Mietvertrag), Employer Certificates, Immatrikulationsbescheinigung, Stipendien, BAföG, andere finanzielle Dokumente.
+3. "Integration": Language Certificates (B1, B2, etc.), Integration Course Certificates, Einbürgerungstests.
+
+STEP 2 - FIELDS:
+Follow ONLY the instructions of the category chosen in step 1. Ignore their output format sections.
+""" + "".join(
+    f'\n=== CATEGORY "{category}" ===\n{category_prompt}\n' for category, category_prompt in PROMPTS.items()
+) + """
+OUTPUT FORMAT:
+Return ONLY valid JSON with exactly this structure, no markdown:
+{
+  "category": "Identity" | "Livelihood" | "Integration",
+  "data": { the fields of the chosen category }
+}
+"""
+# Several small documents of one category in one request (see perception._extract_group);
+# {documents} lists the images of each document, {category_prompt} is PROMPTS[category]
+GROUPED_PROMPT = """
+The images belong to {count} SEPARATE documents of the same application, in this order:
+{documents}
+Apply the instructions below to EACH document on its own. Never mix fields of different documents.
+
+{category_prompt}
+
+OUTPUT FORMAT (overrides any output format above):
+Return ONLY valid JSON with exactly this structure, no markdown:
+{{"documents": [{{fields of document 1}}, {{fields of document 2}}, ...]}}
+The list must have exactly {count} entries, in the order of the documents above.
+"""
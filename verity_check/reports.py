@@ -0,0 +1,93 @@
+"""
+Streaming JSONL verification reports.
+
+Instead of one JSON document dumped at the end, a report is written record by record
+while the pipeline produces it: one {"type": "document"} line per perceived document,
+one {"type": "alert"} line per alert as soon as its check finishes, and a final
+{"type": "summary"} line with status, graph stats and check timings. Every line is
+flushed, so nothing has to be held for the report and a crash leaves the results
+produced so far on disk; a report without a summary line is incomplete.
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+DOCUMENT = "document"
+ALERT = "alert"
+SUMMARY = "summary"
+
+
+def without_record(item: Dict[str, Any]) -> Dict[str, Any]:
+    """A perception result as persisted: the typed "record" is derived from "data" and dropped."""
+    return {k: v for k, v in item.items() if k != "record"}
+
+
+class JsonlReportWriter:
+    """Appends the records of one application's report to a JSONL file as they are produced."""
+
+    def __init__(self, path: str, application_id: Optional[str] = None, fsync: bool = False):
+        self.path = path
+        self.application_id = application_id
+        self.fsync = fsync
+        self.documents = 0
+        self.alerts_written = 0
+        self._file = open(path, "w")
+
+    def _write(self, record_type: str, record: Dict[str, Any]):
+        line = {"type": record_type, **record}
+        if self.application_id is not None:
+            line["application_id"] = self.application_id
+        self._file.write(json.dumps(line, default=str) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def document(self, item: Dict[str, Any]):
+        """Writes one perception result ({"data", "metadata"})."""
+        self.documents += 1
+        self._write(DOCUMENT, without_record(item))
+
+    def alerts(self, check_name: str, alerts: List[Dict[str, Any]]):
+        """Writes the alerts of one finished check (evaluate_checks' on_alerts callback)."""
+        for alert in alerts:
+            self.alerts_written += 1
+            self._write(ALERT, {"check_id": check_name, **alert})
+
+    def summary(self, report: Dict[str, Any]):
+        """Writes the closing summary of a report (everything but its documents and alerts)."""
+        fields = {k: v for k, v in report.items() if k not in ("extracted_data", "alerts")}
+        self._write(SUMMARY, {**fields, "documents": self.documents, "alerts": self.alerts_written})
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "JsonlReportWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_report(path: str) -> Dict[str, Any]:
+    """
+    Reassembles a JSONL report into the shape of the JSON report ("extracted_data",
+    "alerts" plus the summary fields) with "complete" telling whether the summary was
+    written. A last line cut off by a crash is ignored.
+    """
+    report: Dict[str, Any] = {"extracted_data": [], "alerts": [], "complete": False}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            record_type = record.pop("type")
+            if record_type == DOCUMENT:
+                report["extracted_data"].append(record)
+            elif record_type == ALERT:
+                report["alerts"].append(record)
+            elif record_type == SUMMARY:
+                report.update({k: v for k, v in record.items() if k not in ("documents", "alerts")})
+                report["complete"] = True
+    return report
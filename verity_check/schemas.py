@@ -0,0 +1,200 @@
+"""
+Typed extraction schemas per document category.
+
+The VLM returns loosely typed JSON: dates as "2030-01-01" or "01.01.2030", amounts as
+2100.5 or "2.100,50 €", names with honorifics. Every field of a category's prompt is
+mapped to a kind, and the kinds are compiled into normalizer functions once at import.
+normalize_record() is applied right after perception and yields a typed record (dates
+as datetime.date, amounts as float, booleans as bool, names canonicalized), so
+build_graph and the consistency checks work on typed values and parse nothing.
+Dates and amounts are parsed by normalization.parse_date / parse_amount.
+
+Values that don't fit their kind (e.g. "siehe Anlage" as an amount) are kept as
+stripped text; fields outside the schemas get a kind inferred from their name.
+"""
+
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+from verity_check.normalization import parse_amount, parse_date
+
+# Field kinds
+DATE = "date"
+BIRTH_DATE = "birth_date"  # dates that can't be in the future (two-digit MRZ years)
+AMOUNT = "amount"
+BOOL = "bool"
+NAME = "name"  # person names: canonicalized, linked across documents
+ENTITY = "entity"  # authorities, institutes, employers, landlords
+TEXT = "text"
+
+FIELD_KINDS: Dict[str, Dict[str, str]] = {
+    "Identity": {
+        "document_type": TEXT,
+        "surname": NAME,
+        "given_names": NAME,
+        "date_of_birth": BIRTH_DATE,
+        "nationality": TEXT,
+        "passport_number": TEXT,
+        "valid_from": DATE,
+        "valid_until": DATE,
+        "residence_permit_type": TEXT,
+        "paragraph_remarks": TEXT,
+        "issuing_authority": ENTITY,
+    },
+    "Livelihood": {
+        "document_category": TEXT,
+        "date_of_document": DATE,
+        "applicant_name": NAME,
+        "provider_name": ENTITY,
+        "monthly_amount": AMOUNT,
+        "funding_period_start": DATE,
+        "funding_period_end": DATE,
+        "is_original": BOOL,
+        "total_warm_rent": AMOUNT,
+        "cold_rent": AMOUNT,
+        "rental_start_date": DATE,
+        "landlord_name": ENTITY,
+        "net_income": AMOUNT,
+        "gross_income": AMOUNT,
+        "employer_name": ENTITY,
+        "employment_type": TEXT,
+        "monthly_gross": AMOUNT,
+        "has_signature": BOOL,
+        "has_stamp": BOOL,
+        "benefit_type": TEXT,
+    },
+    "Integration": {
+        "certificate_type": TEXT,
+        "institute_name": ENTITY,
+        "exam_date": DATE,
+        "examinee_name": NAME,
+        "achieved_level": TEXT,
+        "language": TEXT,
+        "total_score": TEXT,
+        "result_status": TEXT,
+        "has_signature": BOOL,
+        "has_stamp": BOOL,
+    },
+}
+
+_HONORIFICS = re.compile(r"^(?:(?:frau|herr|mrs?|ms|dr)\.?\s+)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_TRUE = {"true", "ja", "yes", "vorhanden"}
+_FALSE = {"false", "nein", "no", "fehlt"}
+
+
+def canonical_name(text: str) -> str:
+    """Strips honorifics (Frau, Herr, Dr., ...) and collapses whitespace."""
+    return _HONORIFICS.sub("", _WHITESPACE.sub(" ", text).strip())
+
+
+def _normalize_date(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        text = value.strip()
+        return parse_date(text) or text
+    return value
+
+
+def _normalize_birth_date(value: Any) -> Any:
+    if isinstance(value, str):
+        text = value.strip()
+        return parse_date(text, birth=True) or text
+    return _normalize_date(value)
+
+
+def _normalize_amount(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        amount = parse_amount(text)
+        return text if amount is None else amount
+    return value
+
+
+def _normalize_bool(value: Any) -> Any:
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        return value.strip()
+    return value
+
+
+def _normalize_name(value: Any) -> Any:
+    return canonical_name(value) if isinstance(value, str) else value
+
+
+def _normalize_text(value: Any) -> Any:
+    return value.strip() if isinstance(value, str) else value
+
+
+_NORMALIZERS: Dict[str, Callable[[Any], Any]] = {
+    DATE: _normalize_date,
+    BIRTH_DATE: _normalize_birth_date,
+    AMOUNT: _normalize_amount,
+    BOOL: _normalize_bool,
+    NAME: _normalize_name,
+    ENTITY: _normalize_text,
+    TEXT: _normalize_text,
+}
+
+
+@lru_cache(maxsize=None)
+def _inferred_kind(field: str) -> str:
+    """Kind of a field outside the schemas, by the naming conventions of the prompts."""
+    lower = field.lower()
+    if "birth" in lower:
+        return BIRTH_DATE
+    if any(keyword in lower for keyword in ("date", "from", "until", "start", "end")):
+        return DATE
+    if "name" in lower:
+        return NAME
+    if any(keyword in lower for keyword in ("authority", "institute", "provider", "landlord")):
+        return ENTITY
+    return TEXT
+
+
+# category -> field -> (kind, normalizer), compiled once
+_COMPILED: Dict[str, Dict[str, tuple]] = {
+    category: {field: (kind, _NORMALIZERS[kind]) for field, kind in fields.items()}
+    for category, fields in FIELD_KINDS.items()
+}
+
+
+def field_kind(category: Optional[str], field: str) -> str:
+    compiled = _COMPILED.get(category, {}).get(field)
+    return compiled[0] if compiled else _inferred_kind(field)
+
+
+def normalize_record(category: Optional[str], data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns the typed record of an extraction of the given category. All fields are
+    kept; None stays None. Errored extractions ({"error": ...}) normalize like any other.
+    """
+    compiled = _COMPILED.get(category, {})
+    record = {}
+    for field, value in data.items():
+        if value is not None:
+            entry = compiled.get(field)
+            value = entry[1](value) if entry else _NORMALIZERS[_inferred_kind(field)](value)
+        record[field] = value
+    return record
+
+
+def record_of(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed record of a perception result ({"data", "metadata"}): the "record" attached
+    after perception, or one normalized from "data" (e.g. results reloaded from JSON).
+    """
+    record = item.get("record")
+    if record is None:
+        record = normalize_record(item.get("metadata", {}).get("category"), item.get("data") or {})
+    return record
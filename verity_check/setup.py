@@ -6,6 +6,7 @@ setup(
     packages=["verity_check"],
     package_dir={"verity_check": "."},
     install_requires=[
+        "httpx",
         "networkx",
         "pdf2image",
         "Pillow",
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from verity_check import api_client
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestApiClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @patch.dict(api_client._stats, {"requests": 0, "connections_opened": 0})
+    def test_requests_reuse_one_connection(self):
+        async def scenario():
+            try:
+                for _ in range(3):
+                    response = await api_client.get_client().get(self.url)
+                    self.assertEqual(response.json(), {"ok": True})
+            finally:
+                await api_client.aclose_client()
+
+        asyncio.run(scenario())
+        stats = api_client.client_stats()
+        self.assertEqual(stats["requests"], 3)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
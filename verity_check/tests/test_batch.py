@@ -0,0 +1,158 @@
+import json
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from verity_check.main import discover_applications, completed_applications, report_folder, run_batch, run_pipeline
+from verity_check.reports import JsonlReportWriter, read_report
+
+def fake_ingest(files):
+    async def ingest(file_paths):
+        if any("broken" in path for path in file_paths):
+            raise RuntimeError("poppler failed")
+        return [{"filename": Path(path).name} for path in file_paths]
+    return ingest(files)
+
+async def fake_perceive(processed_images, batch_key="cli", on_document=None):
+    results = []
+    for img in processed_images:
+        results.append({"data": {"net_income": 3000, "total_warm_rent": 800} if "payslip" in img["filename"] else {},
+                        "metadata": {"filename": img["filename"], "category": "Livelihood"}})
+        if "outage" in img["filename"]:
+            results[-1]["data"] = {"error": "503 Service Unavailable", "raw_content": "N/A"}
+        if "unreadable" in img["filename"]:
+            results[-1]["metadata"]["categorization_failed"] = True
+        if on_document:
+            on_document(results[-1])
+    return results
+
+class TestBatchMode(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / "applications"
+        for application_id, files in {"app-1": ["payslip.pdf"], "app-2": ["rent.pdf"], "app-3": ["broken.pdf"]}.items():
+            (self.root / application_id).mkdir(parents=True)
+            for name in files:
+                (self.root / application_id / name).write_bytes(b"%PDF")
+        self.output_dir = Path(self.tmp.name) / "reports"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_batch(self, applications):
+        with patch("verity_check.main.ingest_documents_async", fake_ingest), \
+             patch("verity_check.main.perceive_documents", fake_perceive):
+            return asyncio.run(run_batch(applications, str(self.output_dir), concurrency=2))
+
+    def test_discover_from_root_and_manifest(self):
+        applications = discover_applications(str(self.root))
+        self.assertEqual(sorted(applications), ["app-1", "app-2", "app-3"])
+        self.assertTrue(applications["app-1"][0].endswith("app-1/payslip.pdf"))
+
+        manifest = Path(self.tmp.name) / "manifest.jsonl"
+        manifest.write_text(
+            json.dumps({"application_id": 7, "input_dir": "applications/app-2"}) + "\n\n"
+            + json.dumps({"application_id": "x", "files": ["applications/app-1/payslip.pdf"]}) + "\n"
+        )
+        applications = discover_applications(manifest=str(manifest))
+        self.assertEqual(applications["7"], [str(self.root / "app-2" / "rent.pdf")])
+        self.assertEqual(applications["x"], [str(self.root / "app-1" / "payslip.pdf")])
+
+    def test_reports_summary_and_resume(self):
+        applications = discover_applications(str(self.root))
+        stats = self.run_batch(applications)
+        self.assertEqual((stats["validated"], stats["ERROR"]), (3, 1))
+        self.assertGreater(stats["applications_per_hour"], 0)
+
+        summary = [json.loads(line) for line in (self.output_dir / "summary.jsonl").read_text().splitlines()]
+        entries = {entry["application_id"]: entry for entry in summary}
+        self.assertEqual(entries["app-3"]["error"], "poppler failed")
+        self.assertIn("Livelihood Calculation", entries["app-2"]["checks_failed"])
+        report = read_report(entries["app-1"]["report"])
+        self.assertTrue(report["complete"])
+        self.assertEqual(report["status"], entries["app-1"]["status"])
+        self.assertEqual([d["metadata"]["filename"] for d in report["extracted_data"]], ["payslip.pdf"])
+        self.assertEqual(len(report["alerts"]), entries["app-1"]["alerts"])
+
+        # A crash mid-write leaves a truncated line; errored applications are retried
+        with open(self.output_dir / "summary.jsonl", "a") as f:
+            f.write('{"application_id": "app-')
+        self.assertEqual(completed_applications(self.output_dir / "summary.jsonl"), {"app-1", "app-2"})
+        stats = self.run_batch(applications)
+        self.assertEqual((stats["validated"], stats["skipped"], stats["ERROR"]), (1, 2, 1))
+        lines = (self.output_dir / "summary.jsonl").read_text().splitlines()
+        self.assertEqual(json.loads(lines[-1])["application_id"], "app-3")
+
+    def test_failed_perception_is_an_error(self):
+        for application_id, name in {"app-4": "outage.pdf", "app-5": "unreadable.pdf"}.items():
+            (self.root / application_id).mkdir()
+            (self.root / application_id / name).write_bytes(b"%PDF")
+        applications = discover_applications(str(self.root))
+        self.run_batch({k: applications[k] for k in ("app-1", "app-4", "app-5")})
+
+        entries = {e["application_id"]: e for e in map(json.loads, (self.output_dir / "summary.jsonl").read_text().splitlines())}
+        self.assertEqual([entries[k]["status"] for k in ("app-1", "app-4", "app-5")], ["FAIL", "ERROR", "ERROR"])
+        self.assertIn("outage.pdf", entries["app-4"]["error"])
+        self.assertEqual(completed_applications(self.output_dir / "summary.jsonl"), {"app-1"})
+
+    def test_report_folders_are_safe_and_distinct(self):
+        self.assertNotEqual(report_folder("a/b"), report_folder("a_b"))
+        self.assertTrue(report_folder("a/b").startswith("a_b-"))
+        self.assertEqual(report_folder("app-1"), report_folder("app-1"))
+        for application_id in ("", ".", ".."):
+            with self.assertRaises(ValueError):
+                report_folder(application_id)
+
+        self.run_batch({"..": [str(self.root / "app-1" / "payslip.pdf")]})
+        entry = json.loads((self.output_dir / "summary.jsonl").read_text())
+        self.assertEqual(entry["status"], "ERROR")
+        self.assertEqual(sorted(p.name for p in Path(self.tmp.name).iterdir()), ["applications", "reports"])
+
+class TestRunPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_dir = Path(self.tmp.name) / "application"
+        self.input_dir.mkdir()
+        (self.input_dir / "payslip.pdf").write_bytes(b"%PDF")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_pipeline(self, output_file):
+        with patch("verity_check.main.ingest_documents", lambda files: [{"filename": Path(f).name} for f in files]), \
+             patch("verity_check.main.perceive_documents", fake_perceive), \
+             patch("verity_check.main.visualize_graph"):
+            run_pipeline(str(self.input_dir), str(output_file))
+
+    def test_runs_without_torch(self):
+        output_file = Path(self.tmp.name) / "report.jsonl"
+        # A None entry makes "import torch" raise ImportError
+        with patch.dict("sys.modules", {"torch": None}):
+            self.run_pipeline(output_file)
+        report = read_report(output_file)
+        self.assertTrue(report["complete"])
+        self.assertEqual([d["metadata"]["filename"] for d in report["extracted_data"]], ["payslip.pdf"])
+
+    def test_report_is_closed_when_a_step_fails(self):
+        output_file = Path(self.tmp.name) / "report.jsonl"
+
+        async def failing_perceive(processed_images, batch_key="cli", on_document=None):
+            await fake_perceive(processed_images, batch_key, on_document)
+            raise RuntimeError("VLM unreachable")
+
+        with patch("verity_check.main.perceive_documents", failing_perceive), \
+             patch("verity_check.main.ingest_documents", lambda files: [{"filename": Path(f).name} for f in files]), \
+             patch.object(JsonlReportWriter, "close", autospec=True, side_effect=JsonlReportWriter.close) as close:
+            with self.assertRaises(RuntimeError):
+                run_pipeline(str(self.input_dir), str(output_file))
+
+        close.assert_called_once()
+        report = read_report(output_file)
+        self.assertFalse(report["complete"])
+        self.assertEqual(len(report["extracted_data"]), 1)
+
+if __name__ == "__main__":
+    unittest.main()
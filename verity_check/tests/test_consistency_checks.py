@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import patch
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import (
+    CHECKS, OPT_IN_CHECKS, Check, evaluate_checks, check_permit_validity, check_permit_paragraph
+)
+
+EXTRACTED_DATA = [
+    {
+        "data": {"document_type": "Residence Permit (eAT)", "valid_from": "2015-01-01",
+                 "valid_until": "2017-01-01", "paragraph_remarks": "§16b"},
+        "metadata": {"filename": "permit1.jpg", "category": "Identity"}
+    },
+    {
+        "data": {"document_type": "Residence Permit (eAT)", "valid_from": "2018-01-01", "valid_until": "2020-01-01"},
+        "metadata": {"filename": "permit2.jpg", "category": "Identity"}
+    },
+    {
+        "data": {"net_income": 1000.0, "total_warm_rent": 600.0},
+        "metadata": {"filename": "payslip.jpg", "category": "Livelihood"}
+    }
+]
+
+class TestCheckRegistry(unittest.TestCase):
+
+    def test_threaded_run_matches_sequential(self):
+        G = build_graph(EXTRACTED_DATA)
+        alerts, timings = evaluate_checks(G, workers=1)
+        threaded_alerts, threaded_timings = evaluate_checks(G, workers=4)
+
+        self.assertEqual(threaded_alerts, alerts)
+        # Opt-in checks don't run by default
+        self.assertEqual(set(timings), {check.name for check in CHECKS} - OPT_IN_CHECKS)
+        self.assertEqual(threaded_timings["residence_continuity"]["alerts"], 1)
+        self.assertEqual(sum(t["alerts"] for t in timings.values()), len(alerts))
+        self.assertIn("Residence Duration", [a["check"] for a in alerts])
+
+    def test_enable_and_disable_checks(self):
+        G = build_graph(EXTRACTED_DATA)
+        with patch("verity_check.consistency_check.CHECKS_ENABLED", {"residence_duration"}):
+            alerts, timings = evaluate_checks(G)
+        # The permit list producer runs for its output, its alerts are dropped
+        self.assertEqual(set(timings), {"permit_existence", "residence_duration"})
+        self.assertEqual([a["check"] for a in alerts], ["Residence Duration"])
+
+        with patch("verity_check.consistency_check.CHECKS_DISABLED", {"livelihood_calculation"}):
+            alerts, timings = evaluate_checks(G)
+        self.assertNotIn("Livelihood Calculation", [a["check"] for a in alerts])
+        self.assertNotIn("livelihood_calculation", timings)
+
+    def test_dag_order_and_missing_inputs(self):
+        order = []
+        checks = [
+            Check("consumer", lambda value: order.append(("consumer", value)) or [], ("value",)),
+            Check("producer", lambda G: (order.append(("producer", None)) or [], 42), ("graph",), output="value")
+        ]
+        evaluate_checks(build_graph([]), checks=checks, workers=1)
+        self.assertEqual(order, [("producer", None), ("consumer", 42)])
+
+        with self.assertRaises(ValueError):
+            evaluate_checks(build_graph([]), checks=checks[:1], workers=1)
+
+    def test_permit_checks_do_not_reorder_shared_list(self):
+        from datetime import date
+        permits = [
+            {"filename": "old.jpg", "valid_from": date(2015, 1, 1), "valid_until": date(2016, 1, 1), "paragraph": "§16b"},
+            {"filename": "new.jpg", "valid_from": date(2020, 1, 1), "valid_until": date(2021, 1, 1)}
+        ]
+        alerts = check_permit_validity(permits) + check_permit_paragraph(permits)
+        self.assertEqual([p["filename"] for p in permits], ["old.jpg", "new.jpg"])
+        self.assertEqual([a["filenames"] for a in alerts], [["new.jpg"]])
+
+if __name__ == "__main__":
+    unittest.main()
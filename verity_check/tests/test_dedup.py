@@ -0,0 +1,76 @@
+import io
+import asyncio
+import unittest
+from PIL import Image, ImageDraw
+from verity_check.dedup import DuplicateIndex, PageFingerprint, dhash, fingerprint, hamming, same_page, perceive_once, unique_pages, DEDUP_MAX_DISTANCE
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import check_duplicate_documents
+
+def scan(text_rows):
+    image = Image.new("RGB", (600, 850), "white")
+    draw = ImageDraw.Draw(image)
+    for row, width in enumerate(text_rows):
+        draw.rectangle((40, 60 + row * 70, 40 + width, 90 + row * 70), fill="black")
+    return image
+
+class TestDedup(unittest.TestCase):
+
+    def test_fingerprint_matches_reencoded_copies_only(self):
+        original = scan([500, 300, 420, 200, 380])
+        buffer = io.BytesIO()
+        original.save(buffer, format="JPEG", quality=75)
+        copy = Image.open(io.BytesIO(buffer.getvalue()))
+        other = scan([200, 480, 120, 500, 260])
+        # Same template, one value changed: the dHash alone can't tell them apart
+        templated = scan([500, 300, 420, 200, 370])
+
+        self.assertTrue(same_page(fingerprint(original), fingerprint(copy)))
+        self.assertGreater(hamming(dhash(original), dhash(other)), DEDUP_MAX_DISTANCE)
+        self.assertFalse(same_page(fingerprint(original), fingerprint(other)))
+        self.assertLessEqual(hamming(dhash(original), dhash(templated)), DEDUP_MAX_DISTANCE)
+        self.assertFalse(same_page(fingerprint(original), fingerprint(templated)))
+
+    def test_unique_pages_drops_repeated_pages(self):
+        page_1, page_2 = fingerprint(scan([500, 300])), fingerprint(scan([100, 200, 300]))
+        images, fingerprints = unique_pages([b"p1", b"p2", b"p1-again"], [page_1, page_2, page_1])
+        self.assertEqual(images, [b"p1", b"p2"])
+        self.assertEqual(fingerprints, [page_1, page_2])
+
+    def test_duplicate_documents_are_perceived_once(self):
+        calls = []
+
+        async def perceive(name):
+            calls.append(name)
+            await asyncio.sleep(0.01)
+            return {"category": "Identity", "data": {"surname": "Mustermann"}}
+
+        permit = [PageFingerprint(2 ** 64 - 1, bytes(16))]
+        permit_copy = [PageFingerprint(2 ** 64 - 2, bytes(16))]
+        other = [PageFingerprint(0, bytes(16))]
+
+        async def scenario():
+            duplicates = DuplicateIndex()
+            return await asyncio.gather(
+                perceive_once(duplicates, permit, "aufenthaltstitel1.pdf", lambda: perceive("aufenthaltstitel1.pdf")),
+                perceive_once(duplicates, permit_copy, "aufenthaltstitel2.pdf", lambda: perceive("aufenthaltstitel2.pdf")),
+                perceive_once(duplicates, other, "aufenthaltstitel3.pdf", lambda: perceive("aufenthaltstitel3.pdf"))
+            )
+
+        results = asyncio.run(scenario())
+        self.assertEqual(calls, ["aufenthaltstitel1.pdf", "aufenthaltstitel3.pdf"])
+        self.assertEqual([duplicate_of for _, duplicate_of in results], [None, "aufenthaltstitel1.pdf", None])
+        self.assertEqual(results[1][0], results[0][0])
+
+    def test_duplicate_is_recorded_in_graph_and_checks(self):
+        G = build_graph([
+            {"data": {"surname": "Mustermann"}, "metadata": {"filename": "pass.pdf", "category": "Identity"}},
+            {"data": {"surname": "Mustermann"}, "metadata": {"filename": "aufenthaltstitel1.pdf", "category": "Identity", "duplicate_of": "pass.pdf"}}
+        ])
+        self.assertEqual(G.edges["Document:aufenthaltstitel1.pdf", "Document:pass.pdf"]["relation"], "duplicate_of")
+
+        alerts = check_duplicate_documents(G)
+        self.assertEqual(len(alerts), 1)
+        self.assertEqual(alerts[0]["filenames"], ["aufenthaltstitel1.pdf", "pass.pdf"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import asyncio
+import unittest
+from verity_check.pipeline import Stage, run_stages
+
+class TestDocumentPipeline(unittest.TestCase):
+
+    def test_results_keep_input_order(self):
+        async def slow_for_small(x):
+            await asyncio.sleep(0.01 * (5 - x))
+            return x
+
+        async def double(x):
+            return 2 * x
+
+        stages = [Stage("order-a", slow_for_small, 5), Stage("order-b", double, 2)]
+        results = asyncio.run(run_stages([1, 2, 3, 4], stages))
+        self.assertEqual(results, [2, 4, 6, 8])
+
+    def test_dropped_and_failed_items_are_none(self):
+        async def drop_odd(x):
+            return None if x % 2 else x
+
+        async def fail_on_four(x):
+            if x == 4:
+                raise ValueError("broken document")
+            return x
+
+        stages = [Stage("drop", drop_odd, 2), Stage("fail", fail_on_four, 2)]
+        results = asyncio.run(run_stages([1, 2, 3, 4], stages))
+        self.assertEqual(results, [None, 2, None, None])
+
+    def test_stages_overlap_within_limits(self):
+        events = []
+        active = {"perception": 0}
+        peak = {"perception": 0}
+
+        async def download(x):
+            events.append(("download", x))
+            await asyncio.sleep(0.01)
+            return x
+
+        async def perceive(x):
+            active["perception"] += 1
+            peak["perception"] = max(peak["perception"], active["perception"])
+            events.append(("perceive", x))
+            await asyncio.sleep(0.05)
+            events.append(("perceived", x))
+            active["perception"] -= 1
+            return x
+
+        async def run_two_applications():
+            stages = [Stage("overlap-download", download, 1), Stage("overlap-perception", perceive, 1)]
+            return await asyncio.gather(run_stages([1, 2, 3], stages), run_stages([4, 5], stages))
+
+        results = asyncio.run(run_two_applications())
+        self.assertEqual(results, [[1, 2, 3], [4, 5]])
+        # The perception limit is shared by both applications
+        self.assertEqual(peak["perception"], 1)
+        # Document 2 is downloaded while document 1 is still in perception
+        self.assertLess(events.index(("perceive", 1)), events.index(("download", 2)))
+        self.assertLess(events.index(("download", 2)), events.index(("perceived", 1)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import subprocess
+import unittest
+from typing import Dict
+
+# Cumulative import time budget of the entry points; raise it deliberately, not casually
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+# Needed only by some code paths, imported where they are used
+DEFERRED_MODULES = {"torch", "pyvis", "networkx"}
+
+def import_times(module: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds per module imported by `import module` (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+class TestImportTime(unittest.TestCase):
+
+    def assert_fast_import(self, module: str):
+        import_times(module)  # compiles missing .pyc files outside the measurement
+        times = import_times(module)
+        deferred = sorted({name.split(".")[0] for name in times} & DEFERRED_MODULES)
+        self.assertEqual(deferred, [], f"{module} imports {deferred} at startup")
+        self.assertLess(times[module] / 1000, IMPORT_TIME_BUDGET_MS, f"import {module} exceeds its budget")
+
+    def test_api_import(self):
+        self.assert_fast_import("verity_check.api")
+
+    def test_cli_import(self):
+        self.assert_fast_import("verity_check.main")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import io
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest.mock import patch
+from PIL import Image
+from verity_check import ingest
+from verity_check.ingest import process_file, process_bytes, pdf_render_dpi, image_profile, DocumentBuffer, ImageProfile, DEFAULT_PROFILE, MAX_PAGES, MAX_IMAGE_SIZE
+
+class TestIngest(unittest.TestCase):
+
+    def test_render_dpi_targets_max_size(self):
+        # A4 portrait: 11.69 inch longest side -> 175 DPI keeps it below 2048px
+        dpi = pdf_render_dpi("595.276 x 841.89 pts (A4)")
+        self.assertEqual(dpi, 175)
+        self.assertLessEqual(841.89 / 72 * dpi, MAX_IMAGE_SIZE)
+        # Small pages are never rendered above the base DPI
+        self.assertEqual(pdf_render_dpi("200 x 300 pts"), ingest.BASE_DPI)
+        # Unknown page size falls back to the base DPI
+        self.assertEqual(pdf_render_dpi(None), ingest.BASE_DPI)
+
+    @patch("verity_check.ingest.pdf2image.convert_from_path")
+    @patch("verity_check.ingest.pdf2image.pdfinfo_from_path")
+    def test_pdf_renders_only_max_pages(self, mock_info, mock_convert):
+        mock_info.return_value = {"Pages": 60, "Page size": "595.276 x 841.89 pts (A4)"}
+
+        def render(path, dpi, first_page, last_page, output_folder, paths_only):
+            paths = []
+            for page in range(first_page, last_page + 1):
+                paths.append(os.path.join(output_folder, f"page-{page:02d}.ppm"))
+                Image.new("RGB", (1446, 2046), "white").save(paths[-1])
+            return paths
+
+        mock_convert.side_effect = render
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "statement.pdf")
+            open(path, "wb").close()
+            result = process_file(path)
+
+        # The whole page range is rendered by one poppler call
+        self.assertEqual(mock_convert.call_count, 1)
+        self.assertEqual((mock_convert.call_args.kwargs["first_page"], mock_convert.call_args.kwargs["last_page"]), (1, MAX_PAGES))
+        self.assertEqual(mock_convert.call_args.kwargs["dpi"], 175)
+        self.assertFalse(os.path.exists(mock_convert.call_args.kwargs["output_folder"]))
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["page_number"], MAX_PAGES)
+        self.assertEqual(result[0]["total_pages"], 60)
+        self.assertEqual(result[0]["pages_skipped"], 60 - MAX_PAGES)
+        self.assertEqual(len(result[0]["images"]), MAX_PAGES)
+
+    def test_image_file(self):
+        path = os.path.join(os.path.dirname(__file__), "dummy_doc.jpg")
+        result = process_file(path)
+
+        self.assertEqual(result[0]["page_number"], 1)
+        self.assertEqual(result[0]["pages_skipped"], 0)
+        self.assertEqual(len(result[0]["images"]), 1)
+        self.assertEqual(len(result[0]["page_fingerprints"]), 1)
+
+    def test_image_profile(self):
+        path = os.path.join(os.path.dirname(__file__), "dummy_doc.jpg")
+        default = process_file(path)[0]["images"][0]
+        small = process_file(path, ImageProfile(max_size=512, quality=60))[0]["images"][0]
+
+        with Image.open(io.BytesIO(small)) as image:
+            self.assertEqual(max(image.size), 512)
+        self.assertLess(len(small), len(default))
+
+    @patch.dict(ingest.IMAGE_PROFILES, {"Identity": ImageProfile(max_size=1344), "Salary_Slip": ImageProfile(quality=60)}, clear=True)
+    def test_image_profile_lookup(self):
+        # Document type first (case-insensitive), then category, then the default
+        self.assertEqual(image_profile("salary_slip", "Livelihood"), ImageProfile(quality=60))
+        self.assertEqual(image_profile("passport", "Identity").max_size, 1344)
+        self.assertEqual(image_profile("other", None), DEFAULT_PROFILE)
+
+    def test_image_profiles_come_only_from_env(self):
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertEqual(ingest._load_image_profiles(), {})
+        with patch.dict(os.environ, {"INGEST_IMAGE_PROFILES": '{"Identity": {"max_size": 1344, "quality": 80}}'}):
+            self.assertEqual(ingest._load_image_profiles(), {"Identity": ImageProfile(max_size=1344, quality=80)})
+
+    def test_image_bytes(self):
+        path = os.path.join(os.path.dirname(__file__), "dummy_doc.jpg")
+        with open(path, "rb") as f:
+            data = f.read()
+
+        self.assertEqual(process_bytes(data, "dummy_doc.jpg"), process_file(path))
+
+    @patch("verity_check.ingest.subprocess.run")
+    def test_pdf_bytes_are_piped_to_poppler(self, mock_run):
+        page = Image.new("RGB", (100, 140), "white")
+        ppm = io.BytesIO()
+        page.save(ppm, format="PPM")
+
+        total_pages = MAX_PAGES + 2
+
+        def poppler(command, input, capture_output, timeout):
+            self.assertEqual(input, b"%PDF-1.4 fake")
+            if command[0] == "pdfinfo":
+                self.assertEqual(command[-1], "-")
+                return subprocess.CompletedProcess(command, 0, f"Pages: {total_pages}\nPage size: 595.276 x 841.89 pts (A4)\n".encode(), b"")
+            self.assertEqual(command[-2], "-")
+            first, last = int(command[command.index("-f") + 1]), int(command[command.index("-l") + 1])
+            for number in range(first, last + 1):
+                with open(f"{command[-1]}-{number:02d}.ppm", "wb") as f:
+                    f.write(ppm.getvalue())
+            return subprocess.CompletedProcess(command, 0, b"", b"")
+
+        mock_run.side_effect = poppler
+        result = process_bytes(b"%PDF-1.4 fake", "bescheid.pdf")
+
+        self.assertEqual(result[0]["filename"], "bescheid.pdf")
+        self.assertEqual(result[0]["page_number"], MAX_PAGES)
+        self.assertEqual(result[0]["pages_skipped"], 2)
+        # pdfinfo plus a single pdftoppm call for the whole page range
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_document_buffer_spills_above_threshold(self):
+        small = DocumentBuffer("small.jpg", threshold=10)
+        small.write(b"12345")
+        self.assertFalse(small.spilled)
+        self.assertEqual(small.source(), b"12345")
+        small.close()
+
+        large = DocumentBuffer("large.pdf", threshold=10)
+        for chunk in (b"12345", b"67890", b"abc"):
+            large.write(chunk)
+        self.assertTrue(large.spilled)
+        spool_path = large.source()
+        self.assertEqual(spool_path.suffix, ".pdf")
+        self.assertEqual(spool_path.read_bytes(), b"1234567890abc")
+        large.close()
+        self.assertFalse(spool_path.exists())
+
+if __name__ == "__main__":
+    unittest.main()
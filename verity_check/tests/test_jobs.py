@@ -0,0 +1,72 @@
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from verity_check.jobs import JobManager, JobQueueFull
+from verity_check.api import app, CheckResponse
+
+class TestJobManager(unittest.TestCase):
+
+    def test_jobs_run_and_queue_is_bounded(self):
+        async def scenario():
+            manager = JobManager(workers=1, queue_size=1)
+            manager.start()
+            release = asyncio.Event()
+
+            async def blocked(job):
+                await release.wait()
+                return "report"
+
+            async def failing(job):
+                raise ValueError("download failed")
+
+            running = manager.submit("app-1", blocked)
+            await asyncio.sleep(0)  # worker picks up the first job
+            queued = manager.submit("app-2", failing)
+            with self.assertRaises(JobQueueFull):
+                manager.submit("app-3", blocked)
+
+            self.assertEqual(running.status, "RUNNING")
+            self.assertEqual(queued.status, "QUEUED")
+            release.set()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            await manager.stop()
+            return running, queued
+
+        running, queued = asyncio.run(scenario())
+        self.assertEqual((running.status, running.result), ("DONE", "report"))
+        self.assertEqual((queued.status, queued.error), ("FAILED", "download failed"))
+
+class TestCheckJobEndpoints(unittest.TestCase):
+
+    def test_async_check_returns_job_and_polls_result(self):
+        report = CheckResponse(
+            applicationId="42", isComplete=True, overallResult="SUCCESS",
+            checkedAt="2025-01-01T00:00:00Z", checks=[]
+        )
+
+        async def fake_verify(application_id, on_document=None):
+            on_document([{"data": {"surname": "Mustermann"},
+                          "metadata": {"filename": "pass.jpg", "category": "Identity", "document_type": "passport"}}])
+            return report
+
+        with patch("verity_check.api.verify_application", fake_verify), TestClient(app) as client:
+            response = client.post("/check", json={"applicationId": "42", "asyncMode": True})
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()["jobId"]
+
+            for _ in range(50):
+                job = client.get(f"/check/{job_id}").json()
+                if job["status"] in ("DONE", "FAILED"):
+                    break
+                time.sleep(0.01)
+
+            self.assertEqual(job["status"], "DONE")
+            self.assertEqual(job["result"]["overallResult"], "SUCCESS")
+            self.assertEqual(job["processedDocuments"][0]["filename"], "pass.jpg")
+            self.assertEqual(client.get("/check/unknown").status_code, 404)
+
+if __name__ == "__main__":
+    unittest.main()
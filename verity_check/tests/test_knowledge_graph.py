@@ -0,0 +1,117 @@
+import unittest
+from datetime import date
+import networkx as nx
+from unittest.mock import patch
+from verity_check.compact_graph import CompactGraph
+from verity_check.knowledge_graph import build_graph, build_corpus_graph, entity_index, field_index
+from verity_check.consistency_check import run_checks
+
+EXTRACTED_DATA = [
+    {
+        "data": {"document_type": "Passport", "surname": "Mustermann", "given_names": "Erika",
+                 "date_of_birth": "1985-03-14", "valid_until": "2031-05-01"},
+        "metadata": {"filename": "passport.jpg", "category": "Identity"}
+    },
+    {
+        # Same value as the passport surname: the name node is shared, the field is not
+        "data": {"applicant_name": "Mustermann", "net_income": "2.100,50 €", "employer_name": "Siemens AG"},
+        "metadata": {"filename": "payslip.pdf", "category": "Livelihood"}
+    },
+    {
+        "data": {"applicant_name": "Mustermann", "net_income": "2.100,50 €"},
+        "metadata": {"filename": "payslip_copy.pdf", "category": "Livelihood", "duplicate_of": "payslip.pdf"}
+    }
+]
+
+class TestFieldIndex(unittest.TestCase):
+
+    def test_index_built_with_graph(self):
+        index = field_index(build_graph(EXTRACTED_DATA))
+
+        self.assertEqual(index.documents("Livelihood"), ["Document:payslip.pdf", "Document:payslip_copy.pdf"])
+        self.assertEqual(index.value("Document:passport.jpg", "valid_until"), date(2031, 5, 1))
+        self.assertEqual(index.value("Document:payslip.pdf", "applicant_name"), "Mustermann")
+        self.assertIsNone(index.value("Document:payslip.pdf", "surname"))
+        self.assertEqual(index.field("net_income"), [
+            ("Document:payslip.pdf", 2100.5), ("Document:payslip_copy.pdf", 2100.5)
+        ])
+        self.assertEqual(index.filename("Document:payslip_copy.pdf"), "payslip_copy.pdf")
+        self.assertEqual(index.document("Document:payslip_copy.pdf")["duplicate_of"], "payslip.pdf")
+
+        # Duplicates are recorded, but only alerted on when the check is enabled
+        alerts = [a["check"] for a in run_checks(build_graph(EXTRACTED_DATA))]
+        self.assertNotIn("Duplicate Documents", alerts)
+        with patch("verity_check.consistency_check.CHECKS_ENABLED", {"duplicate_documents"}):
+            alerts = run_checks(build_graph(EXTRACTED_DATA))
+        self.assertEqual([(a["check"], a["severity"]) for a in alerts], [("Duplicate Documents", "LOW")])
+
+    def test_index_of_graph_without_one(self):
+        G = nx.DiGraph()
+        G.add_node("Document:a.pdf", type="Document", category="Integration", filename="a.pdf")
+        G.add_node("Field:exam_date", type="DateField", field="exam_date", value=date(2024, 1, 1))
+        G.add_edge("Document:a.pdf", "Field:exam_date", relation="has_exam_date")
+
+        index = field_index(G)
+        self.assertEqual(index.documents("Integration"), ["Document:a.pdf"])
+        self.assertEqual(index.value("Document:a.pdf", "exam_date"), date(2024, 1, 1))
+        self.assertIs(field_index(G), index)
+
+    def test_compact_backend_matches_networkx(self):
+        G = build_graph(EXTRACTED_DATA, backend="networkx")
+        compact = build_graph(EXTRACTED_DATA, backend="compact")
+
+        self.assertIsInstance(compact, CompactGraph)
+        self.assertEqual(compact.number_of_nodes(), G.number_of_nodes())
+        self.assertEqual(compact.number_of_edges(), G.number_of_edges())
+        self.assertEqual(run_checks(compact), run_checks(G))
+
+        converted = compact.to_networkx()
+        self.assertEqual(dict(converted.nodes(data=True)), dict(G.nodes(data=True)))
+        self.assertEqual(set(converted.edges(data="relation")), set(G.edges(data="relation")))
+
+    def test_compact_interns_unknown_names_per_graph(self):
+        from verity_check import compact_graph
+        shared = len(compact_graph._fields), len(compact_graph._relations)
+        graphs = [CompactGraph(), CompactGraph()]
+        for number, G in enumerate(graphs):
+            G.add_node("Document:a.pdf", type="Document")
+            G.add_node(f"Field:a.pdf:x{number}", type="StringField", field=f"x{number}", value="v")
+            G.add_edge("Document:a.pdf", f"Field:a.pdf:x{number}", relation=f"has_x{number}")
+            G.add_node("Field:a.pdf:net_income", type="NumericField", field="net_income", value=1)
+
+        self.assertEqual((len(compact_graph._fields), len(compact_graph._relations)), shared)
+        self.assertEqual(graphs[1].node_attributes("Field:a.pdf:x1")["field"], "x1")
+        self.assertEqual(graphs[1].node_attributes("Field:a.pdf:net_income")["field"], "net_income")
+        self.assertEqual(list(graphs[0].edges()), [("Document:a.pdf", "Field:a.pdf:x0", "has_x0")])
+
+    def test_field_nodes_belong_to_their_document(self):
+        G = build_graph(EXTRACTED_DATA)
+        self.assertEqual(G.nodes["Field:payslip.pdf:net_income"]["value"], 2100.5)
+        self.assertEqual(G.nodes["Field:payslip_copy.pdf:net_income"]["value"], 2100.5)
+        # Names stay shared to link the person across documents
+        documents = [n for n in G.predecessors("Name:Mustermann") if n.startswith("Document:")]
+        self.assertEqual(len(documents), 3)
+
+    def test_corpus_graph_shares_entities_across_applications(self):
+        second = [{
+            "data": {"applicant_name": "Nowak", "employer_name": "SIEMENS  AG", "net_income": 1900},
+            "metadata": {"filename": "payslip.pdf", "category": "Livelihood"}
+        }]
+        G = build_corpus_graph({"app-1": EXTRACTED_DATA, "app-2": second})
+
+        self.assertIn("Application:app-1/Document:payslip.pdf", G)
+        self.assertIn("Application:app-2/Document:payslip.pdf", G)
+        self.assertIn("Application:app-2/Field:payslip.pdf:net_income", G)
+        self.assertEqual(G.nodes["Application:app-2/Document:payslip.pdf"]["application"], "app-2")
+
+        entities = entity_index(G)
+        self.assertEqual(entities.applications("Siemens AG"), {"app-1", "app-2"})
+        self.assertEqual(entities.shared(), {"Siemens AG": {"app-1", "app-2"}})
+        self.assertEqual(
+            [(m.application_id, m.field) for m in entities.lookup("siemens ag")],
+            [("app-1", "employer_name"), ("app-2", "employer_name")]
+        )
+        self.assertEqual(field_index(G, "app-2").value("Application:app-2/Document:payslip.pdf", "net_income"), 1900.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import random
+import unittest
+from unittest.mock import Mock, patch
+from verity_check import name_matching
+from verity_check.name_matching import mismatched_pairs, normalize_name, ratio, similarity_matrix
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import check_name_consistency, get_documents_by_category
+
+def lcs_ratio(a: str, b: str) -> float:
+    """Reference: dynamic-programming LCS."""
+    if not a or not b:
+        return 0.0
+    previous = [0] * (len(b) + 1)
+    for char in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if char == other else max(previous[j + 1], current[j]))
+        previous = current
+    return 2 * previous[-1] / (len(a) + len(b))
+
+class TestNameMatching(unittest.TestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name("Frau Jürgens, Anna"), "anna juergens")
+        self.assertEqual(normalize_name("ANNA JUERGENS"), "anna juergens")
+        self.assertEqual(normalize_name("JUERGENS<<ANNA<<<<<<<"), "anna juergens")
+        self.assertEqual(normalize_name("Dr. José  Groß"), "gross jose")
+        self.assertEqual(normalize_name("Herr"), "")
+
+    def test_ratio_matches_reference(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            a = "".join(rng.choice("abcde ") for _ in range(rng.randint(0, 90)))
+            b = "".join(rng.choice("abcde ") for _ in range(rng.randint(0, 90)))
+            self.assertAlmostEqual(ratio(a, b), lcs_ratio(a, b))
+
+    def test_similarity_matrix_pure_python(self):
+        names = ["anna juergens", "anna jurgens", "", "erika mustermann"]
+        with patch.object(name_matching, "_process", None), patch.object(name_matching, "np", None):
+            matrix = similarity_matrix(names)
+        for i, a in enumerate(names):
+            for j, b in enumerate(names):
+                self.assertAlmostEqual(matrix[i][j], 1.0 if i == j and a else ratio(a, b))
+
+    @unittest.skipUnless(name_matching.np, "numpy is not installed")
+    def test_similarity_matrix_numpy(self):
+        rng = random.Random(11)
+        names = ["", "x" * 63] + ["".join(rng.choice("abcdeü ") for _ in range(rng.randint(1, 40))) for _ in range(60)]
+        with patch.object(name_matching, "_process", None), patch.object(name_matching, "_NUMPY_BLOCK_PAIRS", 500):
+            matrix = similarity_matrix(names)
+        for i, a in enumerate(names):
+            for j, b in enumerate(names):
+                self.assertAlmostEqual(matrix[i][j], 1.0 if i == j and a else ratio(a, b))
+
+    def test_cdist_threads_only_for_many_names(self):
+        process = Mock()
+        process.cdist.side_effect = lambda a, b, scorer, workers: Mock(tolist=lambda: [[100.0] * len(b) for _ in a])
+        with patch.object(name_matching, "_process", process), patch.object(name_matching, "_fuzz", Mock(), create=True):
+            similarity_matrix(["anna", "erika"])
+            self.assertEqual(process.cdist.call_args.kwargs["workers"], 1)
+            similarity_matrix([f"name {i}" for i in range(name_matching._PARALLEL_MIN_NAMES)])
+            self.assertEqual(process.cdist.call_args.kwargs["workers"], -1)
+
+    def test_mismatched_pairs_score_distinct_names_once(self):
+        names = ["Anna Jürgens", "JUERGENS<<ANNA", "Erika Mustermann", "Frau Anna Juergens"]
+        with patch.object(name_matching, "similarity_matrix", wraps=similarity_matrix) as matrix:
+            pairs = mismatched_pairs(names, threshold=0.9)
+        self.assertEqual(matrix.call_args[0][0], ["anna juergens", "erika mustermann"])
+        self.assertEqual([(i, j) for i, j, _ in pairs], [(0, 2), (1, 2), (2, 3)])
+
+    def test_name_consistency_alerts(self):
+        G = build_graph([
+            {
+                "data": {"document_type": "Passport", "surname": "JÜRGENS", "given_names": "ANNA"},
+                "metadata": {"filename": "passport.jpg", "category": "Identity"}
+            },
+            {
+                "data": {"examinee_name": "Juergens, Anna"},
+                "metadata": {"filename": "dtz.pdf", "category": "Integration"}
+            },
+            {
+                "data": {"applicant_name": "Anna Meyer"},
+                "metadata": {"filename": "payslip.pdf", "category": "Livelihood"}
+            }
+        ])
+        docs = get_documents_by_category(G)
+        alerts = check_name_consistency(G, docs["identity"], docs["integration"])
+
+        self.assertEqual([a["filenames"] for a in alerts], [["passport.jpg", "payslip.pdf"], ["dtz.pdf", "payslip.pdf"]])
+        self.assertEqual(alerts[0]["check"], "Name Consistency")
+        self.assertEqual(alerts[0]["severity"], "HIGH")
+        self.assertTrue(alerts[0]["message"].startswith("Namensabweichung erkannt: 'ANNA JÜRGENS' vs 'Anna Meyer'"))
+
+if __name__ == "__main__":
+    unittest.main()
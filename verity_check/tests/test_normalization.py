@@ -0,0 +1,67 @@
+import unittest
+from datetime import date, datetime
+import networkx as nx
+from verity_check.normalization import MRZ_CENTURY_PIVOT, as_amount, as_date, parse_amount, parse_date
+from verity_check.consistency_check import check_passport_validity
+from verity_check.schemas import normalize_record
+
+class TestNormalization(unittest.TestCase):
+
+    def test_date_formats(self):
+        self.assertEqual(parse_date("2030-01-31"), date(2030, 1, 31))
+        self.assertEqual(parse_date("2030-01-31 12:00"), date(2030, 1, 31))
+        self.assertEqual(parse_date("1.4.2021"), date(2021, 4, 1))
+        self.assertEqual(parse_date("850314"), date(1985, 3, 14))
+        self.assertEqual(parse_date(f"{MRZ_CENTURY_PIVOT:02d}0101"), date(2000 + MRZ_CENTURY_PIVOT, 1, 1))
+        self.assertEqual(parse_date("14. März 2021"), date(2021, 3, 14))
+        self.assertEqual(parse_date("14 MAR 2021"), date(2021, 3, 14))
+        self.assertEqual(parse_date("March 14th, 2021"), date(2021, 3, 14))
+        self.assertEqual(parse_date("29.02.2024"), date(2024, 2, 29))
+
+    def test_mrz_birth_dates_are_in_the_past(self):
+        # Next year's two digits are a future expiry year, but a birth year a century ago
+        next_year = date.today().year + 1
+        mrz = f"{next_year % 100:02d}0101"
+        self.assertEqual(parse_date(mrz), date(next_year, 1, 1))
+        self.assertEqual(parse_date(mrz, birth=True), date(next_year - 100, 1, 1))
+        self.assertEqual(parse_date("050101", birth=True), date(2005, 1, 1))
+        for year in range(100):
+            parsed = parse_date(f"{year:02d}1231", birth=True)
+            self.assertLessEqual(parsed, date.today())
+            self.assertGreater(parsed, date(date.today().year - 101, 12, 31))
+        # The typed record of date_of_birth uses the birth pivot
+        record = normalize_record("Identity", {"date_of_birth": mrz, "valid_until": mrz})
+        self.assertEqual(record["date_of_birth"], date(next_year - 100, 1, 1))
+        self.assertEqual(record["valid_until"], date(next_year, 1, 1))
+
+    def test_invalid_dates(self):
+        for text in ("29.02.2023", "2030-13-01", "851314", "14. Foo 2021", "", "K8X4R2T7", "2030-1-1"):
+            self.assertIsNone(parse_date(text), text)
+
+    def test_amounts(self):
+        self.assertEqual(parse_amount("2.100,50 €"), 2100.5)
+        self.assertEqual(parse_amount("1.234.567 Euro"), 1234567.0)
+        self.assertEqual(parse_amount("-12,5"), -12.5)
+        self.assertIsNone(parse_amount("1.000,00 / 1.200,00"))
+
+    def test_typed_or_raw_values(self):
+        self.assertEqual(as_date(datetime(2021, 4, 1, 8, 30)), date(2021, 4, 1))
+        self.assertEqual(as_date(" 01.04.2021 "), date(2021, 4, 1))
+        self.assertIsNone(as_date(20210401))
+        self.assertEqual(as_amount(900), 900.0)
+        self.assertEqual(as_amount("900,00 €"), 900.0)
+        self.assertIsNone(as_amount(True))
+
+    def test_checks_accept_raw_graph_values(self):
+        G = nx.DiGraph()
+        G.add_node("Document:passport.jpg", type="Document", category="Identity", filename="passport.jpg")
+        G.add_node("Field:document_type", type="StringField", field="document_type", value="Passport")
+        G.add_node("Field:valid_until", type="StringField", field="valid_until", value="01.01.2016")
+        G.add_edge("Document:passport.jpg", "Field:document_type", relation="has_document_type")
+        G.add_edge("Document:passport.jpg", "Field:valid_until", relation="has_valid_until")
+
+        alerts = check_passport_validity(G, ["Document:passport.jpg"])
+        self.assertEqual([a["message"] for a in alerts], ["Pass läuft bald ab oder ist abgelaufen: 2016-01-01"])
+
+if __name__ == "__main__":
+    unittest.main()
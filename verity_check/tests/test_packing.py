@@ -0,0 +1,62 @@
+import os
+import asyncio
+import unittest
+from pathlib import Path
+from PIL import Image
+from verity_check.ingest import encode_image_to_jpeg, process_file, ImageProfile
+from verity_check.packing import (
+    PageBatcher, image_size, estimate_image_tokens, estimate_page_tokens, estimate_document_tokens,
+    pack_pages, merge_extractions
+)
+
+class TestPacking(unittest.TestCase):
+
+    def test_image_tokens_follow_patch_grid(self):
+        # A4 page at 2048px: 52 x 73 patches of 28px
+        self.assertEqual(estimate_image_tokens(1446, 2048), 52 * 73 + 2)
+        self.assertEqual(estimate_image_tokens(28, 28), 4 + 2)  # clamped to the minimum pixel count
+
+        page = encode_image_to_jpeg(Image.new("RGB", (560, 840), "white"))
+        self.assertEqual(image_size(page), (560, 840))
+        self.assertEqual(estimate_page_tokens([page]), [20 * 30 + 2])
+
+    def test_dry_run_matches_ingested_images(self):
+        path = Path(os.path.dirname(__file__)) / "dummy_doc.jpg"
+        for profile in (ImageProfile(), ImageProfile(max_size=448, quality=60)):
+            estimate = estimate_document_tokens(path, path.name, profile)
+            images = process_file(str(path), profile)[0]["images"]
+            self.assertEqual(estimate["image_tokens"], sum(estimate_page_tokens(images)))
+
+    def test_pack_pages_respects_image_limit_and_budget(self):
+        self.assertEqual(pack_pages([100] * 7, budget=10000, max_images=5), [[0, 1, 2, 3, 4], [5, 6]])
+        self.assertEqual(pack_pages([400, 400, 400, 900], budget=1000, max_images=5), [[0, 1], [2], [3]])
+        # A page above the budget is still sent, on its own
+        self.assertEqual(pack_pages([2000, 100], budget=1000, max_images=5), [[0], [1]])
+
+    def test_merge_extractions(self):
+        merged = merge_extractions([
+            {"valid_until": "2030-01-01", "valid_from": None},
+            {"error": "Expecting value", "raw_content": "N/A"},
+            {"valid_until": "2031-01-01", "valid_from": "2020-01-01"}
+        ])
+        self.assertEqual(merged, {"valid_until": "2030-01-01", "valid_from": "2020-01-01"})
+        self.assertIn("error", merge_extractions([{"error": "timeout"}]))
+
+    def test_batcher_groups_by_key_until_full(self):
+        flushed = []
+
+        async def flush(items):
+            flushed.append(list(items))
+            return [item * 10 for item in items]
+
+        async def scenario():
+            batcher = PageBatcher(flush, fits=lambda items: len(items) <= 2, window=0.01)
+            return await asyncio.gather(
+                batcher.submit("a", 1), batcher.submit("a", 2), batcher.submit("a", 3), batcher.submit("b", 4)
+            )
+
+        self.assertEqual(asyncio.run(scenario()), [10, 20, 30, 40])
+        self.assertEqual(sorted(flushed), [[1, 2], [3], [4]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch, AsyncMock
+from verity_check.perception_cache import PerceptionCache, hash_pages, make_key
+from verity_check.perception import extract_data
+
+class TestPerceptionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache.sqlite")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_key_depends_on_pages_model_and_prompt(self):
+        pages = hash_pages([b"page1", b"page2"])
+        key = make_key(pages, "model", "prompt")
+        self.assertEqual(key, make_key(hash_pages([b"page1", b"page2"]), "model", "prompt"))
+        self.assertNotEqual(key, make_key(hash_pages([b"page1"]), "model", "prompt"))
+        self.assertNotEqual(key, make_key(pages, "other-model", "prompt"))
+        self.assertNotEqual(key, make_key(pages, "model", "edited prompt"))
+
+    @patch("verity_check.perception_cache.CACHE_TOUCH_INTERVAL", 0)
+    def test_lru_eviction_by_size(self):
+        cache = PerceptionCache(self.path, max_bytes=100)
+        cache.put("a", "x" * 40)
+        cache.put("b", "y" * 40)
+        # Touch "a" so "b" becomes least recently used
+        self.assertEqual(cache.get("a"), "x" * 40)
+        cache.put("c", "z" * 40)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.stats()["bytes"], 100)
+        cache.close()
+
+    @patch("verity_check.perception_cache.EVICT_BATCH", 2)
+    def test_running_total_survives_replace_and_reopen(self):
+        cache = PerceptionCache(self.path, max_bytes=100)
+        for n in range(10):
+            cache.put(f"k{n}", "x" * 20)
+        cache.put("k9", "y" * 10)
+        total = cache._conn.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+        self.assertEqual(cache.stats()["bytes"], total)
+        self.assertLessEqual(total, 100)
+        cache.close()
+
+        reopened = PerceptionCache(self.path, max_bytes=100)
+        self.assertEqual(reopened.stats()["bytes"], total)
+        reopened.close()
+
+    def test_recent_hits_are_not_rewritten(self):
+        cache = PerceptionCache(self.path)
+        cache.put("a", 1)
+        before = cache._conn.total_changes
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache._conn.total_changes, before)
+        with patch("verity_check.perception_cache.CACHE_TOUCH_INTERVAL", 0):
+            cache.get("a")
+        self.assertEqual(cache._conn.total_changes, before + 1)
+        cache.close()
+
+    @patch("verity_check.perception._post_chat", new_callable=AsyncMock)
+    def test_second_run_makes_no_vlm_calls(self, mock_post):
+        cache = PerceptionCache(self.path)
+        mock_post.side_effect = [
+            '{"category": "Livelihood", "confidence": 0.9}',
+            '{"net_income": 2000}'
+        ]
+
+        with patch("verity_check.perception.get_cache", return_value=cache):
+            first = asyncio.run(extract_data([b"page-bytes"], "payslip.pdf"))
+            second = asyncio.run(extract_data([b"page-bytes"], "payslip.pdf"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(second["category"], "Livelihood")
+        self.assertEqual(second["data"]["net_income"], 2000)
+        self.assertEqual(mock_post.call_count, 2)
+        cache.close()
+
+    @patch("verity_check.perception._post_chat", new_callable=AsyncMock)
+    def test_failed_extraction_is_not_cached(self, mock_post):
+        cache = PerceptionCache(self.path)
+        mock_post.side_effect = [
+            '{"category": "Identity"}',
+            'not json at all',
+            '{"surname": "Mustermann"}'
+        ]
+
+        with patch("verity_check.perception.get_cache", return_value=cache):
+            first = asyncio.run(extract_data([b"page-bytes"], "passport.jpg"))
+            second = asyncio.run(extract_data([b"page-bytes"], "passport.jpg"))
+
+        self.assertIn("error", first["data"])
+        self.assertEqual(second["data"]["surname"], "Mustermann")
+        self.assertEqual(mock_post.call_count, 3)
+        cache.close()
+
+if __name__ == "__main__":
+    unittest.main()
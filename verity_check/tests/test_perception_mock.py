@@ -1,59 +1,272 @@
+import json
+import base64
+import asyncio
 import unittest
-from unittest.mock import patch, MagicMock
-from verity_check.perception import extract_data
+import httpx
+from unittest.mock import patch, Mock
+from verity_check import perception
+from verity_check.perception import extract_data, category_for_doc_type, perception_stats
+from verity_check.perception_cache import hash_pages, make_key
+from verity_check.prompt import PROMPTS
 
+def vlm_reply(content, status_code=200):
+    return httpx.Response(status_code, json={"choices": [{"message": {"content": content}}]})
+
+def sse_reply(deltas, sent):
+    """Streams content deltas as SSE chunks; sent collects the deltas the client actually read."""
+    async def events():
+        for delta in deltas:
+            sent.append(delta)
+            chunk = {"choices": [{"delta": {"content": delta}, "finish_reason": None}]}
+            yield f"data: {json.dumps(chunk)}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+    return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, content=events())
+
+def mock_client(responses, requests_seen):
+    """Returns a client factory whose transport replays responses in order."""
+    replies = iter(responses)
+
+    def handler(request):
+        requests_seen.append(json.loads(request.content))
+        return next(replies)
+
+    return lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+@patch("verity_check.perception.get_cache", return_value=None)
 class TestPerceptionMock(unittest.TestCase):
-    
-    @patch("verity_check.perception.requests.post")
-    def test_auto_categorization_identity(self, mock_post):
-        # Mock response for Categorization
-        mock_cat_response = MagicMock()
-        mock_cat_response.json.return_value = {
-            "choices": [{
-                "message": {
-                    "content": '```json\n{"category": "Identity", "confidence": 0.95}\n```'
-                }
-            }]
-        }
-        
-        # Mock response for Extraction
-        mock_extract_response = MagicMock()
-        mock_extract_response.json.return_value = {
-            "choices": [{
-                "message": {
-                    "content": '```json\n{"surname": "Mustermann"}\n```'
-                }
-            }]
-        }
-        
-        # Configure side_effect to return cat response first, then extract response
-        mock_post.side_effect = [mock_cat_response, mock_extract_response]
-        
-        result = extract_data("fake_base64_string")
-        
+
+    def run_extract(self, *args, **kwargs):
+        async def run():
+            try:
+                return await extract_data(*args, **kwargs)
+            finally:
+                await perception.aclose_client()
+        return asyncio.run(run())
+
+    def test_page_block_is_encoded_once(self, _mock_cache):
+        page = perception.PageImage(b"\xff\xd8 jpeg bytes")
+        perception._chat_payload("Categorize", [page], 256)
+        block = page.block
+        body = json.loads(perception._chat_payload('Extract "fields"', [page, page], 1024))
+
+        self.assertIs(page.block, block)
+        self.assertEqual(body["max_tokens"], 1024)
+        self.assertEqual(body["messages"][0]["content"][0]["text"], 'Extract "fields"')
+        self.assertEqual(
+            body["messages"][0]["content"][2]["image_url"]["url"],
+            "data:image/jpeg;base64," + base64.b64encode(b"\xff\xd8 jpeg bytes").decode()
+        )
+
+    def test_auto_categorization_identity(self, _mock_cache):
+        # Categorization response first, then extraction response
+        requests_seen = []
+        responses = [
+            vlm_reply('```json\n{"category": "Identity", "confidence": 0.95}\n```'),
+            vlm_reply('```json\n{"surname": "Mustermann"}\n```')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"], "passport.jpg")
+
+        self.assertEqual(result["category"], "Identity")
+        self.assertEqual(result["data"]["surname"], "Mustermann")
+        self.assertEqual(len(requests_seen), 2)
+
+    def test_failed_categorization_is_flagged(self, _mock_cache):
+        responses = [vlm_reply("I cannot tell"), vlm_reply('{"surname": "Mustermann"}')]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, [])):
+            result = self.run_extract([b"fake_page"], "scan.jpg")
+
         self.assertEqual(result["category"], "Identity")
+        self.assertTrue(result["categorization_failed"])
         self.assertEqual(result["data"]["surname"], "Mustermann")
-        self.assertEqual(mock_post.call_count, 2)
-        
-    @patch("verity_check.perception.requests.post")
-    def test_provided_category(self, mock_post):
-        # Mock response for Extraction only (no categorization call)
-        mock_extract_response = MagicMock()
-        mock_extract_response.json.return_value = {
-            "choices": [{
-                "message": {
-                    "content": '{"net_income": 2000}'
-                }
-            }]
-        }
-        
-        mock_post.return_value = mock_extract_response
-        
-        result = extract_data("fake_base64_string", doc_category="Livelihood")
-        
+
+    def test_provided_category(self, _mock_cache):
+        # Extraction only (no categorization call)
+        requests_seen = []
+        responses = [vlm_reply('{"net_income": 2000}')]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"], "payslip.pdf", doc_category="Livelihood")
+
+        self.assertEqual(result["category"], "Livelihood")
+        self.assertEqual(result["data"]["net_income"], 2000)
+        self.assertEqual(len(requests_seen), 1)
+
+    def test_doc_type_category_mapping(self, _mock_cache):
+        self.assertEqual(category_for_doc_type("passport"), "Identity")
+        self.assertEqual(category_for_doc_type("Aufenthaltstitel2"), "Identity")
+        self.assertEqual(category_for_doc_type("rent_contract"), "Livelihood")
+        self.assertEqual(category_for_doc_type("sprachzertifikat"), "Integration")
+        self.assertIsNone(category_for_doc_type("other"))
+        self.assertIsNone(category_for_doc_type(None))
+
+        skipped_before = perception_stats()["categorizations_skipped"]
+        requests_seen = []
+        responses = [vlm_reply('{"surname": "Mustermann"}')]
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            self.run_extract([b"fake_page"], "pass.jpg", doc_category=category_for_doc_type("passport"))
+
+        self.assertEqual(perception_stats()["categorizations_skipped"], skipped_before + 1)
+        self.assertEqual(len(requests_seen), 1)
+
+    @patch("verity_check.perception.VLM_BACKOFF_BASE", 0.0)
+    def test_retries_on_overload(self, _mock_cache):
+        requests_seen = []
+        responses = [
+            httpx.Response(503),
+            vlm_reply('{"category": "Integration"}'),
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            vlm_reply('{"certificate_type": "Language Certificate"}')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"], "telc.pdf")
+
+        self.assertEqual(result["category"], "Integration")
+        self.assertEqual(result["data"]["certificate_type"], "Language Certificate")
+        self.assertEqual(len(requests_seen), 4)
+
+    def test_combined_mode_single_round_trip(self, _mock_cache):
+        requests_seen = []
+        responses = [
+            vlm_reply('{"category": "Livelihood", "data": {"document_category": "Payslip", "net_income": 2100.5}}')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"], "payslip.pdf", mode="combined")
+
         self.assertEqual(result["category"], "Livelihood")
+        self.assertEqual(result["data"]["net_income"], 2100.5)
+        self.assertEqual(len(requests_seen), 1)
+
+    def test_combined_mode_falls_back_to_two_step(self, _mock_cache):
+        requests_seen = []
+        responses = [
+            # Unknown category fails validation
+            vlm_reply('{"category": "Payslip", "data": {"net_income": 2100.5}}'),
+            vlm_reply('{"category": "Livelihood"}'),
+            vlm_reply('{"net_income": 2100.5}')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"], "payslip.pdf", mode="combined")
+
+        self.assertEqual(result["category"], "Livelihood")
+        self.assertEqual(result["data"]["net_income"], 2100.5)
+        self.assertEqual(len(requests_seen), 3)
+
+    def test_large_document_is_split_and_merged(self, _mock_cache):
+        requests_seen = []
+        responses = [
+            vlm_reply('{"document_category": "BankStatement", "net_income": null}'),
+            vlm_reply('{"net_income": 1800}')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            result = self.run_extract([b"fake_page"] * 7, "kontoauszug.pdf", doc_category="Livelihood")
+
+        self.assertEqual(result["data"], {"document_category": "BankStatement", "net_income": 1800})
+        image_counts = sorted(len(r["messages"][0]["content"]) - 1 for r in requests_seen)
+        self.assertEqual(image_counts, [2, 5])
+
+    @patch("verity_check.perception.VLM_GROUP_DOCUMENTS", True)
+    def run_grouped(self, documents):
+        async def run():
+            try:
+                return await asyncio.gather(*(
+                    extract_data(images, name, doc_category="Livelihood", batch_key="app-1")
+                    for images, name in documents
+                ))
+            finally:
+                await perception.aclose_client()
+        return asyncio.run(run())
+
+    def test_small_documents_share_one_request(self, _mock_cache):
+        requests_seen = []
+        responses = [vlm_reply('{"documents": [{"net_income": 2000}, {"net_income": 2100}]}')]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            results = self.run_grouped([([b"slip-1"], "slip1.pdf"), ([b"slip-2"], "slip2.pdf")])
+
+        self.assertEqual([r["data"]["net_income"] for r in results], [2000, 2100])
+        self.assertEqual(len(requests_seen), 1)
+        self.assertIn("Document 2: image 2", requests_seen[0]["messages"][0]["content"][0]["text"])
+
+    def test_grouped_results_use_their_own_cache_key(self, mock_cache):
+        cache = mock_cache.return_value = Mock()
+        cache.get.return_value = None
+        responses = [vlm_reply('{"documents": [{"net_income": 2000}, {"net_income": 2100}]}')]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, [])):
+            self.run_grouped([([b"slip-1"], "slip1.pdf"), ([b"slip-2"], "slip2.pdf")])
+
+        single_key = make_key(hash_pages([b"slip-1"]), perception.MODEL_NAME, PROMPTS["Livelihood"])
+        stored = [call.args[0] for call in cache.put.call_args_list]
+        self.assertEqual(len(stored), 2)
+        self.assertNotIn(single_key, stored)
+
+    def test_grouping_is_opt_in(self, _mock_cache):
+        requests_seen = []
+        responses = [vlm_reply('{"net_income": 2000}'), vlm_reply('{"net_income": 2100}')]
+
+        async def run():
+            try:
+                return await asyncio.gather(*(
+                    extract_data(images, name, doc_category="Livelihood", batch_key="app-1")
+                    for images, name in [([b"slip-1"], "slip1.pdf"), ([b"slip-2"], "slip2.pdf")]
+                ))
+            finally:
+                await perception.aclose_client()
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            asyncio.run(run())
+        self.assertEqual(len(requests_seen), 2)
+
+    def test_grouped_request_falls_back_per_document(self, _mock_cache):
+        requests_seen = []
+        responses = [
+            vlm_reply('{"documents": [{"net_income": 2000}]}'),  # one entry for two documents
+            vlm_reply('{"net_income": 2000}'),
+            vlm_reply('{"net_income": 2000}')
+        ]
+
+        with patch("verity_check.perception._create_client", mock_client(responses, requests_seen)):
+            results = self.run_grouped([([b"slip-1"], "slip1.pdf"), ([b"slip-2"], "slip2.pdf")])
+
+        self.assertEqual([r["data"]["net_income"] for r in results], [2000, 2000])
+        self.assertEqual(len(requests_seen), 3)
+
+    @patch("verity_check.perception.VLM_STREAM", True)
+    def test_streamed_extraction_stops_after_first_object(self, _mock_cache):
+        requests_seen, sent = [], []
+        deltas = ['```json\n{"surname": "Muster', 'mann", "remarks": "{not} \\"closed', '"}', '\n```', " trailing text"]
+        stopped_before = perception_stats()["streams_stopped_early"]
+
+        with patch("verity_check.perception._create_client", mock_client([sse_reply(deltas, sent)], requests_seen)):
+            result = self.run_extract([b"fake_page"], "pass.jpg", doc_category="Identity")
+
+        self.assertEqual(result["data"], {"surname": "Mustermann", "remarks": '{not} "closed'})
+        self.assertTrue(requests_seen[0]["stream"])
+        self.assertEqual(len(sent), 3)
+        self.assertEqual(perception_stats()["streams_stopped_early"], stopped_before + 1)
+
+    @patch("verity_check.perception.VLM_GUIDED_JSON", True)
+    def test_guided_json_schema_from_prompt_fields(self, _mock_cache):
+        schema = perception.extraction_schema("Livelihood")["properties"]
+        self.assertEqual(schema["monthly_amount"], {"type": ["number", "null"]})
+        self.assertEqual(schema["is_original"], {"type": ["boolean", "null"]})
+        self.assertEqual(schema["rental_start_date"], {"type": ["string", "null"]})
+
+        requests_seen = []
+        with patch("verity_check.perception._create_client", mock_client([vlm_reply('{"net_income": 2000}')], requests_seen)):
+            result = self.run_extract([b"fake_page"], "payslip.pdf", doc_category="Livelihood")
+
         self.assertEqual(result["data"]["net_income"], 2000)
-        self.assertEqual(mock_post.call_count, 1)
+        response_format = requests_seen[0]["response_format"]
+        self.assertEqual(response_format["type"], "json_schema")
+        self.assertEqual(response_format["json_schema"]["schema"]["properties"], schema)
 
 if __name__ == "__main__":
     unittest.main()
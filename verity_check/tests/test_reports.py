@@ -0,0 +1,61 @@
+import json
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import evaluate_checks
+from verity_check.reports import JsonlReportWriter, read_report
+
+ITEM = {
+    "data": {"document_type": "Passport", "valid_until": "01.01.2016"},
+    "record": {"document_type": "Passport", "valid_until": date(2016, 1, 1)},
+    "metadata": {"filename": "passport.jpg", "category": "Identity"}
+}
+
+class TestJsonlReports(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "report.jsonl"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_records_are_written_as_produced(self):
+        G = build_graph([ITEM])
+        with JsonlReportWriter(str(self.path), application_id="42") as writer:
+            writer.document(ITEM)
+            # Visible on disk before the report is finished
+            self.assertEqual(json.loads(self.path.read_text())["type"], "document")
+            alerts, timings = evaluate_checks(G, on_alerts=writer.alerts)
+            writer.summary({"extracted_data": [ITEM], "alerts": alerts, "check_timings": timings, "status": "FAIL"})
+
+        lines = [json.loads(line) for line in self.path.read_text().splitlines()]
+        self.assertEqual([line["type"] for line in lines], ["document"] + ["alert"] * len(alerts) + ["summary"])
+        self.assertNotIn("record", lines[0])
+        self.assertEqual({line["application_id"] for line in lines}, {"42"})
+        self.assertEqual(lines[-1]["alerts"], len(alerts))
+
+        report = read_report(str(self.path))
+        self.assertTrue(report["complete"])
+        self.assertEqual(report["status"], "FAIL")
+        self.assertEqual(sorted(a["message"] for a in report["alerts"]), sorted(a["message"] for a in alerts))
+        self.assertEqual(set(report["check_timings"]), set(timings))
+
+    def test_partial_report_survives_crash(self):
+        writer = JsonlReportWriter(str(self.path))
+        writer.document(ITEM)
+        writer.alerts("passport_validity", [{"severity": "HIGH", "check": "Passport Validity", "message": "x", "filenames": []}])
+        # Crash: no summary, file never closed, last line cut off
+        with open(self.path, "a") as f:
+            f.write('{"type": "ale')
+
+        report = read_report(str(self.path))
+        self.assertFalse(report["complete"])
+        self.assertEqual(len(report["extracted_data"]), 1)
+        self.assertEqual(report["alerts"][0]["check_id"], "passport_validity")
+        writer.close()
+
+if __name__ == "__main__":
+    unittest.main()
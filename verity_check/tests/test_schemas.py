@@ -0,0 +1,83 @@
+import unittest
+from datetime import date
+from verity_check.schemas import (
+    FIELD_KINDS, AMOUNT, DATE, ENTITY, NAME, TEXT, field_kind, normalize_record, parse_amount, parse_date
+)
+from verity_check.perception import extraction_schema
+from verity_check.knowledge_graph import build_graph
+from verity_check.consistency_check import run_checks
+
+class TestSchemas(unittest.TestCase):
+
+    def test_schemas_cover_prompt_fields(self):
+        for category, fields in FIELD_KINDS.items():
+            self.assertEqual(set(fields), set(extraction_schema(category)["properties"]), category)
+
+    def test_parse_date_and_amount(self):
+        self.assertEqual(parse_date("2030-01-31"), date(2030, 1, 31))
+        self.assertEqual(parse_date("2030-01-31T00:00:00"), date(2030, 1, 31))
+        self.assertEqual(parse_date("31.01.2030"), date(2030, 1, 31))
+        self.assertIsNone(parse_date("31.02.2030"))
+        self.assertIsNone(parse_date("K8X4R2T7"))
+
+        self.assertEqual(parse_amount("2100.5"), 2100.5)
+        self.assertEqual(parse_amount("2500.00"), 2500.0)
+        self.assertEqual(parse_amount("2.100,50 €"), 2100.5)
+        self.assertEqual(parse_amount("EUR 1.234"), 1234.0)
+        self.assertEqual(parse_amount("1,234.56"), 1234.56)
+        self.assertIsNone(parse_amount("1.000,00 / 1.200,00"))
+        self.assertIsNone(parse_amount("siehe Anlage"))
+
+    def test_normalize_record(self):
+        record = normalize_record("Livelihood", {
+            "applicant_name": "  Frau  Erika Mustermann ",
+            "net_income": "2.100,50 €",
+            "total_warm_rent": 900,
+            "rental_start_date": "01.04.2021",
+            "has_signature": "ja",
+            "gross_income": "siehe Anlage",
+            "landlord_name": None
+        })
+        self.assertEqual(record, {
+            "applicant_name": "Erika Mustermann",
+            "net_income": 2100.5,
+            "total_warm_rent": 900.0,
+            "rental_start_date": date(2021, 4, 1),
+            "has_signature": True,
+            "gross_income": "siehe Anlage",
+            "landlord_name": None
+        })
+        # Fields outside the schemas are typed by their name
+        self.assertEqual(field_kind("Livelihood", "employee_name"), NAME)
+        self.assertEqual(field_kind(None, "contract_end"), DATE)
+        self.assertEqual(field_kind("Integration", "institute_name"), ENTITY)
+        self.assertEqual(field_kind("Identity", "nationality"), TEXT)
+        self.assertEqual(FIELD_KINDS["Livelihood"]["monthly_gross"], AMOUNT)
+
+    def test_checks_use_typed_values(self):
+        extracted_data = [
+            {
+                "data": {"document_type": "Passport", "surname": "Mustermann", "given_names": "Erika",
+                         "valid_from": "01.01.2015", "valid_until": "01.01.2016"},
+                "metadata": {"filename": "passport.jpg", "category": "Identity"}
+            },
+            {
+                "data": {"applicant_name": "Frau Erika Mustermann", "net_income": "2.100,50 €"},
+                "metadata": {"filename": "payslip.pdf", "category": "Livelihood"}
+            },
+            {
+                "data": {"applicant_name": "Erika Mustermann", "total_warm_rent": "1.800,00 EUR"},
+                "metadata": {"filename": "rent.pdf", "category": "Livelihood"}
+            }
+        ]
+        G = build_graph(extracted_data)
+        self.assertEqual(G.nodes["Date:passport.jpg:valid_until"]["value"], date(2016, 1, 1))
+        self.assertEqual(G.nodes["Period:passport.jpg"]["start"], date(2015, 1, 1))
+
+        alerts = {a["check"]: a for a in run_checks(G)}
+        self.assertIn("Passport Validity", alerts)
+        self.assertNotIn("Name Consistency", alerts)
+        self.assertIn("€2100.50 - €1800.00", alerts["Livelihood Calculation"]["message"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import time
+import asyncio
+import unittest
+from collections import deque
+from unittest.mock import patch
+from verity_check.worker_pool import WorkerPool, get_pool, shutdown_pool, pool_stats
+
+class TestWorkerPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool(max_workers=2, queue_size=1)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_submit_and_stats(self):
+        futures = [self.pool.submit(pow, 2, n) for n in range(6)]
+        self.assertEqual([f.result() for f in futures], [1, 2, 4, 8, 16, 32])
+
+        stats = self.pool.stats()
+        self.assertEqual(stats["submitted"], 6)
+        self.assertEqual(stats["completed"], 6)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_failed_task_releases_slot(self):
+        future = self.pool.submit(int, "not a number")
+        with self.assertRaises(ValueError):
+            future.result()
+
+        self.assertEqual(self.pool.stats()["failed"], 1)
+        # All slots must be free again
+        futures = [self.pool.submit(abs, -n) for n in range(3)]
+        self.assertEqual([f.result() for f in futures], [0, 1, 2])
+
+    def test_run_async(self):
+        async def run_all():
+            return await asyncio.gather(*(self.pool.run(pow, 3, n) for n in range(5)))
+
+        self.assertEqual(asyncio.run(run_all()), [1, 3, 9, 27, 81])
+
+    def test_cancelled_waiters_do_not_leak_slots(self):
+        async def scenario():
+            # 3 slots: fill them, then queue waiters and cancel them while they wait
+            running = [asyncio.ensure_future(self.pool.run(time.sleep, 0.3)) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            waiters = [asyncio.ensure_future(self.pool.run(pow, 2, n)) for n in range(4)]
+            await asyncio.sleep(0.05)
+            for waiter in waiters:
+                waiter.cancel()
+            # A cancelled caller of a running task must not break the pool either
+            running[0].cancel()
+            await asyncio.gather(*running, *waiters, return_exceptions=True)
+            await asyncio.sleep(0.05)
+            return await asyncio.wait_for(
+                asyncio.gather(*(self.pool.run(pow, 2, n) for n in range(6))), timeout=10
+            )
+
+        self.assertEqual(asyncio.run(scenario()), [1, 2, 4, 8, 16, 32])
+        self.assertEqual(self.pool.stats()["in_flight"], 0)
+        self.assertEqual(self.pool._waiters, deque())
+
+    def test_failed_submit_wakes_a_waiter(self):
+        async def scenario():
+            for _ in range(3):
+                self.pool._slots.acquire()
+            waiter = asyncio.ensure_future(self.pool.run(pow, 2, 3))
+            await asyncio.sleep(0.05)
+            # A submit that fails gives its slot back and must hand it to the waiter
+            with patch.object(self.pool._executor, "submit", side_effect=RuntimeError("pool broken")):
+                with self.assertRaises(RuntimeError):
+                    self.pool._submit_acquired(pow, (2, 1))
+            result = await asyncio.wait_for(waiter, timeout=10)
+            for _ in range(2):
+                self.pool._slots.release()
+            return result
+
+        self.assertEqual(asyncio.run(scenario()), 8)
+
+    def test_shared_pool_lifecycle(self):
+        pool = get_pool()
+        self.assertIs(get_pool(), pool)
+        self.assertEqual(pool.submit(pow, 2, 3).result(), 8)
+        self.assertEqual(pool_stats()["completed"], 1)
+
+        shutdown_pool()
+        self.assertEqual(pool_stats(), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Process-wide worker pool for CPU-bound ingest work (PDF rasterization, JPEG encoding).
+
+The pool is created lazily on first use and shared by every caller in the process,
+so an application with many documents no longer forks a fresh ProcessPoolExecutor
+per document. The API creates and shuts it down in its FastAPI lifespan.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import concurrent.futures
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+# Pool configuration - can be overridden by env vars
+POOL_SIZE = int(os.getenv("INGEST_POOL_SIZE", str(os.cpu_count() or 1)))
+POOL_QUEUE_SIZE = int(os.getenv("INGEST_POOL_QUEUE_SIZE", str(POOL_SIZE * 2)))
+
+
+class PoolQueueFull(RuntimeError):
+    """Raised when no queue slot became free within the submit timeout."""
+
+
+def _timed_call(fn: Callable, args: tuple) -> tuple:
+    """Runs fn(*args) inside the worker and returns (result, seconds spent in the worker)."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class WorkerPool:
+    """
+    ProcessPoolExecutor with a bounded queue and basic metrics.
+
+    At most max_workers tasks run and queue_size tasks wait; further submits block
+    until a slot frees up, which keeps bursts of large PDFs from piling up pickled
+    results in memory.
+    """
+
+    def __init__(self, max_workers: int = POOL_SIZE, queue_size: int = POOL_QUEUE_SIZE):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers + queue_size)
+        self._lock = threading.Lock()
+        # Event-loop tasks waiting for a slot, woken by _record (no thread blocks per waiter)
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._task_seconds_total = 0.0
+        self._task_seconds_max = 0.0
+        self._wall_seconds_total = 0.0
+
+    def submit(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> concurrent.futures.Future:
+        """Submits fn(*args), blocking while the queue is full. Returns a Future with fn's result."""
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolQueueFull(f"Ingest pool queue is full ({self.queue_size} waiting tasks)")
+        return self._submit_acquired(fn, args)
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Awaitable variant of submit() for use from the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Queue is full - wait for a released slot without blocking the event loop or a thread.
+            # Registering under the lock _record releases under means no release is missed.
+            with self._lock:
+                if self._slots.acquire(blocking=False):
+                    break
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+                        raise
+                # Woken just before the cancellation: pass the wake-up on
+                self._wake_next()
+                raise
+        return await asyncio.wrap_future(self._submit_acquired(fn, args))
+
+    def _wake_next(self):
+        with self._lock:
+            waiter = self._waiters.popleft() if self._waiters else None
+        if waiter is not None:
+            loop, future = waiter
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+    def _submit_acquired(self, fn: Callable, args: tuple) -> concurrent.futures.Future:
+        submitted_at = time.perf_counter()
+        result_future = concurrent.futures.Future()
+
+        try:
+            inner = self._executor.submit(_timed_call, fn, args)
+        except Exception:
+            self._slots.release()
+            self._wake_next()
+            raise
+
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        def _done(inner_future: concurrent.futures.Future):
+            wall_seconds = time.perf_counter() - submitted_at
+            # A caller that was cancelled (e.g. an aborted request) no longer wants the result
+            if not result_future.set_running_or_notify_cancel():
+                self._record(wall_seconds, 0.0, failed=inner_future.cancelled() or inner_future.exception() is not None)
+                return
+            try:
+                result, task_seconds = inner_future.result()
+            except BaseException as e:
+                self._record(wall_seconds, 0.0, failed=True)
+                result_future.set_exception(e)
+            else:
+                self._record(wall_seconds, task_seconds, failed=False)
+                result_future.set_result(result)
+
+        inner.add_done_callback(_done)
+        return result_future
+
+    def _record(self, wall_seconds: float, task_seconds: float, failed: bool):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._task_seconds_total += task_seconds
+                self._task_seconds_max = max(self._task_seconds_max, task_seconds)
+                self._wall_seconds_total += wall_seconds
+        self._slots.release()
+        self._wake_next()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns queue depth and per-task timing metrics."""
+        with self._lock:
+            completed = self._completed
+            return {
+                "max_workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "submitted": self._submitted,
+                "completed": completed,
+                "failed": self._failed,
+                "avg_task_seconds": self._task_seconds_total / completed if completed else 0.0,
+                "max_task_seconds": self._task_seconds_max,
+                "avg_wall_seconds": self._wall_seconds_total / completed if completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stops the workers. With wait=False, queued tasks are cancelled."""
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_pool: Optional[WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> WorkerPool:
+    """Returns the process-wide pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+        return _pool
+
+
+def shutdown_pool(wait: bool = True):
+    """Shuts down the process-wide pool (a later get_pool() creates a new one)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Returns metrics of the process-wide pool, or an empty dict if it is not running."""
+    pool = _pool
+    return pool.stats() if pool is not None else {}